@@ -5,40 +5,76 @@ Start with:
 Then open http://localhost:8000
 
 POST /predict  { "code": "def foo(x): ..." }
-GET  /health
+GET  /health        (GET /health/live, /health/ready for orchestrators)
+POST /predict?attributions=true   + integrated-gradients attributions
+POST /explain  { "code": ... }   exact Shapley values of the 10 features
+POST /suggest-renames { "code": ... }   better names for weak identifiers
+POST /score-identifiers { "files": [...] }   naming quality only — no model, no torch work
+POST /predict-file { "code": <whole file>, "language": ... }   per-function verdicts + file verdict
+GET  /domains       domains a request may pin with "domain" (default: auto-detect)
+GET  /metrics       (Prometheus text format: per-stage latency, sizes, model versions)
+
+Set PROFILING_ENABLED=1 and send `X-Profile: 1` (or `?profile=1`) to get a
+cProfile + torch operator breakdown of that request in a `profile` field.
 """
 
 from __future__ import annotations
 
-import ast
+import asyncio
 import logging
-import re
+import os
 import sys
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Any
 
 import numpy as np
+import pandas as pd
 import torch
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from src.admission import (AdmissionController, AdmissionLimits, AdmissionRejected, Deadline,
+                           DeadlineExceeded, RequestTooLarge, estimate_cost)
+from src.attributions import integrated_gradients
+from src.checkpoint_io import (checkpoint_available, checkpoint_version, load_checkpoint,
+                               load_state_dict_zero_copy)
 from src.dataset import LABELS, MAX_IDS, FEAT_DIM
 from src.embeddings import EMBED_DIM, Embedder
+from src.chunking import aggregate, split_file
 from src.ensemble_model import ECRVRMVEL
-from src.features import FEATURE_NAMES, compute_features
+from src.features import (FEATURE_NAMES, compute_features, domain_names, feature_memo_info,
+                          infer_domain, lexicon_fingerprint, use_lexicon)
+from src.identifier_quality import cache_info as iq_cache_info
+from src.identifier_quality import identifier_quality, iq_label, score_files
+from src.inference import forward_probs, sabilstm_inputs
+from src.lexicon import Lexicon
 from src.model import SABiLSTM
-from src.preprocess import extract_and_normalise
+from src.preprocess import extract_and_normalise, normalise
+from src.profiling import PROFILING_ENABLED, run_profiled
+from src.renames import is_weak, suggest_renames
+from src.shapley import ExactShapley, background_from_codes
+from src.snippet_dataset import MAX_TOKENS
+from src.structural import compute_structural as _compute_structural
+from src.structural import normalize_structural as _normalize_structural
+from src.telemetry import (BATCH_SIZE, CACHE_EVENTS, IDENTIFIERS, MODEL_INFO, REGISTRY,
+                           REQUEST_SECONDS, TOKENS, Counter, Gauge, span)
+from src.warmup import parse_batch_sizes, warm_up_ecrvr, warm_up_embedder, warm_up_sabilstm
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(message)s")
 
+# Each checkpoint may also exist in the mmap'd split format (same stem,
+# .safetensors + .json sidecar) written by convert_checkpoints.py — preferred
+# when present because it loads without unpickling.
 CHECKPOINT = Path("artifacts/iraf_xadl_augmented.pt")
 ECRVR_CHECKPOINT = Path("artifacts/ecrvr_mvel.pt")
 
@@ -48,52 +84,8 @@ ECRVR_CHECKPOINT = Path("artifacts/ecrvr_mvel.pt")
 _state: dict[str, Any] = {}
 
 
-def _compute_structural(code: str) -> dict[str, float]:
-    """Compute the 7 raw structural features from a code string."""
-    lines = [l for l in code.splitlines() if l.strip()]
-    num_of_lines = max(len(lines), 1)
-    code_length = len(code)
-    line_length = float(np.mean([len(l) for l in lines])) if lines else 0.0
-    loop_count = len(re.findall(r"\bfor\b|\bwhile\b", code))
-
-    branches = len(re.findall(
-        r"\bif\b|\belif\b|\bfor\b|\bwhile\b|\bexcept\b|\band\b|\bor\b", code))
-    cyclomatic_complexity = max(1, branches)
-
-    indent_sizes = [len(l) - len(l.lstrip()) for l in code.splitlines() if l.strip()]
-    indents = max(indent_sizes) // 4 if indent_sizes else 1
-
-    try:
-        tree = ast.parse(code)
-        identifiers = len([n for n in ast.walk(tree) if isinstance(n, ast.Name)])
-    except SyntaxError:
-        identifiers = len(re.findall(r"\b[a-zA-Z_]\w*\b", code))
-
-    return {
-        "num_of_lines": num_of_lines,
-        "code_length": code_length,
-        "cyclomatic_complexity": cyclomatic_complexity,
-        "indents": indents,
-        "loop_count": loop_count,
-        "line_length": line_length,
-        "identifiers": identifiers,
-    }
-
-
-def _normalize_structural(raw: dict[str, float], stats: dict) -> np.ndarray:
-    """Normalise raw structural features using training-set min/max."""
-    vec = []
-    for col in ["num_of_lines", "code_length", "cyclomatic_complexity",
-                "indents", "loop_count", "line_length", "identifiers"]:
-        lo = stats[col]["min"]
-        hi = stats[col]["max"]
-        val = float(np.clip((raw[col] - lo) / max(hi - lo, 1e-6), 0.0, 1.0))
-        vec.append(val)
-    return np.array(vec, dtype=np.float32)
-
-
-DEMO_MODE = not CHECKPOINT.exists()
-ECRVR_DEMO_MODE = not ECRVR_CHECKPOINT.exists()
+DEMO_MODE = not checkpoint_available(CHECKPOINT)
+ECRVR_DEMO_MODE = not checkpoint_available(ECRVR_CHECKPOINT)
 
 
 def _demo_predict(code: str) -> dict:
@@ -158,48 +150,153 @@ def _demo_predict_snippet(code: str) -> dict:
     }
 
 
+# ---------------------------------------------------------------------------
+# Background loading + warm-up
+#
+# `lifespan` returns immediately so the server accepts connections (and
+# answers /health/live) while checkpoints load in a worker thread. Each model
+# is published into `_state` only after its warm-up, so endpoints keep
+# returning 503 until they can serve at steady-state latency; /health/ready
+# flips to 200 once every non-demo model is published.
+# ---------------------------------------------------------------------------
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "1") not in {"0", "false", "no"}
+WARMUP_BATCH_SIZES = parse_batch_sizes(os.environ.get("WARMUP_BATCH_SIZES", "1,8"))
+WARMUP_MAX_ROUNDS = int(os.environ.get("WARMUP_MAX_ROUNDS", "10"))
+WARMUP_TOLERANCE = float(os.environ.get("WARMUP_TOLERANCE", "0.2"))
+
+
+def _set_status(name: str, state: str, **extra: Any) -> None:
+    _state.setdefault("status", {}).setdefault(name, {}).update(state=state, **extra)
+
+
+def _warm_kw() -> dict:
+    return {"max_rounds": WARMUP_MAX_ROUNDS, "tol": WARMUP_TOLERANCE}
+
+
+LEXICON_PATH = os.environ.get("LEXICON_PATH", "")
+FEATURE_DOMAIN = os.environ.get("FEATURE_DOMAIN", "auto")   # "auto" or a domain to pin
+
+
+def _load_lexicon() -> None:
+    """Switch the features to the compiled lexicon named by LEXICON_PATH."""
+    if not LEXICON_PATH:
+        return
+    if not Path(LEXICON_PATH).exists():
+        logger.warning("LEXICON_PATH=%s not found — using the built-in word lists", LEXICON_PATH)
+        return
+    lexicon = Lexicon.open(LEXICON_PATH)
+    use_lexicon(lexicon)
+    MODEL_INFO.set(1, model="lexicon", version=lexicon.fingerprint, format="mmap")
+    logger.info("Lexicon: %s (%d words, %d domains)", LEXICON_PATH, len(lexicon), len(lexicon.domains))
+
+
+def _load_models() -> None:
+    try:
+        if not DEMO_MODE or not ECRVR_DEMO_MODE:
+            # Shared CodeBERT embedder — needed by IRAF-XADL and/or ECRVR-MVEL.
+            logger.info("Loading CodeBERT embedder...")
+            _set_status("embedder", "loading")
+            t0 = time.perf_counter()
+            embedder = Embedder(use_codebert=True)
+            load_s = time.perf_counter() - t0
+            _set_status("embedder", "warming", backend=embedder.name, load_seconds=round(load_s, 3))
+            warm = warm_up_embedder(embedder, MAX_TOKENS, **_warm_kw()) if WARMUP_ENABLED else {}
+            _state["embedder"] = embedder
+            MODEL_INFO.set(1, model="embedder", version=embedder.name, format="")
+            _set_status("embedder", "ready", warmup=warm)
+
+        # --- IRAF-XADL (Paper 1) ---
+        if not DEMO_MODE:
+            _set_status("iraf_xadl", "loading")
+            t0 = time.perf_counter()
+            ckpt = load_checkpoint(CHECKPOINT)
+            struct_dim = ckpt.get("struct_dim", 7)
+            model = SABiLSTM(num_classes=len(LABELS), struct_dim=struct_dim)
+            load_state_dict_zero_copy(model, ckpt["state_dict"])
+            model.eval()
+            _set_status("iraf_xadl", "warming", load_seconds=round(time.perf_counter() - t0, 3))
+            warm = (warm_up_sabilstm(model, WARMUP_BATCH_SIZES, MAX_IDS, EMBED_DIM, FEAT_DIM,
+                                     struct_dim, **_warm_kw()) if WARMUP_ENABLED else {})
+            if ckpt.get("lexicon") != lexicon_fingerprint():
+                logger.warning("IRAF-XADL was trained with lexicon %s but %s is active — "
+                               "MC/LF/DR will differ from training", ckpt.get("lexicon") or "built-in",
+                               lexicon_fingerprint() or "built-in")
+            _state["struct_dim"] = struct_dim
+            _state["norm_stats"] = ckpt.get("norm_stats", {})
+            _state["feature_background"] = _feature_background(ckpt)
+            _state["shapley"] = ExactShapley(model, _state["feature_background"])
+            _state["model"] = model
+            fmt, version = checkpoint_version(CHECKPOINT)
+            MODEL_INFO.set(1, model="iraf_xadl", version=version, format=fmt)
+            _set_status("iraf_xadl", "ready", warmup=warm, version=version)
+
+        # --- ECRVR-MVEL (Paper 2) ---
+        if not ECRVR_DEMO_MODE:
+            _set_status("ecrvr_mvel", "loading")
+            t0 = time.perf_counter()
+            eckpt = load_checkpoint(ECRVR_CHECKPOINT)
+            struct_dim = eckpt.get("struct_dim", 7)
+            max_tokens = eckpt.get("max_tokens", 80)
+            ecrvr_model = ECRVRMVEL(struct_dim=struct_dim, num_classes=len(LABELS))
+            load_state_dict_zero_copy(ecrvr_model, eckpt["state_dict"])
+            ecrvr_model.eval()
+            _set_status("ecrvr_mvel", "warming", load_seconds=round(time.perf_counter() - t0, 3))
+            warm = (warm_up_ecrvr(ecrvr_model, WARMUP_BATCH_SIZES, max_tokens, EMBED_DIM,
+                                  struct_dim, **_warm_kw()) if WARMUP_ENABLED else {})
+            _state["ecrvr_struct_stats"] = eckpt.get("struct_stats", {})
+            _state["ecrvr_max_tokens"] = max_tokens
+            _state["ecrvr_metrics"] = eckpt.get("metrics", {})
+            _state["ecrvr_model"] = ecrvr_model
+            fmt, version = checkpoint_version(ECRVR_CHECKPOINT)
+            MODEL_INFO.set(1, model="ecrvr_mvel", version=version, format=fmt)
+            _set_status("ecrvr_mvel", "ready", warmup=warm, version=version)
+    except Exception as exc:
+        logger.exception("Model loading failed")
+        for name, st in _state.get("status", {}).items():
+            if st["state"] not in {"ready", "demo"}:
+                _set_status(name, "failed", error=str(exc))
+        return
+    logger.info("Ready.")
+
+
+def _feature_background(ckpt: dict) -> np.ndarray:
+    """Reference feature row(s) for /explain: saved by the trainer, or the mean
+    over the bundled sample set for older checkpoints."""
+    if ckpt.get("feature_background"):
+        return np.asarray(ckpt["feature_background"], dtype=np.float32)
+    sample = Path("data/sample_python.csv")
+    codes = pd.read_csv(sample)["code"].astype(str).tolist() if sample.exists() else []
+    return background_from_codes(codes, "python")
+
+
+def _is_ready() -> bool:
+    status = _state.get("status", {})
+    return bool(status) and all(s["state"] in {"ready", "demo"} for s in status.values())
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # --- IRAF-XADL (Paper 1) ---
+    _state["started_at"] = time.time()
+    _load_lexicon()                      # mmap only — cheap enough to do inline
     if DEMO_MODE:
         logger.warning("IRAF-XADL checkpoint not found — starting in DEMO MODE (heuristic scores only)")
         _state["demo"] = True
+        _set_status("iraf_xadl", "demo")
+        MODEL_INFO.set(1, model="iraf_xadl", version="demo", format="")
     else:
-        logger.info("Loading checkpoint: %s", CHECKPOINT)
-        ckpt = torch.load(CHECKPOINT, map_location="cpu")
-        struct_dim = ckpt.get("struct_dim", 7)
-        norm_stats = ckpt.get("norm_stats", {})
-
-        model = SABiLSTM(num_classes=len(LABELS), struct_dim=struct_dim)
-        model.load_state_dict(ckpt["state_dict"])
-        model.eval()
-
-        _state["model"] = model
-        _state["struct_dim"] = struct_dim
-        _state["norm_stats"] = norm_stats
-
-    # Shared CodeBERT embedder — needed by IRAF-XADL (if loaded) and/or ECRVR-MVEL.
-    if not DEMO_MODE or not ECRVR_DEMO_MODE:
-        logger.info("Loading CodeBERT embedder...")
-        _state["embedder"] = Embedder(use_codebert=True)
-
-    # --- ECRVR-MVEL (Paper 2) ---
+        _set_status("iraf_xadl", "pending")
     if ECRVR_DEMO_MODE:
         logger.warning("ECRVR-MVEL checkpoint not found — starting in DEMO MODE (heuristic scores only)")
         _state["ecrvr_demo"] = True
+        _set_status("ecrvr_mvel", "demo")
+        MODEL_INFO.set(1, model="ecrvr_mvel", version="demo", format="")
     else:
-        logger.info("Loading checkpoint: %s", ECRVR_CHECKPOINT)
-        eckpt = torch.load(ECRVR_CHECKPOINT, map_location="cpu")
-        ecrvr_model = ECRVRMVEL(struct_dim=eckpt.get("struct_dim", 7), num_classes=len(LABELS))
-        ecrvr_model.load_state_dict(eckpt["state_dict"])
-        ecrvr_model.eval()
-
-        _state["ecrvr_model"] = ecrvr_model
-        _state["ecrvr_struct_stats"] = eckpt.get("struct_stats", {})
-        _state["ecrvr_max_tokens"] = eckpt.get("max_tokens", 80)
-        _state["ecrvr_metrics"] = eckpt.get("metrics", {})
+        _set_status("ecrvr_mvel", "pending")
+    if not DEMO_MODE or not ECRVR_DEMO_MODE:
+        _set_status("embedder", "pending")
 
-    logger.info("Ready.")
+    # Keep a reference so the task is not garbage-collected mid-load.
+    _state["loader"] = asyncio.create_task(asyncio.to_thread(_load_models))
     yield
     _state.clear()
 
@@ -213,6 +310,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def _time_requests(request: Request, call_next):
+    """End-to-end latency per route, including response validation + JSON encoding."""
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    # Label by route template, never the raw path, to keep cardinality bounded.
+    path = getattr(route, "path", "unmatched")
+    REQUEST_SECONDS.observe(time.perf_counter() - t0, path=path, status=str(response.status_code))
+    return response
+
 # ---------------------------------------------------------------------------
 # Request / response models
 # ---------------------------------------------------------------------------
@@ -220,6 +329,7 @@ app.add_middleware(
 class PredictRequest(BaseModel):
     code: str
     language: str = "python"
+    domain: str | None = None         # pin the DR domain; None/"auto" = FEATURE_DOMAIN
 
 
 class BatchPredictRequest(BaseModel):
@@ -229,6 +339,7 @@ class BatchPredictRequest(BaseModel):
 class DriRequest(BaseModel):
     code: str
     language: str = "python"
+    domain: str | None = None
     pass_ratio: float | None = None   # 0.0–1.0; None = unknown
 
 
@@ -256,6 +367,23 @@ class IdentifierInfo(BaseModel):
     influence: str            # "High" | "Medium" | "Low" — relative to other identifiers
 
 
+class IdentifierAttribution(BaseModel):
+    name: str
+    total: float          # embedding + features
+    embedding: float      # through the CodeBERT embedding
+    features: float       # through the 10 handcrafted features
+
+
+class Attributions(BaseModel):
+    method: str
+    target: str                                   # class whose probability is explained
+    steps: int
+    baseline_probability: float
+    identifiers: list[IdentifierAttribution]      # same order as PredictResponse.identifiers
+    features: dict[str, float]                    # summed over identifiers
+    convergence_delta: float                      # sum of attributions - (P(x) - P(baseline))
+
+
 class PredictResponse(BaseModel):
     label: str
     confidence: float
@@ -265,6 +393,119 @@ class PredictResponse(BaseModel):
     explanation: str
     identifier_quality_score: float   # 0-1, purely from the 10 naming features
     identifier_quality_label: str     # High / Medium / Low
+    attributions: Attributions | None = None   # only with ?attributions=true
+    domain: str | None = None         # DR domain used (pinned or auto-detected)
+
+
+class FeatureAttribution(BaseModel):
+    name: str
+    value: float                      # mean over the snippet's identifiers
+    shapley: dict[str, float]         # High / Medium / Low -> contribution to that probability
+
+
+class ExplainResponse(BaseModel):
+    label: str
+    probabilities: dict[str, float]
+    base_probabilities: dict[str, float]   # every feature at the background value
+    attributions: list[FeatureAttribution] # sorted by |shapley[label]|, largest first
+    method: str
+    coalitions: int
+    seconds: float
+
+
+class SuggestRenamesRequest(BaseModel):
+    code: str
+    language: str = "python"
+    top_k: int = 3
+    domain: str | None = None
+
+
+class RenameCandidate(BaseModel):
+    name: str
+    p_high: float                     # P(High) with only this identifier renamed
+    uplift: float                     # p_high - P(High) of the original snippet
+    features: dict[str, float]
+
+
+class WeakIdentifier(BaseModel):
+    name: str
+    kind: str
+    features: dict[str, float]        # the MC / NC scores that flagged it
+    suggestions: list[RenameCandidate]
+
+
+class SuggestRenamesResponse(BaseModel):
+    label: str
+    p_high: float
+    weak_identifiers: list[WeakIdentifier]
+    candidates_scored: int
+    seconds: float
+
+
+class ScoreFile(BaseModel):
+    code: str
+    language: str = "python"
+    path: str | None = None           # echoed back so callers can match results
+
+
+class ScoreIdentifiersRequest(BaseModel):
+    files: list[ScoreFile]
+
+
+class ScoredIdentifier(BaseModel):
+    name: str
+    kind: str
+    features: dict[str, float]        # MC, NC, OL, CLS
+    score: float
+
+
+class ScoredFile(BaseModel):
+    path: str | None = None
+    identifier_quality_score: float
+    identifier_quality_label: str
+    identifiers: list[ScoredIdentifier]
+
+
+class ScoreIdentifiersResponse(BaseModel):
+    files: list[ScoredFile]
+    identifiers_scored: int
+    seconds: float
+
+
+class PredictFileRequest(BaseModel):
+    code: str
+    language: str = "python"
+    path: str | None = None           # echoed back so callers can match results
+    domain: str | None = None
+
+
+class ChunkVerdict(BaseModel):
+    name: str                         # "parse_args", "Parser", "Parser.feed", "<module>"
+    kind: str                         # "function" | "class" | "method" | "module"
+    start_line: int
+    end_line: int
+    label: str
+    confidence: float
+    probabilities: dict[str, float]
+    identifiers: int                  # extracted from the chunk
+    identifiers_scored: int           # ... of which the model read (at most MAX_IDS)
+    identifier_quality_score: float
+
+
+class PredictFileResponse(BaseModel):
+    path: str | None = None
+    label: str                        # argmax of the line-weighted chunk probabilities
+    confidence: float
+    probabilities: dict[str, float]
+    label_counts: dict[str, int]      # chunks per label
+    chunks: list[ChunkVerdict]        # in source order
+    lines: int
+    identifiers: int
+    identifiers_scored: int
+    identifier_quality_score: float
+    identifier_quality_label: str
+    domain: str | None = None
+    seconds: float
 
 
 class SnippetPredictRequest(BaseModel):
@@ -286,49 +527,224 @@ class SnippetPredictResponse(BaseModel):
 # Endpoints
 # ---------------------------------------------------------------------------
 
+def _readiness() -> dict:
+    return {
+        "ready": _is_ready(),
+        "uptime_seconds": round(time.time() - _state.get("started_at", time.time()), 1),
+        "models": _state.get("status", {}),
+    }
+
+
 @app.get("/health")
 def health():
     return {
         "status": "ok",
-        "model_loaded": not _state.get("demo", False),
+        "model_loaded": "model" in _state,
         "demo_mode": _state.get("demo", False),
-        "ecrvr_model_loaded": not _state.get("ecrvr_demo", False),
+        "ecrvr_model_loaded": "ecrvr_model" in _state,
         "ecrvr_demo_mode": _state.get("ecrvr_demo", False),
+        **_readiness(),
     }
 
 
-@app.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest):
-    if _state.get("demo"):
-        d = _demo_predict(req.code)
-        return PredictResponse(**d)
-    if "model" not in _state:
-        raise HTTPException(503, "Model not loaded yet.")
+@app.get("/health/live")
+def health_live():
+    """Liveness — the process is up and serving HTTP. Never depends on models."""
+    return {"status": "alive"}
 
-    code = req.code.strip()
-    if not code:
-        raise HTTPException(400, "code must not be empty.")
 
-    model: SABiLSTM = _state["model"]
+@app.get("/health/ready")
+def health_ready():
+    """Readiness — 200 only once every checkpoint is loaded and warmed up."""
+    body = _readiness()
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+# ---------------------------------------------------------------------------
+# Admission control — every scoring endpoint checks static size limits, is
+# admitted by estimated work units (429 + Retry-After when over capacity) and
+# carries a deadline (default REQUEST_DEADLINE_S, or the client's
+# X-Request-Timeout header up to REQUEST_MAX_DEADLINE_S) that the scoring
+# code checks between stages.
+# ---------------------------------------------------------------------------
+_admission = AdmissionController(AdmissionLimits.from_env())
+
+
+def _request_deadline(
+    x_request_timeout: float | None = Header(None, description="Deadline in seconds"),
+) -> Deadline:
+    return _admission.deadline(x_request_timeout)
+
+
+@app.exception_handler(AdmissionRejected)
+def _on_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse({"detail": exc.reason}, status_code=429,
+                        headers={"Retry-After": str(exc.retry_after)})
+
+
+@app.exception_handler(RequestTooLarge)
+def _on_too_large(request: Request, exc: RequestTooLarge):
+    return JSONResponse({"detail": str(exc)}, status_code=413)
+
+
+@app.exception_handler(DeadlineExceeded)
+def _on_deadline(request: Request, exc: DeadlineExceeded):
+    return JSONResponse({"detail": str(exc)}, status_code=504)
+
+
+@app.get("/domains")
+def list_domains():
+    """Domains a request may pin with `"domain": ...`, and the server default."""
+    return {"default": FEATURE_DOMAIN or "auto", "lexicon": lexicon_fingerprint(),
+            "domains": domain_names()}
+
+
+@app.get("/admission")
+def admission_stats():
+    """Admission limits, current in-flight units / queue depth and counters."""
+    return _admission.snapshot()
+
+
+# ---------------------------------------------------------------------------
+# Metrics — stage spans and size histograms are recorded inline by the
+# scoring code; admission state is copied into gauges at scrape time.
+# ---------------------------------------------------------------------------
+_ADMISSION_EVENTS = REGISTRY.register(Counter(
+    "iraf_admission_events_total", "Admission controller events since start.", ("event",)))
+_ADMISSION_LOAD = REGISTRY.register(Gauge(
+    "iraf_admission_load", "Current admission load.", ("kind",)))
+
+
+def _collect_admission() -> None:
+    snap = _admission.snapshot()
+    for event, n in snap["counters"].items():
+        _ADMISSION_EVENTS.set(n, event=event)
+    _ADMISSION_LOAD.set(snap["inflight_units"], kind="inflight_units")
+    _ADMISSION_LOAD.set(snap["waiting"], kind="waiting")
+    _ADMISSION_LOAD.set(snap["seconds_per_unit"], kind="seconds_per_unit")
+
+
+REGISTRY.add_collector(_collect_admission)
+
+
+def _collect_caches() -> None:
+    for cache, info in (("feature_rows", feature_memo_info()),
+                        ("naming_rows", iq_cache_info())):
+        CACHE_EVENTS.set(info["hits"], cache=cache, result="hit")
+        CACHE_EVENTS.set(info["misses"], cache=cache, result="miss")
+
+
+REGISTRY.add_collector(_collect_caches)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of the in-process metrics."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# ---------------------------------------------------------------------------
+# Opt-in request profiling — see src/profiling.py. The normal response body
+# gains a `profile` side field (list responses are wrapped as
+# {"results": [...], "profile": {...}}); full dumps go to PROFILE_DIR.
+# ---------------------------------------------------------------------------
+
+def _profile_requested(
+    x_profile: str | None = Header(None, description="Set to 1 to profile this request"),
+    profile: bool = Query(False, description="Profile this request (needs PROFILING_ENABLED)"),
+) -> bool:
+    wanted = profile or (x_profile or "").lower() in {"1", "true", "yes"}
+    if wanted and not PROFILING_ENABLED:
+        raise HTTPException(403, "Request profiling is disabled (set PROFILING_ENABLED=1).")
+    return wanted
+
+
+def _run(fn, endpoint: str, profiled: bool):
+    if not profiled:
+        return fn()
+    result, summary = run_profiled(fn, endpoint)
+    body = jsonable_encoder(result)
+    if isinstance(body, list):
+        body = {"results": body}
+    return JSONResponse({**body, "profile": summary})
+
+
+IG_STEPS = int(os.environ.get("IG_STEPS", "32"))
+
+
+@app.post("/predict", response_model=PredictResponse)
+def predict(req: PredictRequest, deadline: Deadline = Depends(_request_deadline),
+            profiled: bool = Depends(_profile_requested),
+            attributions: bool = Query(False, description="Add integrated-gradients attributions")):
+    _admission.check_size([req.code])
+    BATCH_SIZE.observe(1, endpoint="predict")
+    units = estimate_cost(req.code) * (2 if attributions else 1)
+    with _admission.admit(units, deadline):
+        return _run(lambda: _predict(req, deadline, attributions=attributions), "predict", profiled)
+
+
+def _resolve_domain(requested: str | None) -> str | None:
+    """Pinned DR domain for a request (its own, else FEATURE_DOMAIN); None = auto-detect."""
+    domain = requested or FEATURE_DOMAIN
+    if domain in {"", "auto"}:
+        return None
+    if domain not in domain_names():
+        raise HTTPException(400, f"Unknown domain {domain!r}; see GET /domains.")
+    return domain
+
+
+def _iraf_inputs(code: str, language: str, deadline: Deadline | None, endpoint: str,
+                 domain: str | None = None):
+    """Identifiers, padded (MAX_IDS, ·) embedding/feature sequences and
+    structural features for one snippet — the SA-BiLSTM's inputs."""
     embedder: Embedder = _state["embedder"]
     norm_stats: dict = _state["norm_stats"]
 
     # 1. Extract identifiers — per-identifier embeddings + features
-    idents = extract_and_normalise(code, req.language)[:MAX_IDS]
+    with span(endpoint, "extract"):
+        idents = extract_and_normalise(code, language)[:MAX_IDS]
+    IDENTIFIERS.observe(len(idents), endpoint=endpoint)
+    TOKENS.observe(sum(len(i.tokens) for i in idents), endpoint=endpoint)
     embed_seq = np.zeros((MAX_IDS, EMBED_DIM), dtype=np.float32)
     feat_seq  = np.zeros((MAX_IDS, FEAT_DIM),  dtype=np.float32)
-    for j, ident in enumerate(idents):
-        embed_seq[j] = embedder.encode_identifiers(ident.tokens)
-    feat_matrix = compute_features(idents) if idents else np.zeros((0, FEAT_DIM))
+    with span(endpoint, "embed"):
+        for j, ident in enumerate(idents):
+            if deadline is not None:
+                deadline.check()
+            embed_seq[j] = embedder.encode_identifiers(ident.tokens)
+    with span(endpoint, "features"):
+        feat_matrix = compute_features(idents, domain=domain) if idents else np.zeros((0, FEAT_DIM))
     if len(idents) > 0:
         feat_seq[:len(idents)] = feat_matrix
 
     # 2. Structural features
-    raw_struct = _compute_structural(code)
-    struct_vec = _normalize_structural(raw_struct, norm_stats) if norm_stats else np.zeros(7, dtype=np.float32)
+    with span(endpoint, "structural"):
+        raw_struct = _compute_structural(code)
+        struct_vec = _normalize_structural(raw_struct, norm_stats) if norm_stats else np.zeros(7, dtype=np.float32)
+    return idents, embed_seq, feat_seq, feat_matrix, raw_struct, struct_vec
+
+
+def _predict(req: PredictRequest, deadline: Deadline | None = None,
+             endpoint: str = "predict", attributions: bool = False) -> PredictResponse:
+    if _state.get("demo"):
+        d = _demo_predict(req.code)
+        return PredictResponse(**d)
+    if "model" not in _state:
+        raise HTTPException(503, "Model not loaded yet.")
+
+    code = req.code.strip()
+    if not code:
+        raise HTTPException(400, "code must not be empty.")
+
+    model: SABiLSTM = _state["model"]
+    domain = _resolve_domain(req.domain)
+    idents, embed_seq, feat_seq, feat_matrix, raw_struct, struct_vec = _iraf_inputs(
+        code, req.language, deadline, endpoint, domain)
 
     # 3. Run model — get logits AND self-attention weights
-    with torch.no_grad():
+    if deadline is not None:
+        deadline.check()
+    with span(endpoint, "forward"), torch.no_grad():
         embed_t  = torch.from_numpy(embed_seq).float().unsqueeze(0)
         feats_t  = torch.from_numpy(feat_seq).float().unsqueeze(0)
         struct_t = torch.from_numpy(struct_vec).float().unsqueeze(0)
@@ -340,6 +756,13 @@ def predict(req: PredictRequest):
     pred_idx   = int(np.argmax(probs))
     pred_label = LABELS[pred_idx]
 
+    attr = None
+    if attributions:
+        if deadline is not None:
+            deadline.check()
+        with span(endpoint, "attributions"):
+            attr = _ig_attributions(model, idents, embed_seq, feat_seq, struct_vec, pred_idx)
+
     # 4. Identifier influence from attention weights
     n_idents = len(idents)
     if n_idents > 0:
@@ -356,56 +779,62 @@ def predict(req: PredictRequest):
         norm_weights = []
         def influence_label(_): return "Medium"
 
-    # 5. Build identifier breakdown with attention + feature scores
-    id_info = []
-    for i, (ident, feat_row) in enumerate(zip(idents, feat_matrix)):
-        w = float(norm_weights[i]) if i < len(norm_weights) else 0.0
-        id_info.append(IdentifierInfo(
-            name=ident.raw,
-            kind=ident.kind,
-            tokens=ident.tokens,
-            features={n: round(float(v), 3) for n, v in zip(FEATURE_NAMES, feat_row)},
-            attention_weight=round(w, 4),
-            influence=influence_label(w),
-        ))
-
-    # 6. Generate plain-English explanation
-    explanation = _build_explanation(
-        pred_label, probs, id_info, raw_struct, LABELS
-    )
+    with span(endpoint, "explain"):
+        # 5. Build identifier breakdown with attention + feature scores
+        id_info = []
+        for i, (ident, feat_row) in enumerate(zip(idents, feat_matrix)):
+            w = float(norm_weights[i]) if i < len(norm_weights) else 0.0
+            id_info.append(IdentifierInfo(
+                name=ident.raw,
+                kind=ident.kind,
+                tokens=ident.tokens,
+                features={n: round(float(v), 3) for n, v in zip(FEATURE_NAMES, feat_row)},
+                attention_weight=round(w, 4),
+                influence=influence_label(w),
+            ))
+
+        # 6. Generate plain-English explanation
+        explanation = _build_explanation(
+            pred_label, probs, id_info, raw_struct, LABELS
+        )
 
-    # Identifier Quality Score — mean of CLS scores across all identifiers
-    # CLS (Cognitive Load Score) combines MC, LF, PR — purely naming-based
-    if feat_matrix.shape[0] > 0:
-        cls_idx = FEATURE_NAMES.index("CLS")
-        mc_idx  = FEATURE_NAMES.index("MC")
-        nc_idx  = FEATURE_NAMES.index("NC")
-        ol_idx  = FEATURE_NAMES.index("OL")
-        iq_score = float(np.mean(
-            0.35 * feat_matrix[:, mc_idx] +
-            0.25 * feat_matrix[:, nc_idx] +
-            0.20 * feat_matrix[:, ol_idx] +
-            0.20 * feat_matrix[:, cls_idx]
-        ))
-    else:
-        iq_score = 0.0
+        # Identifier Quality Score — weighted MC/NC/OL/CLS, purely naming-based
+        iq_score = (float(np.mean(identifier_quality(feat_matrix, FEATURE_NAMES)))
+                    if feat_matrix.shape[0] > 0 else 0.0)
+        iq = iq_label(iq_score)
+
+    with span(endpoint, "serialize"):
+        return PredictResponse(
+            label=pred_label,
+            confidence=round(float(probs[pred_idx]), 4),
+            probabilities={l: round(float(p), 4) for l, p in zip(LABELS, probs)},
+            identifiers=id_info,
+            structural={k: round(float(v), 3) for k, v in raw_struct.items()},
+            explanation=explanation,
+            identifier_quality_score=round(iq_score, 3),
+            identifier_quality_label=iq,
+            attributions=attr,
+            domain=domain or infer_domain(idents),
+        )
 
-    if iq_score >= 0.75:
-        iq_label = "High"
-    elif iq_score >= 0.50:
-        iq_label = "Medium"
-    else:
-        iq_label = "Low"
-
-    return PredictResponse(
-        label=pred_label,
-        confidence=round(float(probs[pred_idx]), 4),
-        probabilities={l: round(float(p), 4) for l, p in zip(LABELS, probs)},
-        identifiers=id_info,
-        structural={k: round(float(v), 3) for k, v in raw_struct.items()},
-        explanation=explanation,
-        identifier_quality_score=round(iq_score, 3),
-        identifier_quality_label=iq_label,
+
+def _ig_attributions(model: SABiLSTM, idents: list, embed_seq: np.ndarray, feat_seq: np.ndarray,
+                     struct_vec: np.ndarray, target: int) -> Attributions:
+    ig = integrated_gradients(model, embed_seq, feat_seq, len(idents), struct_vec, target=target,
+                              background=_state.get("feature_background"), steps=IG_STEPS)
+    per_feat = ig["identifier_features"].sum(axis=1)
+    return Attributions(
+        method="integrated_gradients",
+        target=LABELS[target],
+        steps=IG_STEPS,
+        baseline_probability=round(ig["baseline_probability"], 4),
+        identifiers=[
+            IdentifierAttribution(name=ident.raw, total=round(float(e + f), 6),
+                                  embedding=round(float(e), 6), features=round(float(f), 6))
+            for ident, e, f in zip(idents, ig["identifier_embedding"], per_feat)
+        ],
+        features={n: round(v, 6) for n, v in ig["features"].items()},
+        convergence_delta=round(ig["convergence_delta"], 6),
     )
 
 
@@ -433,8 +862,7 @@ def _build_explanation(label: str, probs: np.ndarray,
     # Weak identifiers — low MC or NC
     # Exclude dunder methods (__init__ etc.) — low NC is expected by convention
     weak = [i for i in id_info
-            if (i.features.get("MC", 1) < 0.5 or i.features.get("NC", 1) < 0.5)
-            and not (i.name.startswith("__") and i.name.endswith("__"))]
+            if is_weak(i.name, i.features.get("MC", 1), i.features.get("NC", 1))]
     weak_names = [f"`{w.name}`" for w in weak[:3]]
 
     # Build text
@@ -487,14 +915,271 @@ def _build_explanation(label: str, probs: np.ndarray,
     return " ".join(lines_text)
 
 
+@app.post("/explain", response_model=ExplainResponse)
+def explain(req: PredictRequest, deadline: Deadline = Depends(_request_deadline)):
+    """
+    Exact Shapley values of the 10 readability features (src/shapley.py):
+    all 1024 feature coalitions in one batched SA-BiLSTM pass against the
+    training-set background. Per class, attributions sum to
+    probabilities - base_probabilities.
+    """
+    if _state.get("demo"):
+        raise HTTPException(503, "Explanations need the IRAF-XADL checkpoint (demo mode).")
+    if "model" not in _state:
+        raise HTTPException(503, "Model not loaded yet.")
+    code = req.code.strip()
+    if not code:
+        raise HTTPException(400, "code must not be empty.")
+    _admission.check_size([req.code])
+    engine: ExactShapley = _state["shapley"]
+    coalitions = engine.n_coalitions
+    BATCH_SIZE.observe(1, endpoint="explain")
+    with _admission.admit(estimate_cost(req.code) + coalitions / 100, deadline):
+        t0 = time.perf_counter()
+        idents, embed_seq, feat_seq, _, _, struct_vec = _iraf_inputs(
+            code, req.language, deadline, "explain", _resolve_domain(req.domain))
+        deadline.check()
+        with span("explain", "shapley"):
+            out = engine.explain(embed_seq, feat_seq, len(idents), struct_vec)
+        seconds = time.perf_counter() - t0
+
+    label = LABELS[int(np.argmax(out["probabilities"]))]
+    attributions = [
+        FeatureAttribution(
+            name=name, value=round(float(val), 4),
+            shapley={l: round(float(v), 6) for l, v in zip(LABELS, phi)})
+        for name, val, phi in zip(out["feature_names"], out["feature_values"], out["shapley"])
+    ]
+    attributions.sort(key=lambda a: abs(a.shapley[label]), reverse=True)
+    return ExplainResponse(
+        label=label,
+        probabilities={l: round(float(p), 4) for l, p in zip(LABELS, out["probabilities"])},
+        base_probabilities={l: round(float(p), 4) for l, p in zip(LABELS, out["base_probabilities"])},
+        attributions=attributions,
+        method="exact_shapley",
+        coalitions=coalitions,
+        seconds=round(seconds, 3),
+    )
+
+
+@app.post("/suggest-renames", response_model=SuggestRenamesResponse)
+def suggest_renames_endpoint(req: SuggestRenamesRequest,
+                             deadline: Deadline = Depends(_request_deadline)):
+    """
+    Rename suggestions for weak identifiers (MC or NC below 0.5), ranked by
+    how much each rename alone raises P(High). Every candidate of every weak
+    identifier is scored in one batched SA-BiLSTM pass (src/renames.py).
+    """
+    if _state.get("demo"):
+        raise HTTPException(503, "Rename suggestions need the IRAF-XADL checkpoint (demo mode).")
+    if "model" not in _state:
+        raise HTTPException(503, "Model not loaded yet.")
+    code = req.code.strip()
+    if not code:
+        raise HTTPException(400, "code must not be empty.")
+    _admission.check_size([req.code])
+    top_k = max(1, min(req.top_k, 10))
+    high = LABELS.index("High")
+    BATCH_SIZE.observe(1, endpoint="suggest_renames")
+    # Up to 16 candidates per identifier, each a full-sequence batch row.
+    with _admission.admit(estimate_cost(req.code) * 3, deadline):
+        t0 = time.perf_counter()
+        domain = _resolve_domain(req.domain)
+        idents, embed_seq, feat_seq, _, _, struct_vec = _iraf_inputs(
+            code, req.language, deadline, "suggest_renames", domain)
+        deadline.check()
+        with span("suggest_renames", "search"):
+            out = suggest_renames(_state["model"], _state["embedder"], idents, embed_seq,
+                                  feat_seq, struct_vec, target=high, top_k=top_k, domain=domain)
+        seconds = time.perf_counter() - t0
+
+    return SuggestRenamesResponse(
+        label=LABELS[int(np.argmax(out["probabilities"]))],
+        p_high=round(float(out["probabilities"][high]), 4),
+        weak_identifiers=[
+            WeakIdentifier(
+                name=w["name"], kind=w["kind"],
+                features={k: round(v, 3) for k, v in w["features"].items()},
+                suggestions=[RenameCandidate(
+                    name=c["name"], p_high=round(c["p_target"], 4), uplift=round(c["uplift"], 4),
+                    features={k: round(v, 3) for k, v in c["features"].items()})
+                    for c in w["suggestions"]])
+            for w in out["weak"]
+        ],
+        candidates_scored=out["candidates"],
+        seconds=round(seconds, 3),
+    )
+
+
+@app.post("/score-identifiers", response_model=ScoreIdentifiersResponse)
+def score_identifiers(req: ScoreIdentifiersRequest,
+                      deadline: Deadline = Depends(_request_deadline)):
+    """Per-identifier naming quality (the IQ part of /predict) for many files.
+
+    Runs only identifier extraction and the memoized MC/NC/OL/CLS rows — no
+    CodeBERT, no SA-BiLSTM — so it also answers in demo mode and while the
+    models are still loading.
+    """
+    codes = [f.code for f in req.files]
+    _admission.check_size(codes, max_samples=_admission.limits.max_score_files)
+    BATCH_SIZE.observe(len(codes), endpoint="score_identifiers")
+    # Feature-only scoring is ~100x cheaper than a model pass per file.
+    units = 1.0 + sum(len(c) for c in codes) / 65536.0
+    t0 = time.perf_counter()
+    with _admission.admit(units, deadline):
+        try:
+            with span("score_identifiers", "features"):
+                scored = score_files([(f.code, f.language) for f in req.files])
+        except ValueError as exc:
+            raise HTTPException(400, str(exc))
+    n = sum(len(r["identifiers"]) for r in scored)
+    IDENTIFIERS.observe(n, endpoint="score_identifiers")
+    with span("score_identifiers", "serialize"):
+        return ScoreIdentifiersResponse(
+            files=[ScoredFile(path=f.path,
+                              identifier_quality_score=round(r["score"], 3),
+                              identifier_quality_label=r["label"],
+                              identifiers=[ScoredIdentifier(
+                                  name=i["name"], kind=i["kind"],
+                                  features={k: round(v, 3) for k, v in i["features"].items()},
+                                  score=round(i["score"], 3)) for i in r["identifiers"]])
+                   for f, r in zip(req.files, scored)],
+            identifiers_scored=n,
+            seconds=round(time.perf_counter() - t0, 4),
+        )
+
+
 @app.post("/batch")
-def batch_predict(req: BatchPredictRequest) -> list[PredictResponse]:
+def batch_predict(req: BatchPredictRequest,
+                  deadline: Deadline = Depends(_request_deadline),
+                  profiled: bool = Depends(_profile_requested)) -> list[PredictResponse]:
     """Score multiple code samples in one call. Returns results in the same order."""
-    return [predict(s) for s in req.samples]
+    _admission.check_size([s.code for s in req.samples])
+    units = sum(estimate_cost(s.code) for s in req.samples)
+    BATCH_SIZE.observe(len(req.samples), endpoint="batch")
+
+    def score_all() -> list[PredictResponse]:
+        out = []
+        for s in req.samples:
+            deadline.check()
+            out.append(_predict(s, deadline, endpoint="batch"))
+        return out
+
+    with _admission.admit(units, deadline):
+        return _run(score_all, "batch", profiled)
+
+
+FILE_CHUNK_BATCH = int(os.environ.get("FILE_CHUNK_BATCH", "32"))
+
+
+@app.post("/predict-file", response_model=PredictFileResponse)
+def predict_file(req: PredictFileRequest,
+                 deadline: Deadline = Depends(_request_deadline),
+                 profiled: bool = Depends(_profile_requested)):
+    """Readability of a whole source file.
+
+    The file is split into its top-level functions and classes (large classes
+    at their methods; Python functions, methods and module-level runs longer
+    than MAX_IDS identifiers into windows of whole statements, see
+    src/chunking.py). Every chunk is an ordinary /predict sample, scored in
+    batched forward passes, and the file verdict is the line-weighted mean of
+    the chunk probabilities. Only a chunk that cannot be cut further (a single
+    Python statement, or a C++ function) is truncated to MAX_IDS;
+    `identifiers_scored` reports what was read.
+    """
+    _admission.check_size([req.code], max_chars=_admission.limits.max_file_chars)
+    try:
+        with span("predict_file", "extract"):
+            chunks = split_file(req.code, req.language, max_identifiers=MAX_IDS)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    if len(chunks) > _admission.limits.max_file_chunks:
+        _admission.counters["rejected_size"] += 1
+        raise RequestTooLarge(f"file has {len(chunks)} functions/classes; "
+                              f"the limit is {_admission.limits.max_file_chunks}")
+    BATCH_SIZE.observe(len(chunks), endpoint="predict_file")
+    units = sum(estimate_cost(c.code) for c in chunks) or 1.0
+    with _admission.admit(units, deadline):
+        return _run(lambda: _predict_file(req, chunks, deadline), "predict_file", profiled)
+
+
+def _predict_file(req: PredictFileRequest, chunks: list,
+                  deadline: Deadline | None = None) -> PredictFileResponse:
+    t0 = time.perf_counter()
+    endpoint = "predict_file"
+    if not req.code.strip():
+        raise HTTPException(400, "code must not be empty.")
+    demo = _state.get("demo")
+    if not demo and "model" not in _state:
+        raise HTTPException(503, "Model not loaded yet.")
+
+    with span(endpoint, "extract"):
+        for c in chunks:
+            normalise(c.identifiers)
+    all_idents = [i for c in chunks for i in c.identifiers]
+    domain = _resolve_domain(req.domain) or infer_domain(all_idents)
+    n_scored = [min(len(c.identifiers), MAX_IDS) for c in chunks]
+    probs = np.zeros((len(chunks), len(LABELS)), dtype=np.float64)
+    iq = np.zeros(len(chunks))
+
+    if demo:
+        for j, c in enumerate(chunks):
+            d = _demo_predict(c.code)
+            probs[j] = [d["probabilities"][l] for l in LABELS]
+            iq[j] = d["identifier_quality_score"]
+    else:
+        # Fixed-size mini-batches: one forward pass each, a deadline check in between.
+        for lo in range(0, len(chunks), FILE_CHUNK_BATCH):
+            if deadline is not None:
+                deadline.check()
+            part = chunks[lo:lo + FILE_CHUNK_BATCH]
+            with span(endpoint, "features"):
+                batch, feats, _, *inputs = sabilstm_inputs(
+                    [c.identifiers[:MAX_IDS] for c in part], [c.code for c in part],
+                    _state["embedder"], _state["norm_stats"], domain)
+            for k in range(len(part)):
+                a, b = batch.snippet_bounds(k)
+                iq[lo + k] = (float(np.mean(identifier_quality(feats[a:b], FEATURE_NAMES)))
+                              if b > a else 0.0)
+            with span(endpoint, "forward"):
+                probs[lo:lo + len(part)] = forward_probs(_state["model"], *inputs)
+    IDENTIFIERS.observe(len(all_idents), endpoint=endpoint)
+
+    with span(endpoint, "serialize"):
+        lines = np.array([c.end_line - c.start_line + 1 for c in chunks])
+        file_probs = aggregate(probs, lines)
+        pred_idx = int(np.argmax(file_probs))
+        labels = [LABELS[int(i)] for i in probs.argmax(axis=1)]
+        file_iq = float(np.average(iq, weights=n_scored)) if sum(n_scored) else 0.0
+        return PredictFileResponse(
+            path=req.path,
+            label=LABELS[pred_idx],
+            confidence=round(float(file_probs[pred_idx]), 4),
+            probabilities={l: round(float(p), 4) for l, p in zip(LABELS, file_probs)},
+            label_counts={l: labels.count(l) for l in LABELS},
+            chunks=[ChunkVerdict(
+                name=c.name, kind=c.kind, start_line=c.start_line, end_line=c.end_line,
+                label=labels[j],
+                confidence=round(float(probs[j].max()), 4),
+                probabilities={l: round(float(p), 4) for l, p in zip(LABELS, probs[j])},
+                identifiers=len(c.identifiers),
+                identifiers_scored=n_scored[j],
+                identifier_quality_score=round(float(iq[j]), 3),
+            ) for j, c in enumerate(chunks)],
+            lines=req.code.count("\n") + 1,
+            identifiers=len(all_idents),
+            identifiers_scored=sum(n_scored),
+            identifier_quality_score=round(file_iq, 3),
+            identifier_quality_label=iq_label(file_iq),
+            domain=domain,
+            seconds=round(time.perf_counter() - t0, 4),
+        )
 
 
 @app.post("/predict-snippet", response_model=SnippetPredictResponse)
-def predict_snippet(req: SnippetPredictRequest):
+def predict_snippet(req: SnippetPredictRequest,
+                    deadline: Deadline = Depends(_request_deadline),
+                    profiled: bool = Depends(_profile_requested)):
     """
     ECRVR-MVEL (Paper 2) — snippet-level readability via a weighted-voting
     ensemble of GCN, DBN, and Bi-TCN branches over a CodeBERT token sequence.
@@ -504,6 +1189,14 @@ def predict_snippet(req: SnippetPredictRequest):
     not the exact published model — accuracy will differ from the paper's
     98.15%/98.38%. Python-only in this version.
     """
+    _admission.check_size([req.code])
+    BATCH_SIZE.observe(1, endpoint="predict_snippet")
+    with _admission.admit(estimate_cost(req.code), deadline):
+        return _run(lambda: _predict_snippet(req, deadline), "predict_snippet", profiled)
+
+
+def _predict_snippet(req: SnippetPredictRequest,
+                     deadline: Deadline | None = None) -> SnippetPredictResponse:
     if _state.get("ecrvr_demo"):
         return SnippetPredictResponse(**_demo_predict_snippet(req.code))
     if "ecrvr_model" not in _state:
@@ -518,16 +1211,22 @@ def predict_snippet(req: SnippetPredictRequest):
     struct_stats: dict = _state["ecrvr_struct_stats"]
     max_tokens: int = _state["ecrvr_max_tokens"]
 
-    seq = embedder.encode_sequence(code, max_length=max_tokens)
-    mask = (np.abs(seq).sum(axis=-1) > 0).astype(np.float32)
-
-    raw_struct = _compute_structural(code)
-    struct_vec = (
-        _normalize_structural(raw_struct, struct_stats) if struct_stats
-        else np.zeros(7, dtype=np.float32)
-    )
+    endpoint = "predict_snippet"
+    with span(endpoint, "embed"):
+        seq = embedder.encode_sequence(code, max_length=max_tokens)
+        mask = (np.abs(seq).sum(axis=-1) > 0).astype(np.float32)
+    TOKENS.observe(int(mask.sum()), endpoint=endpoint)
+
+    with span(endpoint, "structural"):
+        raw_struct = _compute_structural(code)
+        struct_vec = (
+            _normalize_structural(raw_struct, struct_stats) if struct_stats
+            else np.zeros(7, dtype=np.float32)
+        )
+    if deadline is not None:
+        deadline.check()
 
-    with torch.no_grad():
+    with span(endpoint, "forward"), torch.no_grad():
         seq_t = torch.from_numpy(seq).float().unsqueeze(0)
         mask_t = torch.from_numpy(mask).float().unsqueeze(0)
         struct_t = torch.from_numpy(struct_vec).float().unsqueeze(0)
@@ -550,24 +1249,25 @@ def predict_snippet(req: SnippetPredictRequest):
         if metrics.get("accuracy") else ""
     )
 
-    return SnippetPredictResponse(
-        label=pred_label,
-        confidence=round(float(probs[pred_idx]), 4),
-        probabilities={l: round(float(p), 4) for l, p in zip(LABELS, probs)},
-        branch_probabilities=branch_out,
-        ensemble_weights=model.ensemble_weights(),
-        structural={k: round(float(v), 3) for k, v in raw_struct.items()},
-        methodology_note=(
-            "Live inference from a freshly-trained, simplified reimplementation of "
-            "ECRVR-MVEL (GCN+DBN+BiTCN weighted ensemble) — not the exact published model. "
-            f"{acc_note} The DBN branch is trained end-to-end by backprop rather than "
-            "CD-pretrained RBM layers (documented simplification)."
-        ),
-    )
+    with span(endpoint, "serialize"):
+        return SnippetPredictResponse(
+            label=pred_label,
+            confidence=round(float(probs[pred_idx]), 4),
+            probabilities={l: round(float(p), 4) for l, p in zip(LABELS, probs)},
+            branch_probabilities=branch_out,
+            ensemble_weights=model.ensemble_weights(),
+            structural={k: round(float(v), 3) for k, v in raw_struct.items()},
+            methodology_note=(
+                "Live inference from a freshly-trained, simplified reimplementation of "
+                "ECRVR-MVEL (GCN+DBN+BiTCN weighted ensemble) — not the exact published model. "
+                f"{acc_note} The DBN branch is trained end-to-end by backprop rather than "
+                "CD-pretrained RBM layers (documented simplification)."
+            ),
+        )
 
 
 @app.post("/dri", response_model=DriResponse)
-def compute_dri(req: DriRequest):
+def compute_dri(req: DriRequest, deadline: Deadline = Depends(_request_deadline)):
     """
     Compute Deceptive Readability Index for a code sample.
 
@@ -576,7 +1276,12 @@ def compute_dri(req: DriRequest):
     If pass_ratio is omitted the DRI is not computed but readability scores
     are still returned — useful for the interactive website demo.
     """
-    result = predict(PredictRequest(code=req.code, language=req.language))
+    _admission.check_size([req.code])
+    BATCH_SIZE.observe(1, endpoint="dri")
+    with _admission.admit(estimate_cost(req.code), deadline):
+        result = _predict(PredictRequest(code=req.code, language=req.language, domain=req.domain),
+                          deadline,
+                          endpoint="dri")
 
     p_high = result.probabilities.get("High", 0.0)
     p_medium = result.probabilities.get("Medium", 0.0)
@@ -0,0 +1,104 @@
+"""Attribution latency: integrated gradients vs exact Shapley vs KernelExplainer.
+
+All three explain the same SA-BiLSTM on the same padded sample. IG and exact
+Shapley are what the API serves (/predict?attributions=true, /explain);
+KernelExplainer is the offline path in src/explain.py (mean-feature input).
+
+Example (from apps/api):
+    python benchmarks/bench_attributions.py --repeats 5
+    python benchmarks/bench_attributions.py --checkpoint artifacts/iraf_xadl_augmented.pt
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.attributions import integrated_gradients
+from src.checkpoint_io import checkpoint_available, load_checkpoint, load_state_dict_zero_copy
+from src.dataset import FEAT_DIM, LABELS, MAX_IDS
+from src.embeddings import EMBED_DIM
+from src.model import SABiLSTM
+from src.shapley import ExactShapley
+
+
+def _median_s(fn, repeats: int) -> float:
+    fn()                                              # warm-up
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark attribution methods for SA-BiLSTM.")
+    p.add_argument("--checkpoint", default=None,
+                   help="Optional IRAF-XADL checkpoint (random weights otherwise).")
+    p.add_argument("--n-ids", type=int, default=12, help="Real identifiers in the sample.")
+    p.add_argument("--ig-steps", default="16,32,64")
+    p.add_argument("--kernel-nsamples", default="64,256")
+    p.add_argument("--repeats", type=int, default=5)
+    args = p.parse_args()
+
+    torch.manual_seed(0)
+    struct_dim = 7
+    model = SABiLSTM(struct_dim=struct_dim, num_classes=len(LABELS))
+    if args.checkpoint and checkpoint_available(args.checkpoint):
+        ckpt = load_checkpoint(args.checkpoint)
+        struct_dim = ckpt.get("struct_dim", 7)
+        model = SABiLSTM(struct_dim=struct_dim, num_classes=len(LABELS))
+        load_state_dict_zero_copy(model, ckpt["state_dict"])
+    model.eval()
+
+    rng = np.random.default_rng(0)
+    n = min(args.n_ids, MAX_IDS)
+    embed = np.zeros((MAX_IDS, EMBED_DIM), dtype=np.float32)
+    feats = np.zeros((MAX_IDS, FEAT_DIM), dtype=np.float32)
+    embed[:n] = rng.standard_normal((n, EMBED_DIM)) * 0.1
+    feats[:n] = rng.random((n, FEAT_DIM))
+    struct = np.full(struct_dim, 0.5, dtype=np.float32) if struct_dim else None
+    background = np.full((1, FEAT_DIM), 0.5, dtype=np.float32)
+
+    rows: list[tuple[str, float]] = []
+    for m in (int(x) for x in args.ig_steps.split(",")):
+        rows.append((f"integrated gradients (steps={m})", _median_s(
+            lambda: integrated_gradients(model, embed, feats, n, struct,
+                                         background=background, steps=m), args.repeats)))
+
+    engine = ExactShapley(model, background)
+    rows.append(("exact Shapley (1024 coalitions)", _median_s(
+        lambda: engine.explain(embed, feats, n, struct), max(1, args.repeats // 2))))
+
+    try:
+        import shap  # noqa: F401
+        from src.explain import explain_sample
+    except ImportError:
+        print("  [skip] shap not installed — KernelExplainer rows omitted")
+    else:
+        # explain.py's wrapper feeds no structural branch; use a struct-free model.
+        kernel_model = SABiLSTM(struct_dim=0, num_classes=len(LABELS)).eval()
+        mean_embed, mean_feats = embed[:n].mean(0), feats[:n].mean(0)
+        for ns in (int(x) for x in args.kernel_nsamples.split(",")):
+            rows.append((f"KernelExplainer (nsamples={ns})", _median_s(
+                lambda: explain_sample(kernel_model, mean_embed, mean_feats, nsamples=ns,
+                                       device=torch.device("cpu")),
+                max(1, args.repeats // 2))))
+
+    print(f"\n{'method':<40}{'median s':>10}   ({n} identifiers, "
+          f"{torch.get_num_threads()} torch threads)")
+    for name, sec in rows:
+        print(f"{name:<40}{sec:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
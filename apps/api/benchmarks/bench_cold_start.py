@@ -0,0 +1,89 @@
+"""Cold-start benchmark: `.pt` + hub CodeBERT vs mmap'd safetensors.
+
+Each measurement runs in a fresh interpreter so nothing is shared between
+runs except the OS page cache (which is also what a restarted container sees).
+
+Example (from apps/api, after `python convert_checkpoints.py`):
+    python benchmarks/bench_cold_start.py --repeats 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_CHILD = r"""
+import json, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import torch
+from src.checkpoint_io import load_split_checkpoint, load_state_dict_zero_copy
+from src.dataset import LABELS
+from src.ensemble_model import ECRVRMVEL
+from src.model import SABiLSTM
+t_import = time.perf_counter()
+
+fmt = {fmt!r}
+def build(cls, pt):
+    if fmt == "pt":
+        ckpt = torch.load(pt, map_location="cpu")
+        model = cls(struct_dim=ckpt.get("struct_dim", 7), num_classes=len(LABELS))
+        model.load_state_dict(ckpt["state_dict"])
+    else:
+        ckpt = load_split_checkpoint(pt[:-3])
+        model = cls(struct_dim=ckpt.get("struct_dim", 7), num_classes=len(LABELS))
+        load_state_dict_zero_copy(model, ckpt["state_dict"])
+    return model.eval()
+
+build(SABiLSTM, {iraf!r})
+build(ECRVRMVEL, {ecrvr!r})
+t_ckpt = time.perf_counter()
+
+t_enc = t_ckpt
+if {encoder!r}:
+    from transformers import AutoModel, AutoTokenizer
+    src = {hub!r} if fmt == "pt" else {encoder_dir!r}
+    AutoTokenizer.from_pretrained(src)
+    AutoModel.from_pretrained(src).eval()
+    t_enc = time.perf_counter()
+
+print(json.dumps({{"imports": t_import - t0, "checkpoints": t_ckpt - t_import,
+                  "encoder": t_enc - t_ckpt, "total": t_enc - t0}}))
+"""
+
+
+def _run(fmt: str, args) -> dict:
+    code = _CHILD.format(root=str(ROOT), fmt=fmt, iraf=args.iraf, ecrvr=args.ecrvr,
+                         encoder=not args.skip_encoder, hub=args.encoder_name,
+                         encoder_dir=args.encoder_dir)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                         cwd=ROOT, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark API cold start per checkpoint format.")
+    p.add_argument("--iraf", default="artifacts/iraf_xadl_augmented.pt")
+    p.add_argument("--ecrvr", default="artifacts/ecrvr_mvel.pt")
+    p.add_argument("--encoder-dir", default="artifacts/codebert")
+    p.add_argument("--encoder-name", default="microsoft/codebert-base")
+    p.add_argument("--skip-encoder", action="store_true")
+    p.add_argument("--repeats", type=int, default=5)
+    args = p.parse_args()
+
+    print(f"{'format':<12}{'imports':>10}{'ckpts':>10}{'encoder':>10}{'total':>10}   (median s)")
+    for fmt in ("pt", "safetensors"):
+        runs = [_run(fmt, args) for _ in range(args.repeats)]
+        med = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+        print(f"{fmt:<12}{med['imports']:>10.3f}{med['checkpoints']:>10.3f}"
+              f"{med['encoder']:>10.3f}{med['total']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
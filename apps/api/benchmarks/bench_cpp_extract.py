@@ -0,0 +1,163 @@
+"""C++ identifier extraction: single-pass lexer vs. the old regex extractor.
+
+Parity: runs both extractors over data/sample_cpp.csv and reports, per kind,
+the (kind, name) pairs they agree on and the ones only one of them finds.
+It fails if the lexer misses a function, class or parameter the regexes
+found, other than a regex false positive (control keywords).
+
+Timing: extraction time on
+  - fmt- and nlohmann/json-sized synthetic headers (~4.5k and ~25k lines,
+    the two C++ sources `data/fetch_data.py` pulls), built from the sample
+    snippets wrapped in namespaces, classes, templates and doc comments;
+  - a run of brace-less declarations (macro tables, long prototype lists),
+    where the old function regex backtracks quadratically;
+  - any real files passed with --files (e.g. fmt's format.h).
+
+Example (from apps/api):
+    python benchmarks/bench_cpp_extract.py
+    python benchmarks/bench_cpp_extract.py --files /path/to/fmt/include/fmt/format.h
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.preprocess import Identifier, extract_cpp
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+# ---- the previous regex extractor, kept verbatim for parity and timing ----
+_CPP_FN_RE   = re.compile(r"\b(?:[\w:*&<>,\s]+?)\s+(\w+)\s*\([^;{}]*\)\s*(?:const)?\s*\{")
+_CPP_CLASS_RE = re.compile(r"\b(?:class|struct)\s+(\w+)")
+_CPP_VAR_RE   = re.compile(
+    r"\b(?:int|float|double|bool|char|void|auto|std::\w+|long|short|unsigned|signed)"
+    r"(?:\s*<[^>]+>)?\s*\**\s*&?\s*(\w+)\s*(?:=|;|,)"
+)
+
+
+def legacy_extract_cpp(code: str) -> list[Identifier]:
+    ids: list[Identifier] = []
+    line_count = max(1, code.count("\n") + 1)
+    for m in _CPP_CLASS_RE.finditer(code):
+        ids.append(Identifier(m.group(1), "class", scope_size=line_count))
+    for m in _CPP_FN_RE.finditer(code):
+        ids.append(Identifier(m.group(1), "function", scope_size=line_count))
+        params = m.group(0).split("(", 1)[1].rsplit(")", 1)[0]
+        for part in params.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            name = re.sub(r"[*&\[\]]", "", part.split()[-1]).strip()
+            if re.fullmatch(r"[A-Za-z_]\w*", name):
+                ids.append(Identifier(name, "param", scope_size=line_count))
+    for m in _CPP_VAR_RE.finditer(code):
+        ids.append(Identifier(m.group(1), "variable", scope_size=line_count))
+    return ids
+
+
+_CONTROL = {"if", "for", "while", "switch", "catch", "return", "else"}
+
+
+def parity(codes: list[str]) -> bool:
+    both: Counter[str] = Counter()
+    old_only: Counter[tuple[str, str]] = Counter()
+    new_only: Counter[tuple[str, str]] = Counter()
+    for code in codes:
+        old = Counter((i.kind, i.raw) for i in legacy_extract_cpp(code))
+        new = Counter((i.kind, i.raw) for i in extract_cpp(code))
+        for (kind, _), n in (old & new).items():
+            both[kind] += n
+        old_only.update(old - new)
+        new_only.update(new - old)
+    print(f"\nparity on {len(codes)} sample_cpp.csv snippets")
+    print(f"{'kind':<10}{'both':>6}{'old only':>10}{'new only':>10}")
+    for kind in ("class", "function", "param", "variable"):
+        o = sum(n for (k, _), n in old_only.items() if k == kind)
+        w = sum(n for (k, _), n in new_only.items() if k == kind)
+        print(f"{kind:<10}{both[kind]:>6}{o:>10}{w:>10}")
+    if old_only:
+        print("old only:", ", ".join(f"{k}:{r}" for k, r in sorted(old_only)))
+    if new_only:
+        print("new only:", ", ".join(f"{k}:{r}" for k, r in sorted(new_only)))
+    missed = [(k, r) for k, r in old_only if k != "variable" and r not in _CONTROL]
+    if missed:
+        print("MISSED by the lexer:", missed)
+    return not missed
+
+
+def synthetic_header(snippets: list[str], lines: int) -> str:
+    """Sample snippets wrapped the way library headers are: namespaces,
+    class templates, doc comments, macros and string literals."""
+    out: list[str] = ["#pragma once", "#include <string>", ""]
+    i = 0
+    while len(out) < lines:
+        out += [f"namespace detail{i} {{",
+                "/**",
+                " * Formats a value { with braces } and \"quotes\" in the docs.",
+                " */",
+                f"#define DETAIL{i}_CHECK(x) do {{ if (!(x)) throw 0; }} while (0)",
+                "template <typename T, typename Alloc = std::allocator<T>>",
+                f"class buffer{i} : public base<T> {{",
+                " public:",
+                f"  explicit buffer{i}(std::size_t capacity) : size_{{capacity}} {{}}",
+                "  auto size() const noexcept -> std::size_t { return size_; }",
+                '  const char* name() const { return "buffer{0}"; }',
+                " private:",
+                "  std::size_t size_ = 0;",
+                "};"]
+        out += snippets[i % len(snippets)].splitlines()
+        out += [f"}}  // namespace detail{i}", ""]
+        i += 1
+    return "\n".join(out)
+
+
+def declaration_run(n: int) -> str:
+    """Prototype-like lines with no `;` or `{` between them (macro tables,
+    X-macros), which is where the old function regex goes quadratic."""
+    return "\n".join(f"  std::vector<int> entry{i} (int slot, int count) const" for i in range(n)) + ";\n"
+
+
+def _time(fn, code: str, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn(code)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark the C++ identifier extractor.")
+    p.add_argument("--files", nargs="*", default=[], help="Extra C++ files to time.")
+    p.add_argument("--rounds", type=int, default=3)
+    args = p.parse_args()
+
+    codes = pd.read_csv(DATA / "sample_cpp.csv")["code"].tolist()
+    ok = parity(codes)
+
+    inputs = [("fmt-sized header", synthetic_header(codes, 4_500)),
+              ("json-sized header", synthetic_header(codes, 25_000))]
+    inputs += [(f"decl run x{n}", declaration_run(n)) for n in (250, 500, 1_000, 2_000)]
+    inputs += [(Path(f).name, Path(f).read_text(errors="replace")) for f in args.files]
+
+    print(f"\n{'input':<26}{'lines':>8}{'ids':>8}{'new s':>9}{'old s':>9}")
+    for label, code in inputs:
+        new_s = _time(extract_cpp, code, args.rounds)
+        n_ids = len(extract_cpp(code))
+        old_s = _time(legacy_extract_cpp, code, 1)
+        print(f"{label:<26}{code.count(chr(10)) + 1:>8}{n_ids:>8}{new_s:>9.3f}{old_s:>9.3f}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Domain inference cost vs. number of domains: inverted index vs. scanning.
+
+Builds synthetic lexicons with D domains (each a random 80-term slice of a
+word pool, like a per-repository term list) and times snippet-domain
+inference over the sample snippets' tokens with
+  - the per-domain scan `_infer_domain` used to do (one set per domain), and
+  - the compiled lexicon's inverted index (`Lexicon.infer_domain`).
+
+Example (from apps/api):
+    python benchmarks/bench_domain_index.py --domains 6,60,600
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.lexicon import Lexicon, build_lexicon
+from src.preprocess import extract_and_normalise
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+def _scan(tokens: list[str], vocabs: dict[str, set[str]]) -> str | None:
+    counts = {d: sum(1 for t in tokens if t in v) for d, v in vocabs.items()}
+    best = max(counts, key=counts.get)
+    return best if counts[best] > 0 else None
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark domain inference.")
+    p.add_argument("--domains", default="6,60,600")
+    p.add_argument("--terms", type=int, default=80, help="Terms per domain.")
+    p.add_argument("--rounds", type=int, default=20)
+    args = p.parse_args()
+
+    snippets = [[t for i in extract_and_normalise(code, lang) for t in i.tokens]
+                for name, lang in (("sample_python.csv", "python"), ("sample_cpp.csv", "cpp"))
+                for code in pd.read_csv(DATA / name)["code"]]
+    pool = sorted({t for s in snippets for t in s} | {f"term{i}" for i in range(5000)})
+    rng = random.Random(0)
+
+    print(f"\n{'domains':>8}{'scan us/snippet':>18}{'index us/snippet':>18}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(x) for x in args.domains.split(",")):
+            vocabs = {f"d{d:04d}": set(rng.sample(pool, args.terms)) for d in range(n)}
+            lex = Lexicon(build_lexicon(Path(tmp) / f"d{n}.lex", [],
+                                        {d: sorted(v) for d, v in vocabs.items()}))
+            t0 = time.perf_counter()
+            for _ in range(args.rounds):
+                for toks in snippets:
+                    _scan(toks, vocabs)
+            scan = (time.perf_counter() - t0) / (args.rounds * len(snippets))
+            t0 = time.perf_counter()
+            for _ in range(args.rounds):
+                for toks in snippets:
+                    lex.infer_domain(toks)
+            index = (time.perf_counter() - t0) / (args.rounds * len(snippets))
+            print(f"{n:>8}{scan * 1e6:>18.1f}{index * 1e6:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
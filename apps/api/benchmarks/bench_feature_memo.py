@@ -0,0 +1,78 @@
+"""Effect of the per-name feature memo (MC, NC, OL, PR, SA) in features.py.
+
+Times `CodeReadabilityDataset` construction (hash embedder, so features and
+parsing dominate) and repeated `compute_features` calls — the serving path
+on recurring code — with the memo disabled and enabled, and checks that
+both produce identical matrices.
+
+Example (from apps/api):
+    python benchmarks/bench_feature_memo.py --repeats 5 --serve-rounds 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.dataset import CodeReadabilityDataset
+from src.embeddings import Embedder
+from src.features import clear_feature_memo, compute_features, feature_memo_info
+from src.preprocess import extract_and_normalise
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+def _median_s(fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark the per-name feature memo.")
+    p.add_argument("--data", default=str(DATA / "sample_python.csv"))
+    p.add_argument("--language", default="python")
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--serve-rounds", type=int, default=50)
+    args = p.parse_args()
+
+    embedder = Embedder(use_codebert=False)
+    snippets = [i for i in (extract_and_normalise(c, args.language)
+                            for c in CodeReadabilityDataset(args.data, args.language,
+                                                            embedder=embedder).codes) if i]
+
+    def build():
+        return CodeReadabilityDataset(args.data, args.language, embedder=embedder)
+
+    def serve():
+        for _ in range(args.serve_rounds):
+            for ids in snippets:
+                compute_features(ids)
+
+    rows, outputs = [], {}
+    for label, size in (("memo off", 0), ("memo on", 1 << 16)):
+        clear_feature_memo(size)
+        rows.append((f"dataset build ({label})", _median_s(build, args.repeats)))
+        rows.append((f"serve x{args.serve_rounds} ({label})", _median_s(serve, args.repeats)))
+        outputs[label] = np.concatenate([compute_features(ids) for ids in snippets])
+
+    print(f"\n{'path':<34}{'median s':>10}   ({len(snippets)} snippets)")
+    for name, sec in rows:
+        print(f"{name:<34}{sec:>10.4f}")
+    info = feature_memo_info()
+    print(f"\nidentical: {np.array_equal(outputs['memo off'], outputs['memo on'])}; "
+          f"memo {info['size']} names, hit rate {info['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
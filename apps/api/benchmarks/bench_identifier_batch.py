@@ -0,0 +1,118 @@
+"""IdentifierBatch vs. lists of Identifier objects: memory and throughput.
+
+Loads identifier names from bad_identifiers_100k.csv, groups them into
+snippets of `--snippet-size` consecutive names, and compares
+  - memory (tracemalloc): list[list[Identifier]] vs. IdentifierBatch.from_names
+    (the shared interner table is reported separately), and
+  - speed: compute_features and the hash embedder over the list path vs. the
+    batch path (outputs are asserted identical).
+
+Example (from apps/api):
+    python benchmarks/bench_identifier_batch.py
+    python benchmarks/bench_identifier_batch.py --limit 20000 --snippet-size 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.embeddings import HashEmbedder
+from src.features import clear_feature_memo, compute_features
+from src.identifier_batch import INTERNER, IdentifierBatch
+from src.preprocess import Identifier, _clean_tokens, _split_token
+
+LEGACY = Path(__file__).resolve().parents[3] / "legacy" / "phd-workspace" / "data"
+_KIND = {"class": "class", "function": "function", "method": "function", "variable": "variable",
+         "parameter": "param", "param": "param"}
+
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    sec = time.perf_counter() - t0
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out, sec, heap
+
+
+def _timed(fn, rounds: int) -> tuple[object, float]:
+    best, out = float("inf"), None
+    for _ in range(rounds):
+        clear_feature_memo()
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark IdentifierBatch.")
+    p.add_argument("--identifiers", default=str(LEGACY / "external" / "bad_identifiers_100k.csv"))
+    p.add_argument("--limit", type=int, default=0, help="Use only the first N names (0 = all).")
+    p.add_argument("--snippet-size", type=int, default=20)
+    p.add_argument("--rounds", type=int, default=3)
+    args = p.parse_args()
+
+    df = pd.read_csv(args.identifiers).dropna(subset=["Identifier Name"])
+    df = df[df["Identifier Type"] != "Identifier Type"]  # repeated header rows
+    if args.limit:
+        df = df.head(args.limit)
+    raws = df["Identifier Name"].astype(str).tolist()
+    kinds = [_KIND.get(str(k).lower(), "variable") for k in df["Identifier Type"]]
+    k = args.snippet_size
+    sizes = [min(k, len(raws) - i) for i in range(0, len(raws), k)]
+
+    def build_lists():
+        idents = [Identifier(r, kd, _clean_tokens(_split_token(r))) for r, kd in zip(raws, kinds)]
+        return [idents[i:i + k] for i in range(0, len(idents), k)]
+
+    # Warm the name-normalisation cache first so it is not billed to the batch.
+    IdentifierBatch.from_names(raws, kinds, snippet_sizes=sizes)
+    snippets, list_s, list_heap = _measure(build_lists)
+    batch, batch_s, batch_heap = _measure(
+        lambda: IdentifierBatch.from_names(raws, kinds, snippet_sizes=sizes))
+    interner_bytes = sum(sys.getsizeof(t) for t in INTERNER.tokens) + sys.getsizeof(INTERNER._ids)
+
+    print(f"\n{len(raws)} identifiers in {len(sizes)} snippets of {k}; "
+          f"{len(INTERNER)} interned tokens (~{interner_bytes / 2**20:.1f} MiB, shared)")
+    print(f"{'':<26}{'build s':>9}{'heap MiB':>10}")
+    print(f"{'list[Identifier]':<26}{list_s:>9.3f}{list_heap / 2**20:>10.1f}")
+    print(f"{'IdentifierBatch':<26}{batch_s:>9.3f}{batch_heap / 2**20:>10.1f}"
+          f"   (nbytes {batch.nbytes / 2**20:.1f} MiB)")
+
+    counts: dict[str, int] = {}
+    for snippet in snippets:
+        for ident in snippet:
+            for t in ident.tokens:
+                counts[t] = counts.get(t, 0) + 1
+    list_feats, list_feat_s = _timed(
+        lambda: np.concatenate([compute_features(s, counts) for s in snippets]), args.rounds)
+    batch_feats, batch_feat_s = _timed(lambda: compute_features(batch, counts), args.rounds)
+    assert np.array_equal(list_feats, batch_feats), "feature paths disagree"
+
+    emb = HashEmbedder()
+    flat = [ident for s in snippets for ident in s]
+    list_emb, list_emb_s = _timed(lambda: np.stack([emb.encode(i.tokens) for i in flat]), args.rounds)
+    batch_emb, batch_emb_s = _timed(lambda: emb.encode_batch(batch), args.rounds)
+    assert np.array_equal(list_emb, batch_emb), "embedding paths disagree"
+
+    n = len(raws)
+    print(f"\n{'':<26}{'list us/id':>11}{'batch us/id':>12}{'speedup':>9}")
+    print(f"{'compute_features':<26}{list_feat_s / n * 1e6:>11.2f}{batch_feat_s / n * 1e6:>12.2f}"
+          f"{list_feat_s / batch_feat_s:>8.1f}x")
+    print(f"{'hash embedder':<26}{list_emb_s / n * 1e6:>11.2f}{batch_emb_s / n * 1e6:>12.2f}"
+          f"{list_emb_s / batch_emb_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
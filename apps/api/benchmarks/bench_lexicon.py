@@ -0,0 +1,96 @@
+"""Compiled lexicon vs. per-process Python sets.
+
+Compares what every worker pays to get the legacy vocabulary (Google 10k +
+domain-term CSVs): loading it into Python sets vs. mapping the compiled
+lexicon, in load time and Python heap (tracemalloc); then batched lookup
+throughput over identifier tokens from bad_identifiers_100k.csv.
+`--pad-words N` adds N synthetic words to show the cost stays flat at 100k+.
+
+Example (from apps/api):
+    python build_lexicon.py && python benchmarks/bench_lexicon.py
+    python benchmarks/bench_lexicon.py --pad-words 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.features import _COMMON_WORDS
+from src.lexicon import (Lexicon, build_lexicon, normalise_term, read_domain_terms,
+                         read_word_list)
+from src.preprocess import _clean_tokens, _split_token
+
+LEGACY = Path(__file__).resolve().parents[3] / "legacy" / "phd-workspace" / "data"
+
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    sec = time.perf_counter() - t0
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out, sec, heap
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark the compiled lexicon.")
+    p.add_argument("--words", default=str(LEGACY / "external" / "google-10000-english.txt"))
+    p.add_argument("--domain-dir", default=str(LEGACY / "processed" / "27-repo-domain-terms"))
+    p.add_argument("--identifiers", default=str(LEGACY / "external" / "bad_identifiers_100k.csv"))
+    p.add_argument("--pad-words", type=int, default=100_000)
+    args = p.parse_args()
+
+    ranked = read_word_list(args.words) + [f"padword{i:07d}" for i in range(args.pad_words)]
+    domains: dict[str, list[str]] = {}
+    for path in sorted(Path(args.domain_dir).glob("*.csv")):
+        for name, terms in read_domain_terms(path).items():
+            domains.setdefault(name, []).extend(terms)
+
+    def load_sets():
+        words = {w.lower() for w in ranked} | set(_COMMON_WORDS)
+        doms = {d: {t for term in terms for t in normalise_term(term)} for d, terms in domains.items()}
+        return words, doms
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build_lexicon(Path(tmp) / "bench.lex", ranked, domains, extra_words=_COMMON_WORDS)
+        (words, doms), set_s, set_heap = _measure(load_sets)
+        lex, lex_s, lex_heap = _measure(lambda: Lexicon(path))
+
+        df = pd.read_csv(args.identifiers)
+        names = df["Identifier Name"].dropna().astype(str).tolist()
+        tokens = [t for n in names for t in _clean_tokens(_split_token(n))]
+
+        t0 = time.perf_counter()
+        set_hits = sum(t in words for t in tokens)
+        set_lookup = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        lex_hits = int(lex.contains(tokens).sum())
+        lex_lookup = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        lex.domain_hits(tokens)
+        mask_lookup = time.perf_counter() - t0
+
+        print(f"\nvocabulary: {len(lex)} words, {len(lex.domains)} domains, "
+              f"file {path.stat().st_size / 2**20:.1f} MiB (mmap, shared across workers)")
+        print(f"{'':<28}{'load s':>9}{'heap MiB':>10}")
+        print(f"{'python sets':<28}{set_s:>9.3f}{set_heap / 2**20:>10.1f}")
+        print(f"{'compiled lexicon':<28}{lex_s:>9.4f}{lex_heap / 2**20:>10.2f}")
+        print(f"\n{len(tokens)} tokens from {len(names)} identifiers")
+        print(f"{'set membership':<28}{len(tokens) / set_lookup / 1e6:>9.2f} M tokens/s  ({set_hits} hits)")
+        print(f"{'lexicon.contains (batched)':<28}{len(tokens) / lex_lookup / 1e6:>9.2f} M tokens/s  ({lex_hits} hits)")
+        print(f"{'lexicon.domain_hits':<28}{len(tokens) / mask_lookup / 1e6:>9.2f} M tokens/s")
+        del lex
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Whole-file scoring (/predict-file): cost per line as the file grows.
+
+Builds Python and C++ files of increasing size from the bundled sample
+snippets and times, per size:
+  - `split_file` (the chunker alone) and the old `fetch_data` slicing regexes;
+  - the full POST /predict-file round trip through a TestClient (skip with
+    --no-model), which loads the checkpoints like the API does.
+Linear scaling shows up as a flat µs/line column.
+
+Example (from apps/api):
+    python benchmarks/bench_predict_file.py
+    python benchmarks/bench_predict_file.py --sizes 100 1000 10000 --no-model
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.chunking import split_file
+from src.dataset import MAX_IDS
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+# ---- the previous fetch_data.slice_into_snippets, kept for timing ----
+_LEGACY = {
+    "python": re.compile(r"^(?:class|def)\s+\w+.*?(?=^(?:class|def)\s+\w+|\Z)", re.M | re.S),
+    "cpp": re.compile(r"(?:[\w:*&<>,\s]+?)\s+\w+\s*\([^;{}]*\)\s*(?:const)?\s*\{[\s\S]*?\n\}", re.M),
+}
+
+
+def synthetic_file(snippets: list[str], n: int) -> str:
+    """`n` sample snippets back to back, the way a long module reads."""
+    return "\n\n".join(snippets[i % len(snippets)] for i in range(n)) + "\n"
+
+
+def _best(fn, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark whole-file scoring.")
+    p.add_argument("--sizes", type=int, nargs="*", default=[25, 100, 400, 1600],
+                   help="Snippets per synthetic file.")
+    p.add_argument("--rounds", type=int, default=3)
+    p.add_argument("--no-model", action="store_true", help="Time the chunker only.")
+    args = p.parse_args()
+
+    client = None
+    if not args.no_model:
+        from fastapi.testclient import TestClient
+
+        import api
+        client = TestClient(api.app).__enter__()
+        while client.get("/health/ready").status_code != 200:
+            time.sleep(0.5)
+
+    print(f"{'lang':<7}{'snippets':>9}{'lines':>8}{'chunks':>8}{'split µs/ln':>13}"
+          f"{'regex µs/ln':>13}{'file µs/ln':>12}{'file s':>8}")
+    for lang, csv in (("python", "sample_python.csv"), ("cpp", "sample_cpp.csv")):
+        snippets = pd.read_csv(DATA / csv)["code"].tolist()
+        for n in args.sizes:
+            code = synthetic_file(snippets, n)
+            lines = code.count("\n") + 1
+            split_s = _best(lambda: split_file(code, lang, MAX_IDS), args.rounds)
+            regex_s = _best(lambda: list(_LEGACY[lang].finditer(code)), 1)
+            chunks = len(split_file(code, lang, MAX_IDS))
+            file_s = float("nan")
+            if client is not None:
+                body = {"code": code, "language": lang}
+                file_s = _best(lambda: client.post("/predict-file", json=body).raise_for_status(),
+                               args.rounds)
+            print(f"{lang:<7}{n:>9}{lines:>8}{chunks:>8}{split_s / lines * 1e6:>13.1f}"
+                  f"{regex_s / lines * 1e6:>13.1f}{file_s / lines * 1e6:>12.1f}{file_s:>8.3f}")
+    if client is not None:
+        client.__exit__(None, None, None)
+
+
+if __name__ == "__main__":
+    main()
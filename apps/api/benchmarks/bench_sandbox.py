@@ -0,0 +1,94 @@
+"""Per-solution latency of the correctness sandbox: fork server vs subprocess.
+
+Runs HumanEval-sized solutions (MBPP-style asserts) one at a time through
+`experiment/run_correctness.run_script`, once with a fresh interpreter per
+solution and once forked from a warm fork server, and reports median and
+p95 latency. Then runs hostile solutions (hang, CPU burn, memory hog,
+sys.exit, os._exit, self-kill, output flood, closed stdout) through both
+paths. It fails unless both paths give the same (passed, total, status)
+and the fork server still answers afterwards.
+
+Example (from apps/api):
+    python benchmarks/bench_sandbox.py --solutions 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "experiment"))
+
+from forkserver import ForkServerPool
+from run_correctness import build_script, run_script
+
+_OK = ("def rolling_max(numbers):\n"
+       "    from itertools import accumulate\n"
+       "    return list(accumulate(numbers, max))\n")
+_TESTS = ("assert rolling_max([1, 2, 3, 2, 3, 4, 2]) == [1, 2, 3, 3, 3, 4, 4]\n"
+          "assert rolling_max([]) == []\n"
+          "assert rolling_max([3, 2, 1]) == [3, 3, 3]\n")
+
+HOSTILE = {
+    "hang":          "import time\ntime.sleep(60)\n",
+    "cpu burn":      "while True:\n    pass\n",
+    "memory hog":    "hog = bytearray(8 << 30)\n",
+    "sys.exit(3)":   "import sys\nsys.exit(3)\n",
+    "sys.exit(0)":   "import sys\nsys.exit(0)\n",
+    "os._exit(0)":   "import os\nos._exit(0)\n",
+    "self SIGKILL":  "import os, signal\nos.kill(os.getpid(), signal.SIGKILL)\n",
+    "output flood":  "for i in range(200000):\n    print('x' * 80)\n",
+    "closed stdout": "import os, time\nos.close(1)\nos.close(2)\ntime.sleep(60)\n",
+    "syntax error":  "def broken(:\n",
+    "recursion":     "def f(n):\n    return f(n + 1)\nf(0)\n",
+}
+
+
+def _latencies(fn, scripts: list[str], timeout: int) -> list[float]:
+    out = []
+    for script in scripts:
+        t0 = time.perf_counter()
+        fn(script, timeout)
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark the correctness sandbox executors.")
+    p.add_argument("--solutions", type=int, default=100)
+    p.add_argument("--timeout", type=int, default=2)
+    args = p.parse_args()
+
+    scripts = [build_script(_OK + f"# solution {i}\n", _TESTS, args.timeout)
+               for i in range(args.solutions)]
+    with ForkServerPool(1) as pool:
+        pool.run(scripts[0], args.timeout)          # server start-up is a one-off
+        timings = {
+            "subprocess": _latencies(lambda s, t: run_script(s, t), scripts, args.timeout),
+            "fork server": _latencies(lambda s, t: run_script(s, t, pool), scripts, args.timeout),
+        }
+        print(f"{'executor':<14}{'median ms':>11}{'p95 ms':>9}{'sol/s':>8}")
+        for name, lat in timings.items():
+            lat = sorted(lat)
+            print(f"{name:<14}{statistics.median(lat) * 1e3:>11.2f}"
+                  f"{lat[int(0.95 * (len(lat) - 1))] * 1e3:>9.2f}{len(lat) / sum(lat):>8.1f}")
+
+        ok = True
+        print(f"\n{'hostile solution':<16}{'subprocess':>22}{'fork server':>22}")
+        for name, code in HOSTILE.items():
+            script = build_script(code + _OK, _TESTS, args.timeout)
+            a = run_script(script, args.timeout)
+            b = run_script(script, args.timeout, pool)
+            ok &= a == b
+            print(f"{name:<16}{str(a):>22}{str(b):>22}{'' if a == b else '  MISMATCH'}")
+        alive = run_script(scripts[0], args.timeout, pool) == (3, 3, "ok")
+        print(f"\nfork server still answering: {alive}")
+    if not (ok and alive):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
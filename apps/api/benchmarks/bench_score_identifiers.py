@@ -0,0 +1,72 @@
+"""Throughput of feature-only identifier scoring (/score-identifiers).
+
+Scores the bundled sample snippets, replicated to `--files` files, in one
+`score_files` call: first with a cold per-name memo, then warm. Also times
+the /predict feature path (`extract_and_normalise` + `compute_features`) on
+the same files for reference, and checks that torch was never imported.
+
+Example (from apps/api):
+    python benchmarks/bench_score_identifiers.py --files 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.features import compute_features
+from src.identifier_quality import cache_info, naming_row, score_files
+from src.preprocess import extract_and_normalise
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+def _load(n_files: int) -> list[tuple[str, str]]:
+    base = [(code, lang) for name, lang in (("sample_python.csv", "python"), ("sample_cpp.csv", "cpp"))
+            for code in pd.read_csv(DATA / name)["code"]]
+    return [base[i % len(base)] for i in range(n_files)]
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark feature-only identifier scoring.")
+    p.add_argument("--files", type=int, default=5000)
+    args = p.parse_args()
+
+    files = _load(args.files)
+    rows: list[tuple[str, float, int]] = []
+
+    naming_row.cache_clear()
+    t0 = time.perf_counter()
+    scored = score_files(files)
+    rows.append(("score_files (cold memo)", time.perf_counter() - t0,
+                 sum(len(r["identifiers"]) for r in scored)))
+    t0 = time.perf_counter()
+    scored = score_files(files)
+    rows.append(("score_files (warm memo)", time.perf_counter() - t0,
+                 sum(len(r["identifiers"]) for r in scored)))
+
+    t0 = time.perf_counter()
+    n = 0
+    for code, lang in files:
+        idents = extract_and_normalise(code, lang)
+        if idents:
+            compute_features(idents)
+        n += len(idents)
+    rows.append(("extract + compute_features", time.perf_counter() - t0, n))
+
+    print(f"\n{'path':<30}{'files/s':>10}{'us/ident':>10}   ({len(files)} files)")
+    for name, sec, n_ids in rows:
+        print(f"{name:<30}{len(files) / sec:>10.0f}{1e6 * sec / max(1, n_ids):>10.1f}")
+    info = cache_info()
+    print(f"\nmemo: {info['size']} names, hit rate {info['hit_rate']:.1%}; "
+          f"torch imported: {'torch' in sys.modules}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compile the word lexicon used by the MC / LF / DR features.
+
+Reads a frequency-ranked word list (one word per line, most frequent first)
+and a directory of per-repository domain-term CSVs, and writes one
+memory-mapped lexicon file (see src/lexicon.py). The built-in common words
+are always folded in, so the compiled lexicon is a superset of them.
+
+Serve it with LEXICON_PATH=artifacts/lexicon.lex, and train with
+`python train.py --lexicon artifacts/lexicon.lex` so features match.
+
+Example:
+    python build_lexicon.py
+    python build_lexicon.py --extra my_vocab.txt --out artifacts/lexicon.lex
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.features import _COMMON_WORDS
+from src.lexicon import Lexicon, build_lexicon, read_domain_terms, read_word_list
+
+_LEGACY_DATA = Path(__file__).resolve().parents[2] / "legacy" / "phd-workspace" / "data"
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Compile the MC/LF/DR word lexicon.")
+    p.add_argument("--words", default=str(_LEGACY_DATA / "external" / "google-10000-english.txt"),
+                   help="Frequency-ranked word list, most frequent first.")
+    p.add_argument("--domain-dir", default=str(_LEGACY_DATA / "processed" / "27-repo-domain-terms"),
+                   help="Directory of domain-term CSVs (Domain,Term,Type or Term,Frequency).")
+    p.add_argument("--extra", nargs="*", default=[],
+                   help="Additional unranked word lists (one word per line).")
+    p.add_argument("--out", default="artifacts/lexicon.lex")
+    args = p.parse_args()
+
+    ranked = read_word_list(args.words)
+    domains: dict[str, list[str]] = {}
+    for csv_path in sorted(Path(args.domain_dir).glob("*.csv")):
+        found = read_domain_terms(csv_path)
+        if not found:
+            print(f"  [skip] {csv_path.name}: not a domain-term CSV")
+        for name, terms in found.items():
+            domains.setdefault(name, []).extend(terms)
+    extra = sorted(_COMMON_WORDS) + [w for path in args.extra for w in read_word_list(path)]
+
+    out = build_lexicon(args.out, ranked, domains, extra_words=extra)
+    lex = Lexicon(out)
+    print(f"{out}: {len(lex)} words ({lex.n_ranked} ranked), {len(lex.domains)} domains, "
+          f"{out.stat().st_size / 1024:.0f} KiB, fingerprint {lex.fingerprint}")
+
+
+if __name__ == "__main__":
+    main()
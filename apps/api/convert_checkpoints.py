@@ -0,0 +1,51 @@
+"""Convert the API's checkpoints to the memory-mapped split format.
+
+Writes, next to each `.pt` file, a `.safetensors` state_dict plus a `.json`
+sidecar (norm_stats / struct_stats / metrics / ...), and exports the CodeBERT
+encoder as safetensors into a local directory. `api.py` picks these up
+automatically on the next start.
+
+Example:
+    python convert_checkpoints.py
+    python convert_checkpoints.py --skip-encoder
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.checkpoint_io import convert_pt, export_encoder
+from src.embeddings import _CODEBERT_MODEL_NAME, CODEBERT_LOCAL_DIR
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Convert .pt checkpoints to mmap'd safetensors.")
+    p.add_argument("--iraf", default="artifacts/iraf_xadl_augmented.pt")
+    p.add_argument("--ecrvr", default="artifacts/ecrvr_mvel.pt")
+    p.add_argument("--encoder-dir", default=str(CODEBERT_LOCAL_DIR))
+    p.add_argument("--encoder-name", default=_CODEBERT_MODEL_NAME)
+    p.add_argument("--skip-encoder", action="store_true",
+                   help="Only convert the classifier checkpoints.")
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(message)s")
+
+    for pt in (Path(args.iraf), Path(args.ecrvr)):
+        if not pt.exists():
+            print(f"  [skip] {pt} not found")
+            continue
+        tensors, meta = convert_pt(pt)
+        print(f"  {pt} -> {tensors} + {meta}")
+
+    if not args.skip_encoder:
+        out = export_encoder(args.encoder_dir, args.encoder_name)
+        print(f"  {args.encoder_name} -> {out}")
+
+
+if __name__ == "__main__":
+    main()
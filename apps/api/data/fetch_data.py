@@ -22,6 +22,10 @@ import zipfile
 from pathlib import Path
 from urllib.request import Request, urlopen
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.chunking import split_file
+
 
 # Default repos. Add your own to taste.
 DEFAULT_REPOS = {
@@ -102,15 +106,10 @@ def score_snippet(code: str) -> str:
 
 
 def slice_into_snippets(code: str, language: str) -> list[str]:
-    """Split a source file into per-function / per-class snippets."""
-    if language == "python":
-        pattern = re.compile(r"^(?:class|def)\s+\w+.*?(?=^(?:class|def)\s+\w+|\Z)",
-                              re.M | re.S)
-    else:  # cpp
-        pattern = re.compile(
-            r"(?:[\w:*&<>,\s]+?)\s+\w+\s*\([^;{}]*\)\s*(?:const)?\s*\{[\s\S]*?\n\}",
-            re.M)
-    return [m.group(0).strip() for m in pattern.finditer(code) if m.group(0).strip()]
+    """Split a source file into per-function / per-class snippets
+    (the /predict-file chunker; module-level code is skipped)."""
+    return [c.code.strip() for c in split_file(code, language)
+            if c.kind != "module" and c.code.strip()]
 
 
 def main() -> None:
@@ -9,6 +9,15 @@ Addresses all four research questions:
 
 Usage:
     python analyze.py --input data/dri_dataset.csv --output results/
+    python analyze.py --input data/results --output results/   # results store
+
+A results store (results_store.py) is memory-mapped and only the columns in
+ANALYSIS_COLUMNS are decoded; code and structural metrics are never read.
+
+Bootstrap 95% CIs (Cohen's d, AUC, Spearman ρ, DRI@Model means) and
+permutation p-values (RQ1 Mann-Whitney U, RQ3 Kruskal-Wallis H) come from
+resampling.py: --bootstrap / --permutations resamples (0 to skip), --seed
+fixes them, --workers spreads them over processes without changing them.
 
 Outputs:
     results/figure1_readability_distribution.png
@@ -40,11 +49,14 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import roc_auc_score
 from sklearn.preprocessing import StandardScaler
 
+from resampling import Resampling
+
 warnings.filterwarnings("ignore")
 
 FEATURE_COLS = ["feat_MC", "feat_NC", "feat_OL", "feat_DR", "feat_PR",
                 "feat_LF", "feat_CC", "feat_SA", "feat_CLS", "feat_PRED"]
 FEATURE_LABELS = ["MC", "NC", "OL", "DR", "PR", "LF", "CC", "SA", "CLS", "PRED"]
+ANALYSIS_COLUMNS = ["correct", "p_high", "readability_label", "dri"] + FEATURE_COLS
 
 PALETTE = {
     "correct":   "#34d399",   # emerald
@@ -65,13 +77,12 @@ def cohens_d(a: pd.Series, b: pd.Series) -> float:
 
 def dunn_posthoc(df: pd.DataFrame, group_col: str, value_col: str) -> pd.DataFrame:
     """Pairwise Mann-Whitney U with Bonferroni correction."""
-    groups = df[group_col].unique()
+    values = {g: v.values for g, v in df.groupby(group_col, sort=False, observed=True)[value_col]}
+    groups = list(values)
     results = []
     pairs = [(a, b) for i, a in enumerate(groups) for b in groups[i+1:]]
     for a, b in pairs:
-        x = df[df[group_col] == a][value_col]
-        y = df[df[group_col] == b][value_col]
-        _, p = mannwhitneyu(x, y, alternative="two-sided")
+        _, p = mannwhitneyu(values[a], values[b], alternative="two-sided")
         results.append({"group_a": a, "group_b": b, "p_raw": p})
     res_df = pd.DataFrame(results)
     # Bonferroni correction
@@ -100,7 +111,13 @@ def apply_style() -> None:
 
 # ── RQ1 ────────────────────────────────────────────────────────────────────
 
-def rq1_readability_distribution(df: pd.DataFrame, out_dir: Path) -> str:
+def _ci(interval: tuple[float, float] | None) -> str:
+    return "" if interval is None else f"  95% CI [{interval[0]:.4f}, {interval[1]:.4f}]"
+
+
+def rq1_readability_distribution(df: pd.DataFrame, out_dir: Path,
+                                 rs: Resampling | None = None,
+                                 ci: dict | None = None) -> str:
     correct   = df[df["correct"]]["p_high"]
     incorrect = df[~df["correct"]]["p_high"]
 
@@ -108,6 +125,7 @@ def rq1_readability_distribution(df: pd.DataFrame, out_dir: Path) -> str:
     d = cohens_d(incorrect, correct)
     n_incorrect_high = (df[~df["correct"]]["readability_label"] == "High").sum()
     pct_incorrect_high = n_incorrect_high / max((~df["correct"]).sum(), 1) * 100
+    p_perm = rs.mannwhitney_p(incorrect, correct) if rs and rs.n_perm else None
 
     # Figure
     apply_style()
@@ -141,7 +159,8 @@ def rq1_readability_distribution(df: pd.DataFrame, out_dir: Path) -> str:
         f"{'─'*50}\n"
         f"U statistic        : {u_stat:.1f}\n"
         f"p-value            : {p_val:.4e}\n"
-        f"Cohen's d          : {d:.4f}\n"
+        + (f"Permutation p      : {p_perm:.4e}  ({rs.n_perm} permutations)\n" if p_perm is not None else "")
+        + f"Cohen's d          : {d:.4f}{_ci(ci and ci['cohens_d'])}\n"
         f"Correct   P_High   : {correct.mean():.4f} ± {correct.std():.4f}\n"
         f"Incorrect P_High   : {incorrect.mean():.4f} ± {incorrect.std():.4f}\n"
         f"Incorrect w/ High  : {n_incorrect_high}/{(~df['correct']).sum()} ({pct_incorrect_high:.1f}%)\n"
@@ -152,7 +171,7 @@ def rq1_readability_distribution(df: pd.DataFrame, out_dir: Path) -> str:
 
 # ── RQ2 ────────────────────────────────────────────────────────────────────
 
-def rq2_readability_predicts_correctness(df: pd.DataFrame) -> str:
+def rq2_readability_predicts_correctness(df: pd.DataFrame, ci: dict | None = None) -> str:
     rho, p_spear = spearmanr(df["p_high"], df["correct"].astype(int))
 
     X = df[["p_high"]].values
@@ -161,13 +180,18 @@ def rq2_readability_predicts_correctness(df: pd.DataFrame) -> str:
     lr.fit(X, y)
     proba = lr.predict_proba(X)[:, 1]
     auc = roc_auc_score(y, proba)
+    auc_ci = None
+    if ci:
+        # The fitted model ranks by P_High, reversed when its coefficient is negative.
+        lo, hi = ci["auc"]
+        auc_ci = (lo, hi) if lr.coef_[0][0] >= 0 else (1.0 - hi, 1.0 - lo)
 
     result = (
         f"\nRQ2 — Readability as Correctness Predictor\n"
         f"{'─'*50}\n"
-        f"Spearman ρ (P_High vs correct) : {rho:.4f}\n"
+        f"Spearman ρ (P_High vs correct) : {rho:.4f}{_ci(ci and ci['spearman'])}\n"
         f"Spearman p-value               : {p_spear:.4e}\n"
-        f"Logistic Regression AUC        : {auc:.4f}\n"
+        f"Logistic Regression AUC        : {auc:.4f}{_ci(auc_ci)}\n"
         f"Interpretation: {'Poor predictor (AUC < 0.65)' if auc < 0.65 else 'Some predictive power'}\n"
     )
     return result
@@ -175,7 +199,7 @@ def rq2_readability_predicts_correctness(df: pd.DataFrame) -> str:
 
 # ── RQ3 ────────────────────────────────────────────────────────────────────
 
-def rq3_dri_per_model(df: pd.DataFrame, out_dir: Path) -> str:
+def rq3_dri_per_model(df: pd.DataFrame, out_dir: Path, rs: Resampling | None = None) -> str:
     model_stats = df.groupby("model")["dri"].agg(
         DRI_mean="mean", DRI_std="std", DRI_median="median",
         High_DRI=lambda x: (x >= 0.6).sum(),
@@ -183,13 +207,19 @@ def rq3_dri_per_model(df: pd.DataFrame, out_dir: Path) -> str:
     ).reset_index()
     model_stats["High_DRI_pct"] = model_stats["High_DRI"] / model_stats["N"] * 100
     model_stats = model_stats.sort_values("DRI_mean", ascending=False)
+    by_model = {m: v.values for m, v in df.groupby("model", observed=True)["dri"]}
+    if rs and rs.n_boot:
+        intervals = rs.mean_intervals(by_model)
+        model_stats["DRI_mean_lo"] = [intervals[m][0] for m in model_stats["model"]]
+        model_stats["DRI_mean_hi"] = [intervals[m][1] for m in model_stats["model"]]
 
     # Kruskal-Wallis
-    groups = [df[df["model"] == m]["dri"].values for m in model_stats["model"]]
+    groups = [by_model[m] for m in model_stats["model"]]
     if len(groups) > 1:
         h_stat, p_kw = kruskal(*groups)
     else:
         h_stat, p_kw = 0.0, 1.0
+    p_perm = rs.kruskal_p(groups) if rs and rs.n_perm and len(groups) > 1 else None
 
     dunn = dunn_posthoc(df, "model", "dri")
 
@@ -211,7 +241,7 @@ def rq3_dri_per_model(df: pd.DataFrame, out_dir: Path) -> str:
     axes[0].yaxis.grid(True); axes[0].set_axisbelow(True)
 
     # Box plot
-    data_for_box = [df[df["model"] == m]["dri"].values for m in models]
+    data_for_box = [by_model[m] for m in models]
     bp = axes[1].boxplot(data_for_box, patch_artist=True, medianprops={"color": "white"})
     for patch, color in zip(bp["boxes"], MODEL_COLORS[:len(models)]):
         patch.set_facecolor(color); patch.set_alpha(0.7)
@@ -231,7 +261,8 @@ def rq3_dri_per_model(df: pd.DataFrame, out_dir: Path) -> str:
         f"{'─'*50}\n"
         f"{table_str}\n\n"
         f"Kruskal-Wallis H : {h_stat:.4f}  p = {p_kw:.4e}\n"
-        f"Significant      : {'YES' if p_kw < 0.05 else 'NO'}\n\n"
+        + (f"Permutation p    : {p_perm:.4e}  ({rs.n_perm} permutations)\n" if p_perm is not None else "")
+        + f"Significant      : {'YES' if p_kw < 0.05 else 'NO'}\n\n"
         f"Dunn post-hoc (Bonferroni):\n"
         f"{dunn[['group_a','group_b','p_bonferroni','significant']].to_string(index=False)}\n"
     )
@@ -340,12 +371,24 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Generate Paper 4 analysis and figures")
     parser.add_argument("--input",  default="data/dri_dataset.csv")
     parser.add_argument("--output", default="results")
+    parser.add_argument("--bootstrap", type=int, default=10_000,
+                        help="Bootstrap resamples per confidence interval (0 = none)")
+    parser.add_argument("--permutations", type=int, default=10_000,
+                        help="Permutations per permutation test (0 = none)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for resampling (results do not depend on it)")
     args = parser.parse_args()
+    rs = Resampling(args.bootstrap, args.permutations, args.seed, args.workers)
 
     out_dir = Path(args.output)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    df = pd.read_csv(args.input)
+    if Path(args.input).is_dir():
+        from results_store import ResultsStore
+        df = ResultsStore(args.input).to_pandas(ANALYSIS_COLUMNS)
+    else:
+        df = pd.read_csv(args.input)
     # Expand JSON-serialised feature dicts if present as strings
     if "features" in df.columns and df["features"].dtype == object:
         import ast
@@ -364,9 +407,10 @@ def main() -> None:
     summary.append(f"Paper 4 Analysis — {len(df)} samples, {df['model'].nunique()} models\n")
     summary.append("=" * 60 + "\n")
 
-    summary.append(rq1_readability_distribution(df, out_dir))
-    summary.append(rq2_readability_predicts_correctness(df))
-    summary.append(rq3_dri_per_model(df, out_dir))
+    ci = rs.rq2_intervals(df["p_high"], df["correct"]) if rs.n_boot else None
+    summary.append(rq1_readability_distribution(df, out_dir, rs, ci))
+    summary.append(rq2_readability_predicts_correctness(df, ci))
+    summary.append(rq3_dri_per_model(df, out_dir, rs))
     summary.append(rq4_feature_importance(df, out_dir))
 
     figure_dri_distribution(df, out_dir)
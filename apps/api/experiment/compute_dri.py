@@ -10,12 +10,24 @@ Usage:
 
 Also writes:
     data/dri_dataset.csv   — same data as flat CSV for easy inspection in Excel / pandas
+
+Streaming (`--stream`, or `--follow` to keep tailing the input as step 3
+appends to it): records are read as they arrive, and each DRI row is appended
+to the JSONL at once (no CSV). Per-(model, benchmark) aggregates (dri_stats.py)
+are updated as rows come in and saved to `<output>.stats.json` with the input
+offset consumed, so a restart resumes where it stopped.
+`python dri_stats.py <stats>` queries or merges them without the data.
+
+With a columnar store (results_store.py), `--store data/results` also writes
+the dri group. `--input data/results` reads only p_high and pass_ratio from
+the store and writes only the dri group; no JSONL is parsed.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import time
 from pathlib import Path
 
 import pandas as pd
@@ -49,29 +61,8 @@ def compute(record: dict) -> dict:
     }
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Compute DRI for all samples")
-    parser.add_argument("--input",  default="data/readability.jsonl")
-    parser.add_argument("--output", default="data/dri_dataset.jsonl")
-    args = parser.parse_args()
-
-    in_path  = Path(args.input)
-    out_path = Path(args.output)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-
-    records = []
-    with open(in_path, encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                records.append(json.loads(line))
-
-    print(f"Computing DRI for {len(records)} records ...")
-    enriched = [compute(r) for r in records if not r.get("readability_error")]
-    skipped  = len(records) - len(enriched)
-    if skipped:
-        print(f"  Skipped {skipped} records with scoring errors")
-
+def write_dataset(enriched: list[dict], out_path: Path) -> None:
+    """Write the DRI dataset as JSONL + flat CSV and print a summary."""
     # Write JSONL
     with open(out_path, "w", encoding="utf-8") as f:
         for r in enriched:
@@ -112,5 +103,150 @@ def main() -> None:
     print(f"\nNext: python analyze.py --input {out_path.with_suffix('.csv')}")
 
 
+def compute_store(store) -> None:
+    """DRI from the store's p_high / pass_ratio columns, written as its dri group."""
+    import pyarrow as pa
+    from results_store import KEY_COLUMNS
+
+    table = store.read(["p_high", "pass_ratio"])
+    dri = [round((p or 0.0) * (1.0 - (r or 0.0)), 4)
+           for p, r in zip(table["p_high"].to_pylist(), table["pass_ratio"].to_pylist())]
+    tiers = [dri_tier(d) for d in dri]
+    out = table.select(KEY_COLUMNS)
+    out = out.append_column("dri", pa.array(dri, pa.float64()))
+    out = out.append_column("dri_tier", pa.array(tiers).dictionary_encode())
+    path = store.write("dri", out)
+    print(f"DRI for {len(dri)} samples -> {path}")
+    print(f"\nDRI tier distribution:")
+    print(pd.Series(tiers).value_counts().to_string())
+    print(f"\nNext: python analyze.py --input {store.root}")
+
+
+def stream(in_path: Path, out_path: Path, stats_path: Path, follow: bool = False,
+           poll: float = 1.0, idle_exit: float | None = None, save_every: float = 5.0) -> None:
+    """Compute DRI record by record, appending to `out_path` and keeping the
+    aggregates in `stats_path` current. With `follow`, wait for more input
+    until interrupted (or `idle_exit` seconds pass without any)."""
+    from dri_stats import DriAggregates
+
+    aggs = DriAggregates.load(stats_path) if stats_path.exists() else DriAggregates()
+    if aggs.source not in (None, str(in_path)):
+        raise SystemExit(f"{stats_path} belongs to {aggs.source}, not {in_path}")
+    aggs.source = str(in_path)
+    if out_path.exists() and out_path.stat().st_size > aggs.output_size:
+        with open(out_path, "r+b") as f:              # rows written after the last save
+            f.truncate(aggs.output_size)
+    if aggs.offset:
+        print(f"Resuming at byte {aggs.offset} of {in_path} "
+              f"({sum(a.n for a in aggs.groups.values())} records aggregated)")
+
+    def save() -> None:
+        out_f.flush()
+        aggs.output_size = out_f.tell()
+        aggs.save(stats_path)
+
+    done = skipped = 0
+
+    def consume(line: bytes, size: int) -> None:
+        nonlocal done, skipped
+        aggs.offset += size
+        if not line.strip():
+            return
+        record = json.loads(line)
+        if record.get("readability_error"):
+            skipped += 1
+            return
+        row = compute(record)
+        out_f.write((json.dumps(row) + "\n").encode("utf-8"))
+        aggs.add(row)
+        done += 1
+
+    buf = b""
+    last_data = last_save = time.monotonic()
+    with open(in_path, "rb") as in_f, open(out_path, "ab") as out_f:
+        in_f.seek(aggs.offset)
+        try:
+            while True:
+                chunk = in_f.read(1 << 16)
+                now = time.monotonic()
+                if chunk:
+                    last_data = now
+                    *lines, buf = (buf + chunk).split(b"\n")
+                    for line in lines:
+                        consume(line, len(line) + 1)
+                elif not follow:
+                    if buf:                           # last record without a trailing newline
+                        consume(buf, len(buf))
+                    break
+                elif idle_exit is not None and now - last_data >= idle_exit:
+                    break
+                else:
+                    if in_path.stat().st_size < aggs.offset + len(buf):
+                        raise SystemExit(f"{in_path} shrank below the consumed offset; "
+                                         f"delete {stats_path} and {out_path} to start over")
+                    time.sleep(poll)
+                if now - last_save >= save_every:
+                    save()
+                    last_save = now
+        except KeyboardInterrupt:
+            print("\nInterrupted")
+        finally:
+            save()
+
+    print(f"DRI for {done} new records" + (f" ({skipped} scoring errors skipped)" if skipped else "")
+          + f" -> {out_path}")
+    print(f"Aggregates: {stats_path}\n")
+    print(aggs.table())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compute DRI for all samples")
+    parser.add_argument("--input",  default="data/readability.jsonl")
+    parser.add_argument("--output", default="data/dri_dataset.jsonl")
+    parser.add_argument("--store", default=None,
+                        help="Also write the dri columns to this results store")
+    parser.add_argument("--stream", action="store_true",
+                        help="Process records as they are read; keep aggregates, no CSV")
+    parser.add_argument("--follow", action="store_true",
+                        help="Like --stream, then keep waiting for appended records")
+    parser.add_argument("--stats", default=None,
+                        help="Aggregates file (default: <output>.stats.json)")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between checks (--follow)")
+    parser.add_argument("--idle-exit", type=float, default=None,
+                        help="Stop following after this many seconds without new records")
+    args = parser.parse_args()
+
+    in_path  = Path(args.input)
+    if in_path.is_dir():
+        from results_store import ResultsStore
+        compute_store(ResultsStore(in_path))
+        return
+
+    out_path = Path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if args.stream or args.follow:
+        stats = Path(args.stats) if args.stats else out_path.with_name(out_path.stem + ".stats.json")
+        stream(in_path, out_path, stats, args.follow, args.poll, args.idle_exit)
+        return
+
+    records = []
+    with open(in_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+
+    print(f"Computing DRI for {len(records)} records ...")
+    enriched = [compute(r) for r in records if not r.get("readability_error")]
+    skipped  = len(records) - len(enriched)
+    if skipped:
+        print(f"  Skipped {skipped} records with scoring errors")
+    write_dataset(enriched, out_path)
+    if args.store:
+        from results_store import ResultsStore
+        ResultsStore(args.store).write_stage("dri", enriched)
+        print(f"Store: {args.store}")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,245 @@
+"""
+Mergeable DRI aggregates per (model, benchmark).
+
+Each group keeps:
+  - Welford count / mean / M2 for dri, p_high and pass_ratio (merged with
+    Chan et al.'s pairwise update, so shards combine without the rows),
+  - the number of correct samples and a DRI tier histogram,
+  - a fixed-bin quantile sketch of DRI: BINS counts over [0, 1]. DRI is
+    rounded to 4 decimals, so with 10,000 bins every value has its own bin
+    and quantiles match numpy's (linear interpolation) on the raw data.
+
+`DriAggregates` is what compute_dri.py --stream maintains and persists as
+JSON next to its output, with the input offset it has consumed. Query or
+merge stats files without touching the data:
+
+    python dri_stats.py data/dri_dataset.stats.json
+    python dri_stats.py shard*.stats.json --by model --output all.stats.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+from compute_dri import DRI_TIERS
+
+BINS = 10_000
+QUANTILES = (0.5, 0.9, 0.99)
+TIERS = [label for _, label in DRI_TIERS]
+
+
+class Welford:
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0) -> None:
+        self.n, self.mean, self.m2 = n, mean, m2
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other: "Welford") -> None:
+        n = self.n + other.n
+        if not other.n:
+            return
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, as pandas)."""
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else float("nan")
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Welford":
+        return cls(d["n"], d["mean"], d["m2"])
+
+
+class QuantileSketch:
+    """Counts of values in [0, 1] over `bins` equal bins (bin k holds k / bins)."""
+
+    def __init__(self, bins: int = BINS) -> None:
+        self.bins = bins
+        self.counts = np.zeros(bins + 1, dtype=np.int64)
+
+    def add(self, x: float) -> None:
+        self.counts[min(max(round(x * self.bins), 0), self.bins)] += 1
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.bins != self.bins:
+            raise ValueError(f"cannot merge sketches with {self.bins} and {other.bins} bins")
+        self.counts += other.counts
+
+    def quantile(self, q: float) -> float:
+        """Linear interpolation between the order statistics around q·(n−1)."""
+        cum = np.cumsum(self.counts)
+        n = int(cum[-1])
+        if not n:
+            return float("nan")
+        pos = q * (n - 1)
+        lo = math.floor(pos)
+        a, b = np.searchsorted(cum, [lo, min(lo + 1, n - 1)], side="right") / self.bins
+        return float(a + (pos - lo) * (b - a))
+
+    def to_dict(self) -> dict:
+        idx = np.flatnonzero(self.counts)
+        return {"bins": self.bins, "index": idx.tolist(), "count": self.counts[idx].tolist()}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "QuantileSketch":
+        sketch = cls(d["bins"])
+        sketch.counts[np.asarray(d["index"], dtype=np.int64)] = d["count"]
+        return sketch
+
+
+class DriAggregate:
+    """Aggregates of one group of DRI records."""
+
+    def __init__(self) -> None:
+        self.dri = Welford()
+        self.p_high = Welford()
+        self.pass_ratio = Welford()
+        self.correct = 0
+        self.tiers = dict.fromkeys(TIERS, 0)
+        self.sketch = QuantileSketch()
+
+    @property
+    def n(self) -> int:
+        return self.dri.n
+
+    def add(self, record: dict) -> None:
+        self.dri.add(record["dri"])
+        self.p_high.add(record.get("p_high", 0.0))
+        self.pass_ratio.add(record.get("pass_ratio", 0.0))
+        self.correct += bool(record.get("correct"))
+        self.tiers[record["dri_tier"]] += 1
+        self.sketch.add(record["dri"])
+
+    def merge(self, other: "DriAggregate") -> None:
+        self.dri.merge(other.dri)
+        self.p_high.merge(other.p_high)
+        self.pass_ratio.merge(other.pass_ratio)
+        self.correct += other.correct
+        for tier, count in other.tiers.items():
+            self.tiers[tier] = self.tiers.get(tier, 0) + count
+        self.sketch.merge(other.sketch)
+
+    def to_dict(self) -> dict:
+        return {"dri": self.dri.to_dict(), "p_high": self.p_high.to_dict(),
+                "pass_ratio": self.pass_ratio.to_dict(), "correct": self.correct,
+                "tiers": self.tiers, "sketch": self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "DriAggregate":
+        agg = cls()
+        agg.dri = Welford.from_dict(d["dri"])
+        agg.p_high = Welford.from_dict(d["p_high"])
+        agg.pass_ratio = Welford.from_dict(d["pass_ratio"])
+        agg.correct = d["correct"]
+        agg.tiers = {**agg.tiers, **d["tiers"]}
+        agg.sketch = QuantileSketch.from_dict(d["sketch"])
+        return agg
+
+
+class DriAggregates:
+    """`DriAggregate` per (model, benchmark), plus where the stream stopped:
+    `offset` bytes of `source` consumed, `output_size` bytes written."""
+
+    def __init__(self) -> None:
+        self.groups: dict[tuple[str, str], DriAggregate] = {}
+        self.source: str | None = None
+        self.offset = 0
+        self.output_size = 0
+
+    def add(self, record: dict) -> None:
+        key = (record.get("model", ""), record.get("benchmark", ""))
+        if key not in self.groups:
+            self.groups[key] = DriAggregate()
+        self.groups[key].add(record)
+
+    def merge(self, other: "DriAggregates") -> None:
+        for key, agg in other.groups.items():
+            if key not in self.groups:
+                self.groups[key] = DriAggregate()
+            self.groups[key].merge(agg)
+
+    def query(self, model: str | None = None, benchmark: str | None = None) -> DriAggregate:
+        """The merged aggregate of every group matching `model` / `benchmark`."""
+        out = DriAggregate()
+        for (m, b), agg in self.groups.items():
+            if model in (None, m) and benchmark in (None, b):
+                out.merge(agg)
+        return out
+
+    def rollup(self, by: str = "model,benchmark") -> dict[tuple, DriAggregate]:
+        """Aggregates grouped by "model", "benchmark", "model,benchmark" or "all"."""
+        fields = [f for f in by.split(",") if f != "all"]
+        out: dict[tuple, DriAggregate] = {}
+        for (m, b), agg in sorted(self.groups.items()):
+            key = tuple({"model": m, "benchmark": b}[f] for f in fields)
+            out.setdefault(key, DriAggregate()).merge(agg)
+        return out
+
+    def save(self, path: Path) -> None:
+        data = {"source": self.source, "offset": self.offset, "output_size": self.output_size,
+                "groups": [{"model": m, "benchmark": b, **agg.to_dict()}
+                           for (m, b), agg in sorted(self.groups.items())]}
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "DriAggregates":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        aggs = cls()
+        aggs.source = data.get("source")
+        aggs.offset = data.get("offset", 0)
+        aggs.output_size = data.get("output_size", 0)
+        for g in data["groups"]:
+            aggs.groups[(g["model"], g["benchmark"])] = DriAggregate.from_dict(g)
+        return aggs
+
+    def table(self, by: str = "model,benchmark") -> str:
+        fields = [f for f in by.split(",") if f != "all"] or ["all"]
+        head = "".join(f"{f:<24}" for f in fields)
+        lines = [f"{head}{'n':>8}{'correct':>9}{'DRI mean':>10}{'std':>8}"
+                 + "".join(f"{'p' + str(round(q * 100)):>8}" for q in QUANTILES)
+                 + "".join(f"{t:>10}" for t in TIERS)]
+        for key, agg in self.rollup(by).items():
+            name = "".join(f"{str(k)[:23]:<24}" for k in key) or f"{'all':<24}"
+            lines.append(f"{name}{agg.n:>8}{agg.correct:>9}{agg.dri.mean:>10.4f}{agg.dri.std:>8.4f}"
+                         + "".join(f"{agg.sketch.quantile(q):>8.4f}" for q in QUANTILES)
+                         + "".join(f"{agg.tiers.get(t, 0):>10}" for t in TIERS))
+        return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query and merge DRI aggregate files")
+    parser.add_argument("stats", nargs="+", help="*.stats.json written by compute_dri.py")
+    parser.add_argument("--by", default="model,benchmark",
+                        choices=["model,benchmark", "model", "benchmark", "all"])
+    parser.add_argument("--output", default=None, help="Write the merged aggregates here")
+    args = parser.parse_args()
+
+    merged = DriAggregates()
+    for path in args.stats:
+        merged.merge(DriAggregates.load(Path(path)))
+    print(merged.table(args.by))
+    if args.output:
+        merged.save(Path(args.output))
+        print(f"\nMerged: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Fork-server executor for run_correctness.py (POSIX only).
+
+Starting a fresh interpreter per solution costs far more than running a
+HumanEval-sized solution. A fork server starts once, pre-imports the stdlib
+modules solutions commonly use, and then forks one child per solution:
+
+    client (run_correctness thread) --script--> server --fork--> child
+                                    <--stdout, stderr, returncode--
+
+The child runs the `build_script` script with `exec`, in its own session,
+working directory and rlimits (set by the script preamble), with fds 1/2 on
+pipes to the server. The server enforces the wall-clock timeout by killing
+the child's process group. A crashing, hanging or exiting solution only ever
+takes down its child. The server is single-threaded, so forking it is safe;
+the client side is thread-safe through `ForkServerPool`, one server per
+worker.
+
+Protocol (server stdin/stdout): 4-byte big-endian length + JSON, request
+{"script", "timeout"}, reply {"stdout", "stderr", "returncode"} with
+returncode None on timeout.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import select
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+# Pre-imported in the server so children inherit them already loaded.
+WARM_MODULES = (
+    "bisect", "collections", "copy", "datetime", "decimal", "fractions", "functools",
+    "hashlib", "heapq", "itertools", "json", "math", "operator", "random", "re",
+    "statistics", "string", "typing",
+)
+OUTPUT_LIMIT = 64 << 10          # bytes of child stdout / stderr kept (the tail)
+_HEADER = struct.Struct(">I")
+
+
+def _send(stream, payload: dict) -> None:
+    data = json.dumps(payload).encode("utf-8")
+    stream.write(_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _recv(stream) -> dict | None:
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    return json.loads(stream.read(size).decode("utf-8"))
+
+
+# ---------------------------------------------------------------------------
+# Server side
+# ---------------------------------------------------------------------------
+
+def _child(script: str, out_w: int, err_w: int, workdir: str) -> None:
+    """Runs in the forked child; never returns."""
+    try:
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(out_w, 1)
+        os.dup2(err_w, 2)
+        os.chdir(workdir)
+        sys.stdin = open(0, closefd=False)
+        sys.stdout = open(1, "w", closefd=False)
+        sys.stderr = open(2, "w", closefd=False)
+        code = 0
+        try:
+            exec(compile(script, "solution.py", "exec"), {"__name__": "__main__"})
+        except SystemExit as exc:
+            code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+    except BaseException:
+        os._exit(1)
+
+
+def _drain(fds: dict[int, bytearray], deadline: float) -> bool:
+    """Read both pipes until EOF; False if the deadline passed first."""
+    while fds:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        ready, _, _ = select.select(list(fds), [], [], remaining)
+        for fd in ready:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                os.close(fd)
+                del fds[fd]
+                continue
+            buf = fds[fd]
+            buf += chunk
+            if len(buf) > OUTPUT_LIMIT:
+                del buf[:len(buf) - OUTPUT_LIMIT]
+    return True
+
+
+def _execute(script: str, timeout: float) -> dict:
+    workdir = tempfile.mkdtemp(prefix="iraf_fork_")
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(out_r)
+        os.close(err_r)
+        _child(script, out_w, err_w, workdir)
+    os.close(out_w)
+    os.close(err_w)
+    deadline = time.monotonic() + timeout
+    out, err = bytearray(), bytearray()
+    fds = {out_r: out, err_r: err}
+    status = None
+    if _drain(fds, deadline):
+        # Pipes closed; the child normally exits right after.
+        while time.monotonic() < deadline:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                break
+            status = None
+            time.sleep(0.001)
+    if status is None:
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        for fd in fds:
+            os.close(fd)
+        os.waitpid(pid, 0)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {"stdout": out.decode("utf-8", "replace"),
+            "stderr": err.decode("utf-8", "replace"),
+            "returncode": None if status is None else os.waitstatus_to_exitcode(status)}
+
+
+def serve() -> None:
+    for name in WARM_MODULES:
+        __import__(name)
+    requests, replies = sys.stdin.buffer, sys.stdout.buffer
+    while (request := _recv(requests)) is not None:
+        _send(replies, _execute(request["script"], request["timeout"]))
+
+
+# ---------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------
+
+class ServerExited(RuntimeError):
+    """The fork server died mid-request: a harness failure, not the solution's."""
+
+
+class ForkServer:
+    """One warm server process; not thread-safe (see ForkServerPool)."""
+
+    def __init__(self) -> None:
+        self._proc: subprocess.Popen | None = None
+
+    def _start(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        return self._proc
+
+    def run(self, script: str, timeout: float) -> tuple[str, str, int | None]:
+        """(stdout, stderr, returncode) of the script; returncode None on timeout.
+        Raises ServerExited if the server died before replying."""
+        proc = self._start()
+        try:
+            _send(proc.stdin, {"script": script, "timeout": timeout})
+            reply = _recv(proc.stdout)
+        except (BrokenPipeError, OSError):
+            reply = None
+        if reply is None:                  # the server itself died: restart next time
+            self.close()
+            raise ServerExited("fork server exited")
+        return reply["stdout"], reply["stderr"], reply["returncode"]
+
+    def close(self) -> None:
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+
+
+class ForkServerPool:
+    """`size` fork servers shared by worker threads, one request each at a time."""
+
+    def __init__(self, size: int) -> None:
+        self._servers: queue.Queue[ForkServer] = queue.Queue()
+        self._all = [ForkServer() for _ in range(size)]
+        for server in self._all:
+            self._servers.put(server)
+
+    def run(self, script: str, timeout: float) -> tuple[str, str, int | None]:
+        server = self._servers.get()
+        try:
+            return server.run(script, timeout)
+        finally:
+            self._servers.put(server)
+
+    def close(self) -> None:
+        for server in self._all:
+            server.close()
+
+    def __enter__(self) -> "ForkServerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def available() -> bool:
+    return hasattr(os, "fork") and sys.platform != "win32"
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,441 @@
+"""
+Steps 1–5 as one cached DAG over (model, benchmark) partitions.
+
+Usage:
+    python pipeline.py --data data/evalplus --work data/pipeline --jobs 4
+    python pipeline.py ... --dry-run          # list what is stale, run nothing
+
+DAG (one chain per model × benchmark, joined at the end):
+
+    correctness/<model>/<benchmark>    run_correctness.process_model
+      → readability/<model>/<benchmark>    IrafScorer, in-process (src/inference.py)
+        → dri/<model>/<benchmark>           compute_dri.compute
+          → dataset                         dri_dataset.jsonl + .csv (+ --store)
+            → analyze                       analyze.py → results/
+
+Step 1 (download_evalplus.py) runs first if the problem files are missing.
+Readability is scored in-process, so no API has to be running; the numbers
+equal the /batch path (see score_inprocess.py).
+
+Each task has a fingerprint: a SHA-256 over its parameters, the source of
+the code it runs, its external inputs (solution file, problem file,
+checkpoint, lexicon) and the output hashes of the tasks it depends on. A task
+whose fingerprint and outputs match `<work>/manifest.json` is skipped, so
+changing one model's solutions re-runs that model's chains, then dataset and
+analyze. Independent tasks run concurrently (--jobs); correctness partitions
+share the fork servers and the result cache, readability partitions share one
+model and take turns on it. Prints per-step timings and cache hits at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+EXPERIMENT_DIR = Path(__file__).resolve().parent
+API_DIR = EXPERIMENT_DIR.parent
+sys.path.insert(0, str(API_DIR))
+
+import forkserver
+from compute_dri import compute, write_dataset
+from forkserver import ForkServerPool
+from result_cache import ResultCache
+from run_correctness import DEFAULT_MEM_MB, load_problems, process_model, solution_files
+from score_readability import load_records
+
+PIPELINE_VERSION = 1              # bump when a step's outputs change without a code change
+PROBLEM_FILES = {"humaneval": "humaneval_plus.jsonl", "mbpp": "mbpp_plus.jsonl"}
+
+STEP_CODE = {
+    "correctness": [EXPERIMENT_DIR / n for n in ("run_correctness.py", "forkserver.py",
+                                                 "result_cache.py")],
+    "readability": sorted((API_DIR / "src").glob("*.py")),
+    "dri":         [EXPERIMENT_DIR / "compute_dri.py"],
+    "dataset":     [EXPERIMENT_DIR / "compute_dri.py", EXPERIMENT_DIR / "results_store.py"],
+    "analyze":     [EXPERIMENT_DIR / "analyze.py", EXPERIMENT_DIR / "resampling.py"],
+}
+
+
+# ── fingerprints ───────────────────────────────────────────────────────────
+
+class FileHasher:
+    """SHA-256 of file contents, memoized on (size, mtime) across runs."""
+
+    def __init__(self, memo: dict[str, list]) -> None:
+        self.memo = memo
+        self._lock = threading.Lock()
+
+    def __call__(self, path: Path) -> str | None:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        key = str(path.resolve())
+        with self._lock:
+            hit = self.memo.get(key)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        with self._lock:
+            self.memo[key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+
+@dataclass
+class Task:
+    name: str                             # "readability/<model>/<benchmark>"
+    step: str
+    run: Callable[[], None]
+    outputs: list[Path]
+    deps: list[str] = field(default_factory=list)
+    files: list[Path] = field(default_factory=list)            # inputs besides deps' outputs
+    params: Callable[[], dict] = dict                          # evaluated once deps are done
+
+
+# ── scheduler ──────────────────────────────────────────────────────────────
+
+class Pipeline:
+    def __init__(self, tasks: list[Task], manifest_path: Path, jobs: int = 1,
+                 dry_run: bool = False) -> None:
+        seen: set[str] = set()
+        for t in tasks:
+            missing = [d for d in t.deps if d not in seen]
+            if missing:
+                raise ValueError(f"{t.name}: dependencies {missing} must be listed before it")
+            seen.add(t.name)
+        self.tasks = tasks
+        self.by_name = {t.name: t for t in tasks}
+        self.manifest_path = manifest_path
+        self.manifest = (json.loads(manifest_path.read_text(encoding="utf-8"))
+                         if manifest_path.exists() else {"tasks": {}, "files": {}})
+        self.hash = FileHasher(self.manifest["files"])
+        self.jobs = jobs
+        self.dry_run = dry_run
+        self.status: dict[str, str] = {}          # ran / cached / stale / failed / skipped
+        self.seconds: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, task: Task) -> str:
+        material = {
+            "version": PIPELINE_VERSION,
+            "step": task.step,
+            "params": task.params(),
+            "files": [self.hash(p) for p in task.files],        # content only, not paths
+            "deps": [sorted(self.manifest["tasks"][d]["outputs"].values()) for d in task.deps],
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, default=str)
+                              .encode("utf-8")).hexdigest()
+
+    def _fresh(self, task: Task, fp: str) -> bool:
+        entry = self.manifest["tasks"].get(task.name)
+        return (entry is not None and entry["fingerprint"] == fp
+                and all(self.hash(p) == entry["outputs"].get(str(p)) for p in task.outputs))
+
+    def _execute(self, task: Task) -> str:
+        if self.dry_run and any(self.status[d] == "stale" for d in task.deps):
+            return "stale"
+        fp = self.fingerprint(task)
+        if self._fresh(task, fp):
+            return "cached"
+        if self.dry_run:
+            return "stale"
+        t0 = time.perf_counter()
+        task.run()
+        self.seconds[task.name] = time.perf_counter() - t0
+        with self._lock:
+            self.manifest["tasks"][task.name] = {
+                "fingerprint": fp,
+                "outputs": {str(p): self.hash(p) for p in task.outputs},
+                "seconds": round(self.seconds[task.name], 3),
+            }
+            self._save()
+        return "ran"
+
+    def _save(self) -> None:
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with self.hash._lock:                  # the file-hash memo lives in the manifest
+            text = json.dumps(self.manifest, indent=1)
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    def run(self) -> bool:
+        """Run every stale task, dependencies first; False if any failed."""
+        pending = list(self.tasks)
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            running = {}
+            while pending or running:
+                for task in list(pending):
+                    if any(d not in self.status for d in task.deps):
+                        continue
+                    pending.remove(task)
+                    if any(self.status[d] in ("failed", "skipped") for d in task.deps):
+                        self._finish(task, "skipped")
+                    else:
+                        running[pool.submit(self._execute, task)] = task
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    task = running.pop(fut)
+                    try:
+                        status = fut.result()
+                    except Exception:
+                        traceback.print_exc()
+                        status = "failed"
+                    self._finish(task, status)
+        with self._lock:
+            self._save()
+        return not any(s == "failed" for s in self.status.values())
+
+    def _finish(self, task: Task, status: str) -> None:
+        self.status[task.name] = status
+        took = f" {self.seconds[task.name]:.1f}s" if task.name in self.seconds else ""
+        print(f"  [{status}{took}] {task.name}", flush=True)
+
+    def report(self, wall: float) -> str:
+        counts: dict[str, Counter] = defaultdict(Counter)
+        seconds: dict[str, float] = defaultdict(float)
+        for t in self.tasks:
+            counts[t.step][self.status.get(t.name, "skipped")] += 1
+            seconds[t.step] += self.seconds.get(t.name, 0.0)
+        lines = [f"{'step':<13}{'tasks':>6}{'ran':>6}{'cached':>8}{'stale':>7}"
+                 f"{'failed':>8}{'skipped':>9}{'seconds':>9}"]
+        for step, c in counts.items():
+            lines.append(f"{step:<13}{sum(c.values()):>6}{c['ran']:>6}{c['cached']:>8}"
+                         f"{c['stale']:>7}{c['failed']:>8}{c['skipped']:>9}{seconds[step]:>9.1f}")
+        total = Counter(self.status.values())
+        lines.append(f"\n{len(self.tasks)} tasks in {wall:.1f}s: {total['ran']} ran, "
+                     f"{total['cached']} cached ({total['cached'] / max(len(self.tasks), 1):.0%})")
+        return "\n".join(lines)
+
+
+# ── the Paper 4 DAG ────────────────────────────────────────────────────────
+
+def checkpoint_files(checkpoint: Path) -> list[Path]:
+    """The .pt and, if converted, the safetensors/JSON pair the loader prefers."""
+    from src.checkpoint_io import split_paths
+    return [checkpoint, *split_paths(checkpoint.with_suffix(""))]
+
+
+def embedder_key(no_codebert: bool) -> str:
+    """Which embedder the readability step asks for, known without loading it:
+    HashEmbedder, or the CodeBERT export / hub model Embedder would load (the
+    task fails rather than fall back when CodeBERT does not load)."""
+    if no_codebert:
+        return "HashEmbedder"
+    from src.embeddings import CODEBERT_LOCAL_DIR
+    if (CODEBERT_LOCAL_DIR / "config.json").exists():
+        return f"CodeBERT:{CODEBERT_LOCAL_DIR.resolve()}"
+    return "CodeBERT:microsoft/codebert-base"
+
+
+def _write_jsonl(path: Path, rows: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r) + "\n")
+    os.replace(tmp, path)
+
+
+def build_tasks(args, executor: ForkServerPool | None, cache: ResultCache | None) -> list[Task]:
+    data, work = Path(args.data), Path(args.work)
+    sol_dir = data / "solutions"
+    models = sorted(d.name for d in sol_dir.iterdir() if d.is_dir()) if sol_dir.exists() else []
+    checkpoint = Path(args.checkpoint)
+    scorer_lock = threading.Lock()
+    scorer_box: list = []
+
+    def scorer():
+        with scorer_lock:
+            if not scorer_box:
+                from src.embeddings import Embedder
+                from src.features import use_lexicon
+                from src.inference import IrafScorer
+                if args.lexicon:
+                    from src.lexicon import Lexicon
+                    use_lexicon(Lexicon.open(args.lexicon))
+                scorer_box.append(IrafScorer.load(checkpoint,
+                                                  Embedder(use_codebert=not args.no_codebert)))
+        # embedder_key() fingerprints what was asked for; never store HashEmbedder
+        # scores under a CodeBERT fingerprint because the encoder failed to load.
+        if not args.no_codebert and scorer_box[0].embedder.name != "CodeBERT":
+            raise RuntimeError("CodeBERT was requested but could not be loaded (see the warning "
+                               "above); fix CODEBERT_PATH or pass --no-codebert")
+        return scorer_box[0]
+
+    def correctness(model: str, benchmark: str, out: Path) -> Callable[[], None]:
+        def run() -> None:
+            problems = load_problems(data / PROBLEM_FILES[benchmark])
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text("", encoding="utf-8")
+            stats, lines = process_model(model, benchmark, problems, sol_dir, out, args.timeout,
+                                         args.workers, args.mem_mb or None, executor, cache)
+            out.write_text("".join(lines), encoding="utf-8")
+            print(f"    {model}/{benchmark}: {stats.summary()}", flush=True)
+        return run
+
+    def readability(src: Path, out: Path) -> Callable[[], None]:
+        def run() -> None:
+            records = load_records(src)
+            model = scorer()
+            with scorer_lock:                  # one forward pass at a time; torch uses every core
+                cols = model.readability_columns([r["code"] for r in records],
+                                                 domain=args.domain, batch_size=args.batch_size)
+            _write_jsonl(out, [{**r, **c} if c is not None else {**r, "readability_error": True}
+                               for r, c in zip(records, cols)])
+        return run
+
+    def dri(src: Path, out: Path) -> Callable[[], None]:
+        def run() -> None:
+            _write_jsonl(out, [compute(r) for r in load_records(src)
+                               if not r.get("readability_error")])
+        return run
+
+    tasks: list[Task] = []
+    dri_tasks: list[Task] = []
+    for benchmark in args.benchmarks:
+        problem_file = data / PROBLEM_FILES[benchmark]
+        if not problem_file.exists():
+            print(f"[warn] Problem file not found for {benchmark}: {problem_file}")
+            continue
+        for model in models:
+            files = [p for p in solution_files(sol_dir, model, benchmark) if p.stat().st_size]
+            if not files:
+                print(f"  [warn] No solutions found for {model}/{benchmark}, skipping")
+                continue
+            part = f"{model}/{benchmark}"
+            c_out = work / "correctness" / model / f"{benchmark}.jsonl"
+            r_out = work / "readability" / model / f"{benchmark}.jsonl"
+            d_out = work / "dri" / model / f"{benchmark}.jsonl"
+            tasks.append(Task(
+                f"correctness/{part}", "correctness", correctness(model, benchmark, c_out),
+                [c_out], files=[files[0], problem_file, *STEP_CODE["correctness"]],
+                params=lambda: {"timeout": args.timeout, "mem_mb": args.mem_mb}))
+            tasks.append(Task(
+                f"readability/{part}", "readability", readability(c_out, r_out), [r_out],
+                deps=[f"correctness/{part}"],
+                files=[*checkpoint_files(checkpoint), *STEP_CODE["readability"],
+                       *([Path(args.lexicon)] if args.lexicon else [])],
+                params=lambda: {"domain": args.domain, "embedder": embedder_key(args.no_codebert)}))
+            dri_tasks.append(Task(
+                f"dri/{part}", "dri", dri(r_out, d_out), [d_out],
+                deps=[f"readability/{part}"], files=STEP_CODE["dri"]))
+            tasks.append(dri_tasks[-1])
+
+    dataset = work / "dri_dataset.jsonl"
+
+    def build_dataset() -> None:
+        rows = [r for t in dri_tasks for r in load_records(t.outputs[0])]
+        write_dataset(rows, dataset)
+        if args.store:
+            from results_store import ResultsStore
+            store = ResultsStore(args.store)
+            for stage, step in (("correctness", "correctness"), ("readability", "readability"),
+                                ("dri", "dri")):
+                store.write_stage(stage, [r for t in tasks if t.step == step
+                                          for r in load_records(t.outputs[0])])
+
+    results = work / "results"
+
+    def analyze() -> None:
+        subprocess.run([sys.executable, str(EXPERIMENT_DIR / "analyze.py"),
+                        "--input", str(dataset.with_suffix(".csv")), "--output", str(results)],
+                       check=True)
+
+    if dri_tasks:
+        tasks.append(Task("dataset", "dataset", build_dataset,
+                          [dataset, dataset.with_suffix(".csv")],
+                          deps=[t.name for t in dri_tasks], files=STEP_CODE["dataset"],
+                          params=lambda: {"store": args.store}))
+        if not args.no_analyze:
+            tasks.append(Task("analyze", "analyze", analyze, [results / "summary.txt"],
+                              deps=["dataset"], files=STEP_CODE["analyze"]))
+    return tasks
+
+
+def ensure_downloaded(args) -> None:
+    data = Path(args.data)
+    if all((data / PROBLEM_FILES[b]).exists() for b in args.benchmarks) and (data / "solutions").exists():
+        print("  [cached] download")
+        return
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, str(EXPERIMENT_DIR / "download_evalplus.py"),
+                    "--output", str(data)], check=True)
+    print(f"  [ran {time.perf_counter() - t0:.1f}s] download")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Paper 4 pipeline as a cached DAG")
+    parser.add_argument("--data", default="data/evalplus")
+    parser.add_argument("--work", default="data/pipeline",
+                        help="Partition outputs, dri_dataset, results/ and manifest.json")
+    parser.add_argument("--benchmarks", nargs="+", default=list(PROBLEM_FILES),
+                        choices=list(PROBLEM_FILES))
+    parser.add_argument("--jobs", type=int, default=4, help="Tasks run concurrently")
+    parser.add_argument("--dry-run", action="store_true", help="Report stale tasks, run nothing")
+    # correctness
+    parser.add_argument("--timeout", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Sandboxes per correctness task")
+    parser.add_argument("--executor", choices=["fork", "subprocess"],
+                        default="fork" if forkserver.available() else "subprocess")
+    parser.add_argument("--mem-mb", type=int, default=DEFAULT_MEM_MB)
+    parser.add_argument("--no-cache", action="store_true", help="Re-execute every solution")
+    # readability
+    parser.add_argument("--checkpoint", default=str(API_DIR / "artifacts/iraf_xadl_augmented.pt"))
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--lexicon", default=None, help="Same as the API's LEXICON_PATH")
+    parser.add_argument("--domain", default=None, help="Same as the API's FEATURE_DOMAIN")
+    parser.add_argument("--no-codebert", action="store_true", help="Hash embedder (tests only)")
+    # outputs
+    parser.add_argument("--store", default=None, help="Also write a results store here")
+    parser.add_argument("--no-analyze", action="store_true", help="Stop after the dataset")
+    args = parser.parse_args()
+    if args.domain in {"", "auto"}:
+        args.domain = None
+
+    work = Path(args.work)
+    t0 = time.perf_counter()
+    if not args.dry_run:
+        ensure_downloaded(args)
+    executor = (ForkServerPool(args.workers)
+                if args.executor == "fork" and not args.dry_run else None)
+    cache = None if args.no_cache or args.dry_run else ResultCache(work / "correctness_cache.sqlite")
+    try:
+        tasks = build_tasks(args, executor, cache)
+        if not tasks:
+            print(f"No partitions found under {args.data}")
+            sys.exit(1)
+        pipeline = Pipeline(tasks, work / "manifest.json", args.jobs, args.dry_run)
+        ok = pipeline.run()
+    finally:
+        if executor is not None:
+            executor.close()
+        if cache is not None:
+            cache.close()
+    print("\n" + pipeline.report(time.perf_counter() - t0))
+    if not ok:
+        sys.exit(1)
+    if not args.dry_run and not args.no_analyze:
+        print(f"\nResults: {work / 'results'}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Vectorized bootstrap confidence intervals and permutation tests for analyze.py.
+
+Resamples are drawn as index matrices, a block of resamples at a time, and
+each block is reduced with NumPy array operations instead of a Python loop
+per resample:
+
+  - RQ1/RQ2 (p_high vs correct): every row is mapped once to (class, unique
+    p_high value). A resample then reduces to a (2, n_unique) count matrix,
+    from which Cohen's d, the AUC and Spearman ρ (mid-ranks from cumulative
+    counts) all follow without re-sorting.
+  - Per-model DRI means: row gathers, one group at a time.
+  - Permutation tests (Mann-Whitney U for RQ1, Kruskal-Wallis H for RQ3):
+    the pooled ranks are computed once, and a permutation only re-sums them.
+
+Blocks are sized by data size (about BLOCK_CELLS indices each), and block k
+draws from SeedSequence(seed, test).spawn()[k]. Results therefore depend on
+the seed only, not on `workers`, the number of processes the blocks are
+spread over.
+
+    rs = Resampling(n_boot=10_000, n_perm=10_000, seed=42, workers=4)
+    ci = rs.rq2_intervals(df["p_high"], df["correct"])    # {"auc": (lo, hi), ...}
+"""
+
+from __future__ import annotations
+
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+from scipy.stats import rankdata
+
+BLOCK_CELLS = 1 << 22            # index-matrix entries per block (~32 MiB of int64)
+CI_LEVEL = 0.95
+
+
+# ── blocks and seeds ───────────────────────────────────────────────────────
+
+def _blocks(n_resamples: int, cells_per_resample: int) -> list[int]:
+    size = max(1, min(n_resamples, BLOCK_CELLS // max(cells_per_resample, 1)))
+    return [min(size, n_resamples - lo) for lo in range(0, n_resamples, size)]
+
+
+def _run_blocks(kernel: Callable, data: tuple, n_resamples: int, cells_per_resample: int,
+                seed: int, test: str, workers: int) -> np.ndarray:
+    """kernel(data, rng, size) -> (size, ...) array, over every block, stacked."""
+    sizes = _blocks(n_resamples, cells_per_resample)
+    seeds = np.random.SeedSequence([seed, zlib.crc32(test.encode())]).spawn(len(sizes))
+    jobs = [(kernel, data, s, size) for s, size in zip(seeds, sizes)]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            parts = list(pool.map(_run_block, jobs))
+    else:
+        parts = [_run_block(job) for job in jobs]
+    return np.concatenate(parts)
+
+
+def _run_block(job: tuple) -> np.ndarray:
+    kernel, data, seed_seq, size = job
+    return kernel(data, np.random.default_rng(seed_seq), size)
+
+
+def percentile_ci(samples: np.ndarray, level: float = CI_LEVEL) -> tuple[float, float]:
+    """Percentile interval of the finite bootstrap replicates."""
+    samples = samples[np.isfinite(samples)]
+    if not len(samples):
+        return float("nan"), float("nan")
+    alpha = (1.0 - level) / 2
+    lo, hi = np.quantile(samples, [alpha, 1.0 - alpha])
+    return float(lo), float(hi)
+
+
+# ── RQ1/RQ2: statistics of p_high vs correct from per-value counts ────────
+
+def _class_value_codes(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Per row, code = class * n_unique + index of x among the unique values."""
+    values, uid = np.unique(x, return_inverse=True)
+    return y.astype(np.int64) * len(values) + uid, values
+
+
+def paired_stats(counts: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """(B, 3) Cohen's d (incorrect − correct), AUC and Spearman ρ from
+    (B, 2, U) counts: rows per (class, unique x) in each resample."""
+    neg, pos = counts[:, 0].astype(np.float64), counts[:, 1].astype(np.float64)
+    n0, n1 = neg.sum(1), pos.sum(1)
+    n = n0 + n1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Cohen's d with the pooled sample standard deviation, as analyze.cohens_d
+        m0, m1 = neg @ values / n0, pos @ values / n1
+        ss0 = neg @ values ** 2 - n0 * m0 ** 2
+        ss1 = pos @ values ** 2 - n1 * m1 ** 2
+        pooled = np.sqrt(np.maximum(ss0 + ss1, 0.0) / (n - 2))
+        d = (m0 - m1) / (pooled + 1e-9)
+
+        # AUC of x as a score for correct = P(x_pos > x_neg) + ½ P(tie)
+        below_neg = np.cumsum(neg, axis=1) - neg
+        auc = (pos * (below_neg + 0.5 * neg)).sum(1) / (n0 * n1)
+
+        # Spearman ρ = Pearson correlation of mid-ranks
+        both = neg + pos
+        rank_x = np.cumsum(both, axis=1) - both + (both + 1) / 2
+        rank_y0, rank_y1 = (n0 + 1) / 2, n0 + (n1 + 1) / 2
+        sx, sxx = (both * rank_x).sum(1), (both * rank_x ** 2).sum(1)
+        sy = n0 * rank_y0 + n1 * rank_y1
+        syy = n0 * rank_y0 ** 2 + n1 * rank_y1 ** 2
+        sxy = (neg * rank_x).sum(1) * rank_y0 + (pos * rank_x).sum(1) * rank_y1
+        cov = sxy - sx * sy / n
+        rho = cov / np.sqrt((sxx - sx ** 2 / n) * (syy - sy ** 2 / n))
+    return np.stack([d, auc, rho], axis=1)
+
+
+def _paired_kernel(data: tuple, rng: np.random.Generator, size: int) -> np.ndarray:
+    codes, values = data
+    n, k = len(codes), 2 * len(values)
+    idx = rng.integers(0, n, size=(size, n))
+    flat = codes[idx] + np.arange(size)[:, None] * k
+    counts = np.bincount(flat.ravel(), minlength=size * k).reshape(size, 2, len(values))
+    return paired_stats(counts, values)
+
+
+# ── per-group means ────────────────────────────────────────────────────────
+
+def _mean_kernel(data: tuple, rng: np.random.Generator, size: int) -> np.ndarray:
+    (values,) = data
+    return values[rng.integers(0, len(values), size=(size, len(values)))].mean(axis=1)
+
+
+# ── permutation tests on ranks computed once ───────────────────────────────
+
+def _rank_sum_kernel(data: tuple, rng: np.random.Generator, size: int) -> np.ndarray:
+    """(B, G) rank sums of the groups starting at `starts` after a random
+    relabelling of the pooled ranks."""
+    ranks, starts = data
+    perm = rng.permuted(np.broadcast_to(np.arange(len(ranks)), (size, len(ranks))), axis=1)
+    return np.add.reduceat(ranks[perm], starts, axis=1)
+
+
+@dataclass
+class Resampling:
+    n_boot: int = 10_000
+    n_perm: int = 10_000
+    seed: int = 42
+    workers: int = 1
+    level: float = CI_LEVEL
+
+    def _run(self, kernel, data, n, cells, test):
+        return _run_blocks(kernel, data, n, cells, self.seed, test, self.workers)
+
+    def rq2_intervals(self, p_high, correct) -> dict[str, tuple[float, float]]:
+        """Bootstrap CIs (rows resampled with replacement) of Cohen's d
+        (incorrect vs correct P_High), the AUC of P_High as a score for
+        correct, and Spearman ρ."""
+        codes, values = _class_value_codes(np.asarray(p_high, dtype=np.float64),
+                                           np.asarray(correct, dtype=bool))
+        reps = self._run(_paired_kernel, (codes, values), self.n_boot, len(codes), "rq2")
+        return {name: percentile_ci(reps[:, i], self.level)
+                for i, name in enumerate(("cohens_d", "auc", "spearman"))}
+
+    def mean_intervals(self, groups: dict[str, np.ndarray]) -> dict[str, tuple[float, float]]:
+        """Bootstrap CI of each group's mean."""
+        return {g: percentile_ci(self._run(_mean_kernel, (np.asarray(v, dtype=np.float64),),
+                                           self.n_boot, len(v), f"mean:{g}"), self.level)
+                for g, v in groups.items()}
+
+    def mannwhitney_p(self, a, b) -> float:
+        """Two-sided permutation p-value of Mann-Whitney U between a and b."""
+        a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+        ranks = rankdata(np.concatenate([a, b]))
+        na, nb = len(a), len(b)
+        centre = na * nb / 2
+        observed = abs(ranks[:na].sum() - na * (na + 1) / 2 - centre)
+        sums = self._run(_rank_sum_kernel, (ranks, np.array([0, na])), self.n_perm,
+                         len(ranks), "mannwhitney")[:, 0]
+        extreme = np.abs(sums - na * (na + 1) / 2 - centre) >= observed - 1e-9
+        return float((extreme.sum() + 1) / (self.n_perm + 1))
+
+    def kruskal_p(self, groups: list[np.ndarray]) -> float:
+        """Permutation p-value of the Kruskal-Wallis H statistic."""
+        sizes = np.array([len(g) for g in groups])
+        ranks = rankdata(np.concatenate(groups))
+        n = len(ranks)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        def h(rank_sums: np.ndarray) -> np.ndarray:
+            # The tie correction is the same for every relabelling, so it is left out.
+            return 12.0 / (n * (n + 1)) * (rank_sums ** 2 / sizes).sum(axis=-1) - 3 * (n + 1)
+
+        observed = h(np.add.reduceat(ranks, starts))
+        perm = h(self._run(_rank_sum_kernel, (ranks, starts), self.n_perm, n, "kruskal"))
+        return float(((perm >= observed - 1e-9 * abs(observed)).sum() + 1) / (self.n_perm + 1))
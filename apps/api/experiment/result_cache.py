@@ -0,0 +1,90 @@
+"""
+Persistent (passed, total, status) cache for run_correctness.py.
+
+Entries are keyed by a SHA-256 over:
+  - the solution's normalised AST (`ast.dump`, which drops comments,
+    formatting and line numbers; raw text if it does not parse),
+  - the exact test code, the timeout and the memory limit,
+  - the Python minor version and CACHE_VERSION (bump it whenever the
+    wrapper script or the result parsing changes).
+So a reformatted duplicate reuses the stored result, and any edit to the
+tests misses. Timeouts (machine load) and "infra" results (the harness
+failed, not the solution) are not stored.
+
+Stored in SQLite (one file, WAL mode). One connection is shared by every
+thread that uses the cache, behind a lock, so partitions checked in
+parallel (pipeline.py) can share a cache.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+CACHE_VERSION = 3                # 3: harness failures no longer stored as "error"
+_COMMIT_EVERY = 256
+_UNCACHED = ("timeout", "infra")
+
+
+def normalized_code(code: str) -> str:
+    try:
+        return ast.dump(ast.parse(code))
+    except (SyntaxError, ValueError):
+        return "raw:" + code.strip()
+
+
+def cache_key(code: str, test_code: str, timeout: int, mem_mb: int | None) -> str:
+    h = hashlib.sha256()
+    for part in (f"v{CACHE_VERSION}", f"py{sys.version_info[0]}.{sys.version_info[1]}",
+                 normalized_code(code), test_code, str(timeout), str(mem_mb)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS results ("
+                         "key TEXT PRIMARY KEY, passed INTEGER, total INTEGER, "
+                         "status TEXT, created REAL)")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple[int, int, str] | None:
+        with self._lock:
+            row = self._db.execute("SELECT passed, total, status FROM results WHERE key = ?",
+                                   (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def put(self, key: str, result: tuple[int, int, str]) -> None:
+        if result[2] in _UNCACHED:
+            return
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                             (key, *result, time.time()))
+            self._pending += 1
+            if self._pending >= _COMMIT_EVERY:
+                self._db.commit()
+                self._pending = 0
+
+    def commit(self) -> None:
+        with self._lock:
+            self._db.commit()
+            self._pending = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        self.commit()
+        self._db.close()
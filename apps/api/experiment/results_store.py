@@ -0,0 +1,194 @@
+"""
+Columnar results store for the EvalPlus → DRI pipeline.
+
+One directory, one Arrow IPC file per column group:
+
+    data/results/
+        correctness.arrow   passed, total, pass_ratio, correct        (step 2)
+        code.arrow          code                                      (step 2)
+        readability.arrow   readability_label, p_*, confidence,
+                            identifier_quality_score, feat_*, struct_* (step 3)
+        dri.arrow           dri, dri_tier                             (step 4)
+
+Every group starts with the key columns (model, benchmark, task_id, sample);
+`sample` numbers the solutions of one task, so a model may contribute many
+samples per task. A stage writes only the columns it adds, typed (ints,
+float64, bools; model/benchmark/labels dictionary-encoded), and the code lives
+in its own group so readers that never touch it never page it in.
+
+Files are uncompressed Arrow IPC so `read()` memory-maps them and decodes only
+the requested fields. Groups whose key columns are identical are put side by
+side without copying; otherwise they are inner-joined on the key.
+
+    store = ResultsStore("data/results")
+    store.write_stage("readability", rows)          # list of pipeline dicts
+    df = store.to_pandas(["model", "correct", "p_high", "dri"])
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pyarrow as pa
+
+KEY_COLUMNS = ["model", "benchmark", "task_id", "sample"]
+CORRECTNESS_COLUMNS = ["passed", "total", "pass_ratio", "correct"]
+CODE_COLUMNS = ["code"]
+READABILITY_COLUMNS = ["readability_label", "p_high", "p_medium", "p_low",
+                       "confidence", "identifier_quality_score"]
+DRI_COLUMNS = ["dri", "dri_tier"]
+GROUPS = ["correctness", "code", "readability", "dri"]
+
+_TYPES = {
+    "model": pa.dictionary(pa.int32(), pa.string()),
+    "benchmark": pa.dictionary(pa.int32(), pa.string()),
+    "task_id": pa.string(),
+    "sample": pa.int32(),
+    "passed": pa.int32(),
+    "total": pa.int32(),
+    "pass_ratio": pa.float64(),
+    "correct": pa.bool_(),
+    "code": pa.large_string(),
+    "readability_label": pa.dictionary(pa.int8(), pa.string()),
+    "dri": pa.float64(),
+    "dri_tier": pa.dictionary(pa.int8(), pa.string()),
+}
+
+
+def flatten_record(record: dict) -> dict:
+    """A pipeline record with `features` / `structural` spread into
+    feat_* / struct_* columns (the dri_dataset.csv layout)."""
+    flat = {k: v for k, v in record.items() if k not in ("features", "structural")}
+    for k, v in (record.get("features") or {}).items():
+        flat[f"feat_{k}"] = v
+    for k, v in (record.get("structural") or {}).items():
+        flat[f"struct_{k}"] = v
+    return flat
+
+
+def with_samples(records: list[dict]) -> list[dict]:
+    """Records with a `sample` field: kept if the record has one (written by
+    run_correctness.py), else the record's rank within its task in `records`."""
+    seen: dict[tuple, int] = {}
+    out = []
+    for r in records:
+        if "sample" not in r:
+            key = (r["model"], r["benchmark"], r["task_id"])
+            r = {**r, "sample": seen.get(key, 0)}
+            seen[key] = r["sample"] + 1
+        out.append(r)
+    return out
+
+
+def _stage_columns(stage: str, rows: list[dict]) -> dict[str, list[str]]:
+    """Column groups written by `stage`, given its flattened rows."""
+    if stage == "correctness":
+        return {"correctness": CORRECTNESS_COLUMNS, "code": CODE_COLUMNS}
+    if stage == "readability":
+        extra = sorted({k for r in rows for k in r if k.startswith(("feat_", "struct_"))})
+        return {"readability": READABILITY_COLUMNS + extra}
+    if stage == "dri":
+        return {"dri": DRI_COLUMNS}
+    raise ValueError(f"unknown stage {stage!r}; expected correctness, readability or dri")
+
+
+def _type_of(name: str) -> pa.DataType:
+    return _TYPES.get(name, pa.float64())
+
+
+class ResultsStore:
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def path(self, group: str) -> Path:
+        return self.root / f"{group}.arrow"
+
+    def groups(self) -> list[str]:
+        return [g for g in GROUPS if self.path(g).exists()]
+
+    def schema(self, group: str) -> pa.Schema:
+        return pa.ipc.open_file(pa.memory_map(str(self.path(group)))).schema
+
+    # ── writing ────────────────────────────────────────────────────────────
+
+    def write(self, group: str, table: pa.Table) -> Path:
+        """Replace `group` with `table` (key columns first), atomically.
+        Columns with a fixed type (keys, labels, counts) are cast to it."""
+        missing = [c for c in KEY_COLUMNS if c not in table.column_names]
+        if missing:
+            raise ValueError(f"{group}: missing key columns {missing}")
+        table = table.cast(pa.schema([
+            pa.field(f.name, _TYPES.get(f.name, f.type)) for f in table.schema]))
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(group)
+        tmp = path.with_name(path.name + ".tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, \
+                pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+        return path
+
+    def write_stage(self, stage: str, records: list[dict]) -> list[Path]:
+        """Store the columns `stage` adds, from that stage's output records.
+        Records flagged `readability_error` are left out."""
+        rows = [flatten_record(r) for r in with_samples(records)
+                if not r.get("readability_error")]
+        paths = []
+        for group, columns in _stage_columns(stage, rows).items():
+            arrays = {name: pa.array([r.get(name) for r in rows], type=_type_of(name))
+                      for name in KEY_COLUMNS + columns}
+            paths.append(self.write(group, pa.table(arrays)))
+        return paths
+
+    # ── reading ────────────────────────────────────────────────────────────
+
+    def _read_group(self, group: str, columns: list[str]) -> pa.Table:
+        source = pa.memory_map(str(self.path(group)))
+        schema = pa.ipc.open_file(source).schema
+        fields = [schema.get_field_index(c) for c in KEY_COLUMNS + columns]
+        options = pa.ipc.IpcReadOptions(included_fields=fields, use_threads=False)
+        return pa.ipc.open_file(source, options=options).read_all()
+
+    def read(self, columns: list[str] | None = None) -> pa.Table:
+        """The key columns plus `columns` (default: every stored column),
+        one row per key present in every group that is read."""
+        owner: dict[str, str] = {}
+        for group in self.groups():
+            for name in self.schema(group).names:
+                if name not in KEY_COLUMNS:
+                    owner.setdefault(name, group)
+        wanted = [c for c in (columns or list(owner)) if c not in KEY_COLUMNS]
+        unknown = [c for c in wanted if c not in owner]
+        if unknown:
+            raise KeyError(f"not in the store at {self.root}: {unknown}")
+        by_group: dict[str, list[str]] = {}
+        for c in wanted:
+            by_group.setdefault(owner[c], []).append(c)
+        if not by_group:
+            by_group[self.groups()[0]] = []
+
+        table = None
+        for group, cols in by_group.items():
+            part = self._read_group(group, cols)
+            table = part if table is None else _combine(table, part)
+        return table.select(KEY_COLUMNS + wanted)
+
+    def to_pandas(self, columns: list[str] | None = None):
+        return self.read(columns).to_pandas(split_blocks=True)
+
+
+def _combine(left: pa.Table, right: pa.Table) -> pa.Table:
+    """Columns of `right` appended to `left`, matched on the key."""
+    if left.num_rows == right.num_rows and all(
+            left[c].equals(right[c]) for c in KEY_COLUMNS):
+        for name in right.column_names[len(KEY_COLUMNS):]:
+            left = left.append_column(right.schema.field(name), right[name])
+        return left
+    # Different rows or order: inner join on plain-string keys, left order kept.
+    plain = {"model": pa.string(), "benchmark": pa.string()}
+    left = left.cast(pa.schema([pa.field(f.name, plain.get(f.name, f.type)) for f in left.schema]))
+    right = right.cast(pa.schema([pa.field(f.name, plain.get(f.name, f.type)) for f in right.schema]))
+    left = left.append_column("__row", pa.array(range(left.num_rows), pa.int64()))
+    joined = left.join(right, KEY_COLUMNS, join_type="inner", use_threads=False)
+    return joined.sort_by("__row").drop_columns(["__row"])
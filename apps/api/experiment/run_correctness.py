@@ -3,13 +3,24 @@ Step 2 — Execute each LLM solution against EvalPlus test cases and record
 pass_ratio per sample.
 
 Usage:
-    python run_correctness.py --data data/evalplus --output data/correctness.jsonl
+    python run_correctness.py --data data/evalplus --output data/correctness.jsonl \
+                              --workers 8 --timeout 10 --mem-mb 1024
+
+Solutions run concurrently, each in a child forked from a warm fork server
+(forkserver.py; --executor subprocess starts a fresh interpreter instead),
+capped by rlimits (CPU seconds, address space, file size). Records are
+appended as they finish and put back in solution order at the end of the
+run. Results are cached
+in SQLite by normalised AST + test code (result_cache.py), so duplicate and
+reformatted solutions, and reruns, skip execution. With --store, the
+records also go to the columnar results store (results_store.py).
 
 Output JSONL schema per line:
     {
       "model":      "codellama-34b-python",
       "benchmark":  "humaneval",
       "task_id":    "HumanEval/0",
+      "sample":     0,     # n-th solution of this task from this model
       "code":       "def has_close_elements(...): ...",
       "pass_ratio": 0.0,   # fraction of test cases passed
       "correct":    false  # pass_ratio == 1.0
@@ -19,14 +30,26 @@ Output JSONL schema per line:
 from __future__ import annotations
 
 import argparse
+import ast
 import json
+import os
+import signal
 import subprocess
 import sys
 import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 
 from tqdm import tqdm
 
+import forkserver
+from forkserver import ForkServerPool, ServerExited
+from result_cache import ResultCache, cache_key
+
 
 def load_problems(jsonl_path: Path) -> dict[str, dict]:
     """Load benchmark problems keyed by task_id."""
@@ -38,11 +61,9 @@ def load_problems(jsonl_path: Path) -> dict[str, dict]:
     return problems
 
 
-def load_solutions(solutions_dir: Path, model_name: str, benchmark: str) -> list[dict]:
-    """
-    Load pre-generated solutions for a model from the EvalPlus release format.
-    Tries common file patterns from the release ZIPs.
-    """
+def solution_files(solutions_dir: Path, model_name: str, benchmark: str) -> list[Path]:
+    """Existing candidate solution files for a model, most specific first.
+    Tries common file patterns from the EvalPlus release ZIPs."""
     model_dir = solutions_dir / model_name
     candidates = [
         model_dir / f"{benchmark}.jsonl",
@@ -52,70 +73,155 @@ def load_solutions(solutions_dir: Path, model_name: str, benchmark: str) -> list
     # Also try subdirectory patterns
     for sub in model_dir.glob("**/*.jsonl"):
         candidates.append(sub)
+    return [path for path in candidates if path.exists()]
+
 
-    for path in candidates:
-        if path.exists():
-            records = []
-            with open(path, encoding="utf-8") as f:
-                for line in f:
-                    row = json.loads(line)
-                    records.append(row)
-            if records:
-                print(f"    Loaded {len(records)} solutions from {path.relative_to(solutions_dir.parent)}")
-                return records
+def load_solutions(solutions_dir: Path, model_name: str, benchmark: str) -> list[dict]:
+    """
+    Load pre-generated solutions for a model from the EvalPlus release format:
+    the first non-empty file of `solution_files`.
+    """
+    for path in solution_files(solutions_dir, model_name, benchmark):
+        records = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                records.append(row)
+        if records:
+            print(f"    Loaded {len(records)} solutions from {path.relative_to(solutions_dir.parent)}")
+            return records
     return []
 
 
-def run_tests_sandboxed(code: str, test_code: str, timeout: int = 10) -> tuple[int, int]:
-    """
-    Execute solution + test cases in a subprocess sandbox.
-    Returns (tests_passed, tests_total).
+# Applied by the child itself (first lines of the script), so the pool can
+# use plain threads: preexec_fn is not safe with threads. No-op off POSIX.
+_RLIMIT_PREAMBLE = """\
+try:
+    import resource as __resource__
+    for __limit__, __value__ in ((__resource__.RLIMIT_CPU, {cpu_s}),
+                                 (__resource__.RLIMIT_AS, {mem_bytes}),
+                                 (__resource__.RLIMIT_FSIZE, {fsize_bytes}),
+                                 (__resource__.RLIMIT_CORE, 0)):
+        __resource__.setrlimit(__limit__, (__value__, __value__))
+    del __resource__, __limit__, __value__
+except (ImportError, ValueError, OSError):
+    pass
+"""
+
+DEFAULT_MEM_MB = 1024
+FSIZE_MB = 16
+_SIGXCPU = getattr(signal, "SIGXCPU", None)
+
+
+class _CountAsserts(ast.NodeTransformer):
+    """`assert x` -> count it, run it, count it again if it held.
+
+    Rewrites every Assert at any depth (inside check() functions, helpers,
+    loops), so each executed assert counts once per execution. The counter
+    is a module-global list, so no `global` statement is needed in functions.
     """
-    # Wrap each assert in try/except so we can count partial passes
-    test_lines = test_code.strip().splitlines()
-    wrapped_asserts = []
-    passed_var = "__passed__ = 0\n__total__ = 0\n"
-    for line in test_lines:
-        stripped = line.strip()
-        if stripped.startswith("assert "):
-            indent = len(line) - len(line.lstrip())
-            pad = " " * indent
-            wrapped_asserts.append(
-                f"{pad}__total__ += 1\n"
-                f"{pad}try:\n"
-                f"{pad}    {stripped}\n"
-                f"{pad}    __passed__ += 1\n"
-                f"{pad}except Exception:\n"
-                f"{pad}    pass\n"
-            )
-        else:
-            wrapped_asserts.append(line + "\n")
 
-    full_script = (
-        passed_var
+    def visit_Assert(self, node: ast.Assert) -> list[ast.stmt]:
+        total, passed = ast.parse(f"{_COUNTER}[1] += 1\n{_COUNTER}[0] += 1").body
+        handler = ast.ExceptHandler(type=ast.Name("Exception", ast.Load()), name=None,
+                                    body=[ast.Pass()])
+        return [total, ast.Try(body=[node, passed], handlers=[handler], orelse=[], finalbody=[])]
+
+
+_COUNTER = "__iraf_counter__"            # [passed, total]
+
+
+@lru_cache(maxsize=4096)
+def instrument_tests(test_code: str) -> str:
+    """Test code with every assert counted (see _CountAsserts), as source.
+
+    An error outside an assert ends the tests but keeps the counts so far.
+    Cached per distinct test code, i.e. once per problem.
+    """
+    try:
+        tree = _CountAsserts().visit(ast.parse(test_code))
+    except SyntaxError:
+        return test_code
+    guarded = ast.Try(body=tree.body or [ast.Pass()],
+                      handlers=[ast.ExceptHandler(type=ast.Name("Exception", ast.Load()),
+                                                  name=None, body=[ast.Pass()])],
+                      orelse=[], finalbody=[])
+    return ast.unparse(ast.fix_missing_locations(ast.Module(body=[guarded], type_ignores=[])))
+
+
+def build_script(code: str, test_code: str, timeout: int = 10,
+                 mem_mb: int | None = DEFAULT_MEM_MB) -> str:
+    """Solution + instrumented test cases as one script that prints
+    `passed/total`.
+
+    With `mem_mb` set, the script first caps its own CPU time (`timeout`
+    seconds), address space, file size and core dumps via rlimits.
+    """
+    preamble = "" if mem_mb is None else _RLIMIT_PREAMBLE.format(
+        cpu_s=int(timeout) + 1, mem_bytes=mem_mb << 20, fsize_bytes=FSIZE_MB << 20)
+    return (
+        preamble
+        + f"{_COUNTER} = [0, 0]\n"
         + code
         + "\n"
-        + "".join(wrapped_asserts)
-        + "\nprint(f'{__passed__}/{__total__}')\n"
+        + instrument_tests(test_code)
+        + f"\nprint(f'{{{_COUNTER}[0]}}/{{{_COUNTER}[1]}}')\n"
     )
 
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py",
-                                     delete=False, encoding="utf-8") as tmp:
-        tmp.write(full_script)
-        tmp_path = tmp.name
 
+def _parse_result(stdout: str, stderr: str, returncode: int | None) -> tuple[int, int, str]:
+    """(passed, total, status) from a finished script; returncode None = timed out."""
+    if returncode is None or (_SIGXCPU is not None and returncode == -_SIGXCPU):
+        return 0, 0, "timeout"
     try:
-        result = subprocess.run(
-            [sys.executable, tmp_path],
-            capture_output=True, text=True, timeout=timeout
-        )
-        last_line = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else "0/0"
+        last_line = stdout.strip().splitlines()[-1] if stdout.strip() else "0/0"
         passed, total = map(int, last_line.split("/"))
-        return passed, total
-    except (subprocess.TimeoutExpired, ValueError, IndexError):
-        return 0, 0
-    finally:
-        Path(tmp_path).unlink(missing_ok=True)
+    except ValueError:
+        passed, total = 0, 0
+    if returncode != 0 and total == 0:
+        return 0, 0, "memory" if "MemoryError" in stderr else "error"
+    return passed, total, "ok"
+
+
+def run_script(script: str, timeout: int = 10,
+               executor: ForkServerPool | None = None) -> tuple[int, int, str]:
+    """Run a `build_script` script in its own temporary working directory:
+    forked from a warm fork server when `executor` is given, else in a
+    fresh interpreter.
+
+    Returns (tests_passed, tests_total, status) with status one of
+    "ok", "timeout" (wall clock or CPU rlimit), "memory", "error", or
+    "infra" when the harness itself failed (fork server died, no process
+    could be started) and the solution's outcome is unknown.
+    """
+    if executor is not None:
+        try:
+            return _parse_result(*executor.run(script, timeout))
+        except ServerExited:
+            return 0, 0, "infra"
+    with tempfile.TemporaryDirectory(prefix="iraf_sandbox_") as work:
+        path = Path(work) / "solution.py"
+        path.write_text(script, encoding="utf-8")
+        try:
+            result = subprocess.run(
+                [sys.executable, str(path)], cwd=work,
+                capture_output=True, text=True, timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return 0, 0, "timeout"
+        except OSError:
+            return 0, 0, "infra"
+    return _parse_result(result.stdout, result.stderr, result.returncode)
+
+
+def run_tests_sandboxed(code: str, test_code: str, timeout: int = 10,
+                        mem_mb: int | None = DEFAULT_MEM_MB) -> tuple[int, int]:
+    """
+    Execute solution + test cases in a subprocess sandbox.
+    Returns (tests_passed, tests_total).
+    """
+    passed, total, _ = run_script(build_script(code, test_code, timeout, mem_mb), timeout)
+    return passed, total
 
 
 def get_test_code(problem: dict) -> str:
@@ -132,6 +238,29 @@ def get_test_code(problem: dict) -> str:
     return ""
 
 
+@dataclass
+class RunStats:
+    """Throughput and failure counts for one model/benchmark pair."""
+    model: str
+    benchmark: str
+    records: int = 0
+    seconds: float = 0.0
+    status: Counter = field(default_factory=Counter)   # ok / timeout / memory / error / infra
+    executed: int = 0                 # solutions actually run
+    cached: int = 0                   # records answered from the result cache
+    duplicates: int = 0               # records sharing an execution within this pair
+
+    @property
+    def per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.records} records in {self.seconds:.1f}s ({self.per_second:.1f}/s), "
+                f"{self.executed} executed, {self.cached} cached, {self.duplicates} duplicates, "
+                f"{self.status['timeout']} timeouts, {self.status['memory']} out of memory, "
+                f"{self.status['error']} errors, {self.status['infra']} harness failures")
+
+
 def process_model(
     model_name: str,
     benchmark: str,
@@ -139,65 +268,133 @@ def process_model(
     solutions_dir: Path,
     output_path: Path,
     timeout: int = 10,
-) -> int:
-    """Process all solutions for one model/benchmark pair. Returns record count."""
+    workers: int | None = None,
+    mem_mb: int | None = DEFAULT_MEM_MB,
+    executor: ForkServerPool | None = None,
+    cache: ResultCache | None = None,
+) -> tuple[RunStats, list[str]]:
+    """Process all solutions for one model/benchmark pair.
+
+    Solutions run concurrently on `workers` sandboxes (default: one per CPU),
+    forked from `executor` when given. Solutions with the same cache key
+    (normalised AST, tests, limits) run once, and results already in `cache`
+    are not run at all. Each record is appended to `output_path` as soon as it finishes, so an
+    interrupted run keeps its results. Returns the stats and the JSONL lines
+    in solution order, for the final sort in `main`.
+    """
+    stats = RunStats(model_name, benchmark)
     solutions = load_solutions(solutions_dir, model_name, benchmark)
     if not solutions:
         print(f"  [warn] No solutions found for {model_name}/{benchmark}, skipping")
-        return 0
-
-    count = 0
-    with open(output_path, "a", encoding="utf-8") as out_f:
-        for sol in tqdm(solutions, desc=f"{model_name[:20]}/{benchmark}", leave=False):
-            task_id = sol.get("task_id", "")
-            # EvalPlus solutions may have a 'completion' or 'solution' key
-            code = sol.get("completion", sol.get("solution", sol.get("code", "")))
-            if not task_id or not code:
-                continue
-
-            problem = problems.get(task_id)
-            if not problem:
-                continue
-
-            # Build full function: prompt + completion (HumanEval format)
-            prompt = problem.get("prompt", "")
-            full_code = prompt + code if prompt else code
-
-            test_code = get_test_code(problem)
-            if not test_code:
-                continue
-
-            passed, total = run_tests_sandboxed(full_code, test_code, timeout)
-            pass_ratio = round(passed / max(total, 1), 4)
+        return stats, []
+
+    jobs: list[dict] = []
+    scripts: dict[str, str] = {}                  # cache key -> script, first occurrence
+    keys: list[str] = []
+    samples: Counter = Counter()
+    for sol in solutions:
+        task_id = sol.get("task_id", "")
+        # EvalPlus solutions may have a 'completion' or 'solution' key
+        code = sol.get("completion", sol.get("solution", sol.get("code", "")))
+        if not task_id or not code:
+            continue
 
-            record = {
-                "model":      model_name,
-                "benchmark":  benchmark,
-                "task_id":    task_id,
-                "code":       full_code.strip(),
-                "passed":     passed,
-                "total":      total,
-                "pass_ratio": pass_ratio,
-                "correct":    pass_ratio == 1.0,
-            }
-            out_f.write(json.dumps(record) + "\n")
-            count += 1
+        problem = problems.get(task_id)
+        if not problem:
+            continue
 
-    return count
+        # Build full function: prompt + completion (HumanEval format)
+        prompt = problem.get("prompt", "")
+        full_code = prompt + code if prompt else code
+
+        test_code = get_test_code(problem)
+        if not test_code:
+            continue
+        key = cache_key(full_code, test_code, timeout, mem_mb)
+        if key not in scripts:
+            scripts[key] = build_script(full_code, test_code, timeout, mem_mb)
+        jobs.append({"model": model_name, "benchmark": benchmark, "task_id": task_id,
+                     "sample": samples[task_id], "code": full_code.strip()})
+        samples[task_id] += 1
+        keys.append(key)
+
+    by_key: dict[str, list[int]] = {}
+    for i, key in enumerate(keys):
+        by_key.setdefault(key, []).append(i)
+    lines: list[str] = [""] * len(jobs)
+    t0 = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as out_f, \
+            ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool, \
+            tqdm(total=len(jobs), desc=f"{model_name[:20]}/{benchmark}", leave=False) as bar:
+
+        def emit(key: str, result: tuple[int, int, str]) -> None:
+            passed, total, status = result
+            pass_ratio = round(passed / max(total, 1), 4)
+            for i in by_key[key]:
+                record = {
+                    **jobs[i],
+                    "passed":     passed,
+                    "total":      total,
+                    "pass_ratio": pass_ratio,
+                    "correct":    pass_ratio == 1.0,
+                }
+                lines[i] = json.dumps(record) + "\n"
+                out_f.write(lines[i])
+                stats.status[status] += 1
+            out_f.flush()
+            bar.update(len(by_key[key]))
+
+        futures = {}
+        for key, idx in by_key.items():
+            hit = cache.get(key) if cache is not None else None
+            if hit is not None:
+                stats.cached += len(idx)
+                emit(key, hit)
+            else:
+                stats.executed += 1
+                stats.duplicates += len(idx) - 1
+                futures[pool.submit(run_script, scripts[key], timeout, executor)] = key
+        for fut in as_completed(futures):
+            key = futures[fut]
+            result = fut.result()
+            if cache is not None:
+                cache.put(key, result)
+            emit(key, result)
+    if cache is not None:
+        cache.commit()
+    stats.records = len(jobs)
+    stats.seconds = time.perf_counter() - t0
+    return stats, lines
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Run EvalPlus correctness evaluation")
     parser.add_argument("--data", default="data/evalplus")
     parser.add_argument("--output", default="data/correctness.jsonl")
-    parser.add_argument("--timeout", type=int, default=10)
+    parser.add_argument("--timeout", type=int, default=10,
+                        help="Wall-clock (and CPU) seconds per solution")
     parser.add_argument("--benchmarks", nargs="+", default=["humaneval", "mbpp"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Solutions executed concurrently")
+    parser.add_argument("--executor", choices=["fork", "subprocess"],
+                        default="fork" if forkserver.available() else "subprocess",
+                        help="fork: warm fork servers (POSIX); subprocess: fresh interpreter each")
+    parser.add_argument("--mem-mb", type=int, default=DEFAULT_MEM_MB,
+                        help="Address-space limit per solution (0 = no rlimits)")
+    parser.add_argument("--cache", default=None,
+                        help="Result cache (default: correctness_cache.sqlite next to --output)")
+    parser.add_argument("--no-cache", action="store_true", help="Re-execute every solution")
+    parser.add_argument("--store", default=None,
+                        help="Also write the correctness + code columns to this results store")
     args = parser.parse_args()
 
     data_dir   = Path(args.data)
     sol_dir    = data_dir / "solutions"
     out_path   = Path(args.output)
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    mem_mb     = args.mem_mb or None
+    cache = None if args.no_cache else ResultCache(
+        Path(args.cache) if args.cache else out_path.parent / "correctness_cache.sqlite")
 
     problem_files = {
         "humaneval": data_dir / "humaneval_plus.jsonl",
@@ -209,20 +406,51 @@ def main() -> None:
         print(f"No solution directories found in {sol_dir}")
         sys.exit(1)
 
-    total = 0
+    # Records stream in completion order; this run's part of the file is
+    # rewritten in (benchmark, model, solution) order once everything finished.
+    run_start = out_path.stat().st_size if out_path.exists() else 0
+    ordered: list[str] = []
+    all_stats: list[RunStats] = []
+    executor = ForkServerPool(args.workers) if args.executor == "fork" else None
     for benchmark in args.benchmarks:
         pfile = problem_files.get(benchmark)
         if not pfile or not pfile.exists():
             print(f"[warn] Problem file not found for {benchmark}: {pfile}")
             continue
         problems = load_problems(pfile)
-        print(f"\n=== {benchmark.upper()} — {len(problems)} problems ===")
+        print(f"\n=== {benchmark.upper()} — {len(problems)} problems, "
+              f"{args.workers} {args.executor} workers ===")
         for model in models:
-            n = process_model(model, benchmark, problems, sol_dir, out_path, args.timeout)
-            print(f"  {model}: {n} records written")
-            total += n
-
-    print(f"\nTotal records: {total}")
+            stats, lines = process_model(model, benchmark, problems, sol_dir, out_path,
+                                         args.timeout, args.workers, mem_mb, executor, cache)
+            print(f"  {model}: {stats.summary()}")
+            ordered += lines
+            all_stats.append(stats)
+    if executor is not None:
+        executor.close()
+    if cache is not None:
+        cache.close()
+
+    # "a+" also creates the file when no pair wrote any output.
+    with open(out_path, "a+", encoding="utf-8") as f:
+        f.truncate(run_start)
+        f.writelines(ordered)
+    if args.store:
+        from results_store import ResultsStore
+        with open(out_path, encoding="utf-8") as f:
+            ResultsStore(args.store).write_stage("correctness", [json.loads(l) for l in f if l.strip()])
+
+    total = sum(s.records for s in all_stats)
+    seconds = sum(s.seconds for s in all_stats)
+    print(f"\n{'model':<32}{'benchmark':<11}{'records':>8}{'sol/s':>8}{'executed':>9}"
+          f"{'cached':>8}{'dupes':>7}{'timeouts':>10}{'oom':>6}{'errors':>8}{'infra':>7}")
+    for s in all_stats:
+        print(f"{s.model[:31]:<32}{s.benchmark:<11}{s.records:>8}{s.per_second:>8.1f}"
+              f"{s.executed:>9}{s.cached:>8}{s.duplicates:>7}"
+              f"{s.status['timeout']:>10}{s.status['memory']:>6}{s.status['error']:>8}{s.status['infra']:>7}")
+    print(f"\nTotal records: {total}" + (f" ({total / seconds:.1f}/s)" if seconds else "")
+          + f", {sum(s.executed for s in all_stats)} executed, "
+          f"{sum(s.cached + s.duplicates for s in all_stats)} reused")
     print(f"Output: {out_path}")
     print(f"\nNext: python score_readability.py --input {out_path}")
 
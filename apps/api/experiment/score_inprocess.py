@@ -0,0 +1,104 @@
+"""
+Steps 3 + 4 in one process — score every sample with IRAF-XADL directly
+(src/inference.py) and write the DRI dataset, without starting api.py.
+
+Usage:
+    python score_inprocess.py --input data/correctness.jsonl \
+                               --output data/dri_dataset.jsonl \
+                               --readability-output data/readability.jsonl
+
+Loads the same checkpoint as the API (split safetensors/JSON if converted)
+and scores --batch-size samples per forward pass. Every readability field
+equals what score_readability.py gets from /batch: the API's rounding and
+merge()'s feature averaging are applied in the same order. Serve-time
+settings have to match: pass --lexicon / --domain when the API runs with
+LEXICON_PATH / FEATURE_DOMAIN.
+
+Writes the DRI dataset (JSONL + CSV, as compute_dri.py) and, optionally,
+the intermediate readability JSONL and the readability + dri columns of a
+results store (--store, results_store.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from tqdm import tqdm
+
+API_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(API_DIR))
+
+from compute_dri import compute, write_dataset
+from score_readability import load_records
+
+from src.features import use_lexicon
+from src.inference import IrafScorer
+from src.lexicon import Lexicon
+
+BATCH_SIZE = 64
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score readability + DRI in-process")
+    parser.add_argument("--input",  default="data/correctness.jsonl")
+    parser.add_argument("--output", default="data/dri_dataset.jsonl")
+    parser.add_argument("--readability-output", default=None,
+                        help="Also write the step-3 readability JSONL here")
+    parser.add_argument("--checkpoint", default=str(API_DIR / "artifacts/iraf_xadl_augmented.pt"))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--lexicon", default=None, help="Same as the API's LEXICON_PATH")
+    parser.add_argument("--domain", default=None, help="Same as the API's FEATURE_DOMAIN")
+    parser.add_argument("--store", default=None,
+                        help="Also write the readability + dri columns to this results store")
+    parser.add_argument("--no-codebert", action="store_true", help="Hash embedder (tests only)")
+    args = parser.parse_args()
+
+    if args.lexicon:
+        use_lexicon(Lexicon.open(args.lexicon))
+    domain = None if args.domain in {None, "", "auto"} else args.domain
+
+    from src.embeddings import Embedder
+    scorer = IrafScorer.load(args.checkpoint, Embedder(use_codebert=not args.no_codebert))
+    print(f"Loaded {args.checkpoint} ({scorer.embedder.name})")
+
+    records = load_records(Path(args.input))
+    print(f"Scoring {len(records)} records from {args.input} ...")
+    t0 = time.perf_counter()
+    rows: list[dict] = []
+    for lo in tqdm(range(0, len(records), args.batch_size), desc="Scoring batches"):
+        part = records[lo:lo + args.batch_size]
+        cols = scorer.readability_columns([r["code"] for r in part], domain=domain,
+                                          batch_size=args.batch_size)
+        rows += [{**r, **c} if c is not None else {**r, "readability_error": True}
+                 for r, c in zip(part, cols)]
+    seconds = time.perf_counter() - t0
+    errors = sum(1 for r in rows if r.get("readability_error"))
+    print(f"\nScored: {len(rows) - errors}  Errors: {errors}  "
+          f"({len(rows) / max(seconds, 1e-9):.1f} samples/s)")
+
+    if args.readability_output:
+        path = Path(args.readability_output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+        print(f"Readability: {path}")
+
+    out_path = Path(args.output)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    enriched = [compute(r) for r in rows if not r.get("readability_error")]
+    write_dataset(enriched, out_path)
+    if args.store:
+        from results_store import ResultsStore
+        store = ResultsStore(args.store)
+        store.write_stage("readability", enriched)
+        store.write_stage("dri", enriched)
+        print(f"Store: {args.store}")
+
+
+if __name__ == "__main__":
+    main()
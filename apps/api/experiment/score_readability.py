@@ -5,7 +5,18 @@ Usage:
     # Start the API first:  python ../api.py
     python score_readability.py --input data/correctness.jsonl \
                                  --output data/readability.jsonl \
-                                 --api http://localhost:8000
+                                 --api http://localhost:8000 \
+                                 --concurrency 4 --resume
+
+Keeps `--concurrency` /batch requests in flight over pooled keep-alive
+connections. Each batch is sized so it answers in about --target-latency
+seconds, measured from recent batches. Scoring starts once /health/ready
+answers 200. The client backs off on 429 and 503 (it honours Retry-After)
+and splits batches rejected with 413. Output is written
+in input order (or as batches finish, with --unordered). Every written
+record's key also goes to `<output>.idx`, so --resume reads keys only.
+--store also writes the readability columns to a results store
+(results_store.py).
 
 Output JSONL schema per line (correctness record + readability fields):
     {
@@ -23,17 +34,22 @@ Output JSONL schema per line (correctness record + readability fields):
 from __future__ import annotations
 
 import argparse
+import asyncio
 import json
 import sys
 import time
 from pathlib import Path
 
-import requests
+import httpx
 from tqdm import tqdm
 
-BATCH_SIZE = 50        # samples per /batch call
+BATCH_SIZE = 50        # initial samples per /batch call
+MAX_BATCH_SIZE = 100   # the API's ADMISSION_MAX_BATCH_SAMPLES default
+TARGET_LATENCY = 5.0   # seconds per /batch call the sizer aims for
+CONCURRENCY = 4        # /batch calls in flight
 RETRY_LIMIT = 3
 RETRY_DELAY = 2.0
+READY_TIMEOUT = 600.0  # seconds to wait for /health/ready before giving up
 
 
 def load_records(path: Path) -> list[dict]:
@@ -46,21 +62,123 @@ def load_records(path: Path) -> list[dict]:
     return records
 
 
-def score_batch(samples: list[dict], api_url: str) -> list[dict | None]:
+def record_key(record: dict) -> str:
+    return f"{record['model']}:{record['task_id']}"
+
+
+def index_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.name + ".idx")
+
+
+def load_done_keys(out_path: Path) -> set[str]:
+    """Keys already scored, read from the sidecar index (built once from the
+    output if an older run left none)."""
+    idx = index_path(out_path)
+    if not idx.exists():
+        if not out_path.exists():
+            return set()
+        keys = [record_key(r) for r in load_records(out_path)]
+        idx.write_text("".join(k + "\n" for k in keys), encoding="utf-8")
+        return set(keys)
+    with open(idx, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+class BatchSizer:
+    """Samples per /batch call, steered towards a target latency.
+
+    Per-sample latency is an EWMA over finished batches; the next size is the
+    number of samples that fits the target at that rate. A 429 halves the
+    size immediately; a 413 also lowers the ceiling for the rest of the run.
+    """
+
+    def __init__(self, size: int, max_size: int, target_s: float) -> None:
+        self.size = max(1, min(size, max_size))
+        self.max_size = max_size
+        self.target_s = target_s
+        self._per_sample: float | None = None
+
+    def observe(self, n: int, seconds: float) -> None:
+        rate = seconds / max(n, 1)
+        self._per_sample = rate if self._per_sample is None else 0.7 * self._per_sample + 0.3 * rate
+        ideal = self.target_s / max(self._per_sample, 1e-6)
+        # Grow by at most 2x per batch so one fast batch cannot overshoot.
+        self.size = max(1, min(self.max_size, int(ideal), self.size * 2))
+
+    def shed(self) -> None:
+        self.size = max(1, self.size // 2)
+
+    def cap(self, max_size: int) -> None:
+        """The server rejected a batch as too large (413): never exceed `max_size` again."""
+        self.max_size = max(1, min(self.max_size, max_size))
+        self.size = min(self.size, self.max_size)
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.throttled = 0     # 429 answers
+        self.unavailable = 0   # 503 answers (models not loaded / warming up)
+        self.split = 0         # batches split after 413
+        self.failed = 0        # batches given up after RETRY_LIMIT
+
+
+async def score_batch(client: httpx.AsyncClient, samples: list[dict], sizer: BatchSizer,
+                      stats: Stats) -> list[dict | None]:
     """POST a batch to /batch; returns list of prediction dicts (or None on failure)."""
     payload = {"samples": [{"code": s["code"], "language": "python"} for s in samples]}
-    for attempt in range(RETRY_LIMIT):
+    attempt = 0
+    while True:
+        t0 = time.perf_counter()
         try:
-            resp = requests.post(f"{api_url}/batch", json=payload, timeout=120)
+            stats.requests += 1
+            resp = await client.post("/batch", json=payload)
+            if resp.status_code == 429:
+                # Load shedding is not a failure: wait as told and try again.
+                stats.throttled += 1
+                sizer.shed()
+                await asyncio.sleep(float(resp.headers.get("Retry-After", RETRY_DELAY)))
+                continue
+            if resp.status_code == 503:
+                # Not ready (yet, or again): nothing wrong with the batch either.
+                stats.unavailable += 1
+                await asyncio.sleep(float(resp.headers.get("Retry-After", RETRY_DELAY)))
+                continue
+            if resp.status_code == 413 and len(samples) > 1:
+                stats.split += 1
+                mid = len(samples) // 2
+                sizer.cap(mid)
+                return (await score_batch(client, samples[:mid], sizer, stats)
+                        + await score_batch(client, samples[mid:], sizer, stats))
             resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            if attempt < RETRY_LIMIT - 1:
-                time.sleep(RETRY_DELAY * (attempt + 1))
-            else:
-                print(f"\n  [error] Batch failed after {RETRY_LIMIT} attempts: {e}")
+            predictions = resp.json()
+            sizer.observe(len(samples), time.perf_counter() - t0)
+            return predictions
+        except (httpx.HTTPError, ValueError) as e:
+            attempt += 1
+            if attempt >= RETRY_LIMIT:
+                stats.failed += 1
+                tqdm.write(f"  [error] Batch failed after {RETRY_LIMIT} attempts: {e}")
                 return [None] * len(samples)
-    return [None] * len(samples)
+            await asyncio.sleep(RETRY_DELAY * attempt)
+
+
+def wait_ready(api: str, timeout: float = READY_TIMEOUT) -> dict:
+    """Poll /health/ready until it answers 200 (every checkpoint loaded and
+    warmed up); /health alone answers 200 as soon as the process is up."""
+    deadline = time.monotonic() + timeout
+    waiting = False
+    while True:
+        resp = httpx.get(f"{api}/health/ready", timeout=10)
+        if resp.status_code != 503:
+            resp.raise_for_status()
+            return resp.json()
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"not ready after {timeout:.0f}s: {resp.text}")
+        if not waiting:
+            print("API is up, waiting for the models to load ...")
+            waiting = True
+        time.sleep(RETRY_DELAY)
 
 
 def merge(record: dict, prediction: dict | None) -> dict:
@@ -90,21 +208,80 @@ def merge(record: dict, prediction: dict | None) -> dict:
     }
 
 
+async def score_all(records: list[dict], args, out_f, idx_f) -> tuple[int, int, Stats, BatchSizer]:
+    """Score `records` with up to `args.concurrency` batches in flight,
+    writing merged rows in input order (or completion order if unordered)."""
+    stats = Stats()
+    sizer = BatchSizer(args.batch_size, args.max_batch_size, args.target_latency)
+    limits = httpx.Limits(max_connections=args.concurrency,
+                          max_keepalive_connections=args.concurrency)
+    scored = errors = 0
+    ready: dict[int, list[tuple[dict, dict | None]]] = {}   # batch start -> rows (ordered mode)
+    next_start = 0
+
+    def write(rows: list[tuple[dict, dict | None]]) -> None:
+        nonlocal scored, errors
+        for record, pred in rows:
+            out_f.write(json.dumps(merge(record, pred)) + "\n")
+            idx_f.write(record_key(record) + "\n")
+            if pred is None:
+                errors += 1
+            else:
+                scored += 1
+        out_f.flush()
+        idx_f.flush()
+
+    async with httpx.AsyncClient(base_url=args.api, timeout=120, limits=limits) as client:
+        pos = 0
+        pending: dict[asyncio.Task, int] = {}
+        with tqdm(total=len(records), desc="Scoring") as bar:
+            while pos < len(records) or pending:
+                while pos < len(records) and len(pending) < args.concurrency:
+                    batch = records[pos:pos + sizer.size]
+                    pending[asyncio.create_task(score_batch(client, batch, sizer, stats))] = pos
+                    pos += len(batch)
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    start = pending.pop(task)
+                    predictions = task.result()
+                    rows = list(zip(records[start:start + len(predictions)], predictions))
+                    bar.update(len(rows))
+                    if args.unordered:
+                        write(rows)
+                        continue
+                    ready[start] = rows
+                    while next_start in ready:
+                        rows = ready.pop(next_start)
+                        write(rows)
+                        next_start += len(rows)
+    return scored, errors, stats, sizer
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Score code samples with IRAF-XADL")
     parser.add_argument("--input",  default="data/correctness.jsonl")
     parser.add_argument("--output", default="data/readability.jsonl")
     parser.add_argument("--api",    default="http://localhost:8000")
-    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="Initial samples per /batch call (then adapted)")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--target-latency", type=float, default=TARGET_LATENCY,
+                        help="Seconds per /batch call the batch size is tuned for")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="/batch calls in flight")
+    parser.add_argument("--unordered", action="store_true",
+                        help="Write rows as batches finish instead of in input order")
     parser.add_argument("--resume", action="store_true",
                         help="Skip task_ids already present in output file")
+    parser.add_argument("--store", default=None,
+                        help="Also write the readability columns to this results store")
+    parser.add_argument("--ready-timeout", type=float, default=READY_TIMEOUT,
+                        help="Seconds to wait for /health/ready")
     args = parser.parse_args()
 
-    # Health check
+    # Readiness gate
     try:
-        resp = requests.get(f"{args.api}/health", timeout=10)
-        resp.raise_for_status()
-        print(f"API healthy: {resp.json()}")
+        print(f"API ready: {wait_ready(args.api, args.ready_timeout)}")
     except Exception as e:
         print(f"Cannot reach API at {args.api}: {e}")
         print("Start the API with:  python ../api.py")
@@ -114,36 +291,32 @@ def main() -> None:
     print(f"Loaded {len(records)} records from {args.input}")
 
     # Resume support — skip already-scored records
-    done_ids: set[str] = set()
     out_path = Path(args.output)
-    if args.resume and out_path.exists():
-        for row in load_records(out_path):
-            done_ids.add(f"{row['model']}:{row['task_id']}")
+    done_ids = load_done_keys(out_path) if args.resume else set()
+    if done_ids:
         print(f"Resuming — {len(done_ids)} records already scored, skipping")
-    records = [r for r in records
-               if f"{r['model']}:{r['task_id']}" not in done_ids]
+    records = [r for r in records if record_key(r) not in done_ids]
     print(f"Scoring {len(records)} remaining records ...")
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
     mode = "a" if args.resume else "w"
 
-    scored = 0
-    errors = 0
-    with open(out_path, mode, encoding="utf-8") as out_f:
-        batches = [records[i:i + args.batch_size]
-                   for i in range(0, len(records), args.batch_size)]
-        for batch in tqdm(batches, desc="Scoring batches"):
-            predictions = score_batch(batch, args.api)
-            for record, pred in zip(batch, predictions):
-                merged = merge(record, pred)
-                out_f.write(json.dumps(merged) + "\n")
-                if pred is None:
-                    errors += 1
-                else:
-                    scored += 1
-
-    print(f"\nScored: {scored}  Errors: {errors}")
+    t0 = time.perf_counter()
+    with open(out_path, mode, encoding="utf-8") as out_f, \
+            open(index_path(out_path), mode, encoding="utf-8") as idx_f:
+        scored, errors, stats, sizer = asyncio.run(score_all(records, args, out_f, idx_f))
+    seconds = time.perf_counter() - t0
+
+    print(f"\nScored: {scored}  Errors: {errors}  "
+          f"({(scored + errors) / max(seconds, 1e-9):.1f} samples/s, {stats.requests} requests, "
+          f"{stats.throttled} throttled, {stats.unavailable} unavailable, {stats.split} split, final batch size {sizer.size})")
     print(f"Output: {out_path}")
+    if args.store:
+        from results_store import ResultsStore
+        ResultsStore(args.store).write_stage("readability", load_records(out_path))
+        print(f"Store: {args.store}")
+        print(f"\nNext: python compute_dri.py --input {args.store}")
+        return
     print(f"\nNext: python compute_dri.py --input {out_path}")
 
 
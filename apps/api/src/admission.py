@@ -0,0 +1,186 @@
+"""Admission control, per-request deadlines and load shedding for the API.
+
+Scoring cost grows with the number of identifiers (one CodeBERT call each,
+up to MAX_IDS) and with code length (regex/AST passes, token sequence), so
+every request is weighted in *work units* estimated from those two counts
+before any model work starts. The controller admits requests while the
+in-flight units stay under capacity, lets a bounded number wait briefly, and
+sheds the rest with a fast 429 + Retry-After instead of queueing them behind
+minutes of work. Every admitted request carries a `Deadline` that the scoring
+code checks between stages and abandons once it has passed.
+
+All limits are read from the environment (see `.env.example`).
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Iterator
+
+_WORD_RE = re.compile(r"\b[A-Za-z_]\w*\b")
+_MAX_IDS = 50          # mirrors dataset.MAX_IDS without importing pandas here
+
+
+class AdmissionRejected(Exception):
+    """Over capacity — answered with 429 and a Retry-After hint."""
+
+    def __init__(self, retry_after: int, reason: str) -> None:
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class RequestTooLarge(Exception):
+    """Request exceeds a static size limit — answered with 413."""
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before scoring finished — answered with 504."""
+
+
+@dataclass
+class AdmissionLimits:
+    max_code_chars: int = 20_000
+    max_batch_samples: int = 100
+    max_score_files: int = 5000         # /score-identifiers: no model work per file
+    max_file_chars: int = 1_000_000     # /predict-file: one whole source file
+    max_file_chunks: int = 2000         # /predict-file: functions/classes scored per file
+    max_inflight_units: float = 64.0
+    max_queue: int = 16                 # requests allowed to wait for capacity
+    max_queue_wait_s: float = 2.0
+    deadline_s: float = 30.0            # default per-request deadline
+    max_deadline_s: float = 120.0       # cap on client-supplied deadlines
+
+    @classmethod
+    def from_env(cls) -> "AdmissionLimits":
+        env = os.environ.get
+        return cls(
+            max_code_chars=int(env("ADMISSION_MAX_CODE_CHARS", cls.max_code_chars)),
+            max_batch_samples=int(env("ADMISSION_MAX_BATCH_SAMPLES", cls.max_batch_samples)),
+            max_score_files=int(env("ADMISSION_MAX_SCORE_FILES", cls.max_score_files)),
+            max_file_chars=int(env("ADMISSION_MAX_FILE_CHARS", cls.max_file_chars)),
+            max_file_chunks=int(env("ADMISSION_MAX_FILE_CHUNKS", cls.max_file_chunks)),
+            max_inflight_units=float(env("ADMISSION_MAX_INFLIGHT_UNITS", cls.max_inflight_units)),
+            max_queue=int(env("ADMISSION_MAX_QUEUE", cls.max_queue)),
+            max_queue_wait_s=float(env("ADMISSION_MAX_QUEUE_WAIT_S", cls.max_queue_wait_s)),
+            deadline_s=float(env("REQUEST_DEADLINE_S", cls.deadline_s)),
+            max_deadline_s=float(env("REQUEST_MAX_DEADLINE_S", cls.max_deadline_s)),
+        )
+
+
+class Deadline:
+    """Monotonic-clock deadline checked cooperatively between scoring stages."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, seconds: float) -> None:
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def check(self) -> None:
+        if time.monotonic() > self.expires_at:
+            raise DeadlineExceeded("request deadline exceeded")
+
+
+def estimate_cost(code: str, max_ids: int = _MAX_IDS) -> float:
+    """Work units for one sample: 1 base + identifiers/10 + tokens/512.
+
+    Identifiers are approximated by distinct word-like names (capped at
+    `max_ids`, the model's sequence length) and tokens by chars/4, which is
+    cheap enough to run on every request before admission.
+    """
+    n_ids = min(len(set(_WORD_RE.findall(code))), max_ids)
+    return 1.0 + n_ids / 10.0 + len(code) / 2048.0
+
+
+class AdmissionController:
+    """Weighted in-flight limiter with a short bounded wait queue."""
+
+    def __init__(self, limits: AdmissionLimits) -> None:
+        self.limits = limits
+        self.counters: Counter[str] = Counter()
+        self._cond = threading.Condition()
+        self._inflight = 0.0
+        self._waiting = 0
+        self._sec_per_unit = 0.05        # EWMA of observed service time per unit
+
+    # -- static limits -------------------------------------------------------
+    def check_size(self, codes: list[str], max_samples: int | None = None,
+                   max_chars: int | None = None) -> None:
+        lim = self.limits
+        max_samples = lim.max_batch_samples if max_samples is None else max_samples
+        max_chars = lim.max_code_chars if max_chars is None else max_chars
+        if len(codes) > max_samples:
+            self.counters["rejected_size"] += 1
+            raise RequestTooLarge(
+                f"batch has {len(codes)} samples; the limit is {max_samples}")
+        longest = max((len(c) for c in codes), default=0)
+        if longest > max_chars:
+            self.counters["rejected_size"] += 1
+            raise RequestTooLarge(
+                f"code is {longest} characters; the limit is {max_chars}")
+
+    def deadline(self, requested_s: float | None = None) -> Deadline:
+        seconds = self.limits.deadline_s if requested_s is None else requested_s
+        return Deadline(max(0.0, min(seconds, self.limits.max_deadline_s)))
+
+    # -- capacity --------------------------------------------------------------
+    def _retry_after(self, units: float) -> int:
+        backlog = self._inflight + units - self.limits.max_inflight_units
+        return max(1, math.ceil(max(backlog, units) * self._sec_per_unit))
+
+    @contextmanager
+    def admit(self, units: float, deadline: Deadline) -> Iterator[None]:
+        lim = self.limits
+        # A single oversized request may still run — alone.
+        units = min(units, lim.max_inflight_units)
+        with self._cond:
+            if self._inflight + units > lim.max_inflight_units:
+                wait_s = min(lim.max_queue_wait_s, deadline.remaining())
+                if self._waiting >= lim.max_queue or wait_s <= 0:
+                    self.counters["rejected_capacity"] += 1
+                    raise AdmissionRejected(self._retry_after(units), "server at capacity")
+                self.counters["queued"] += 1
+                self._waiting += 1
+                try:
+                    admitted = self._cond.wait_for(
+                        lambda: self._inflight + units <= lim.max_inflight_units, timeout=wait_s)
+                finally:
+                    self._waiting -= 1
+                if not admitted:
+                    self.counters["rejected_queue_timeout"] += 1
+                    raise AdmissionRejected(self._retry_after(units), "timed out waiting for capacity")
+            self._inflight += units
+            self.counters["admitted"] += 1
+
+        start = time.monotonic()
+        try:
+            yield
+        except DeadlineExceeded:
+            self.counters["deadline_exceeded"] += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._inflight -= units
+                self._sec_per_unit = 0.9 * self._sec_per_unit + 0.1 * (elapsed / units)
+                self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "limits": asdict(self.limits),
+                "inflight_units": round(self._inflight, 3),
+                "waiting": self._waiting,
+                "seconds_per_unit": round(self._sec_per_unit, 5),
+                "counters": dict(self.counters),
+            }
@@ -0,0 +1,140 @@
+"""Memory-mapped checkpoint format for fast API cold starts.
+
+`torch.load` unpickles every tensor of a `.pt` checkpoint into freshly
+allocated memory, which is most of the container start-up time once CodeBERT
+is cached locally. The split format written here avoids that:
+
+    <stem>.safetensors  -- the state_dict, opened with mmap (zero-copy)
+    <stem>.json         -- every other checkpoint key (norm_stats, struct_stats,
+                           metrics, struct_dim, max_tokens, labels, ...)
+
+The CodeBERT encoder is exported the same way (`save_pretrained` with
+safetensors) into a local directory that `embeddings.py` prefers over the
+Hugging Face hub name.
+
+`convert_checkpoints.py` writes the files; `api.py`'s lifespan loads them when
+present and falls back to the original `.pt` files otherwise.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+TENSOR_SUFFIX = ".safetensors"
+META_SUFFIX = ".json"
+
+
+def split_paths(stem: str | Path) -> tuple[Path, Path]:
+    """Return the (tensor file, JSON sidecar) pair for a checkpoint stem."""
+    stem = Path(stem)
+    return stem.with_suffix(TENSOR_SUFFIX), stem.with_suffix(META_SUFFIX)
+
+
+def has_split_checkpoint(stem: str | Path) -> bool:
+    tensors, meta = split_paths(stem)
+    return tensors.exists() and meta.exists()
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert numpy / torch scalars and containers into plain JSON types."""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if hasattr(value, "tolist"):          # numpy arrays/scalars, torch tensors
+        return value.tolist()
+    return value
+
+
+def save_split_checkpoint(ckpt: dict, stem: str | Path) -> tuple[Path, Path]:
+    """Write a `{"state_dict": ..., **meta}` checkpoint dict in the split format."""
+    from safetensors.torch import save_file
+
+    tensors_path, meta_path = split_paths(stem)
+    tensors_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # safetensors refuses non-contiguous or storage-sharing tensors.
+    state = {k: v.detach().cpu().contiguous().clone() for k, v in ckpt["state_dict"].items()}
+    save_file(state, str(tensors_path))
+
+    meta = {k: _jsonable(v) for k, v in ckpt.items() if k != "state_dict"}
+    meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return tensors_path, meta_path
+
+
+def convert_pt(pt_path: str | Path, stem: str | Path | None = None) -> tuple[Path, Path]:
+    """Convert a `.pt` checkpoint (as saved by train.py / train_ecrvr.py)."""
+    import torch
+
+    pt_path = Path(pt_path)
+    ckpt = torch.load(pt_path, map_location="cpu")
+    return save_split_checkpoint(ckpt, stem if stem is not None else pt_path.with_suffix(""))
+
+
+def load_split_checkpoint(stem: str | Path) -> dict:
+    """Load a split checkpoint. Tensors stay backed by the mmap'd file."""
+    from safetensors.torch import load_file
+
+    tensors_path, meta_path = split_paths(stem)
+    ckpt = json.loads(meta_path.read_text(encoding="utf-8"))
+    ckpt["state_dict"] = load_file(str(tensors_path), device="cpu")
+    return ckpt
+
+
+def load_checkpoint(pt_path: str | Path) -> dict:
+    """Load `pt_path`, preferring its split sibling (same stem) when one exists."""
+    pt_path = Path(pt_path)
+    stem = pt_path.with_suffix("")
+    if has_split_checkpoint(stem):
+        logger.info("Loading mmap checkpoint: %s", split_paths(stem)[0])
+        return load_split_checkpoint(stem)
+    import torch
+    logger.info("Loading checkpoint: %s", pt_path)
+    return torch.load(pt_path, map_location="cpu")
+
+
+def checkpoint_available(pt_path: str | Path) -> bool:
+    pt_path = Path(pt_path)
+    return pt_path.exists() or has_split_checkpoint(pt_path.with_suffix(""))
+
+
+def checkpoint_version(pt_path: str | Path) -> tuple[str, str]:
+    """(format, short id) of the file `load_checkpoint` would read.
+
+    The id hashes name, size and mtime — cheap, and changes whenever the
+    checkpoint is retrained or re-converted.
+    """
+    import hashlib
+
+    pt_path = Path(pt_path)
+    tensors = split_paths(pt_path.with_suffix(""))[0]
+    path, fmt = (tensors, "safetensors") if has_split_checkpoint(pt_path.with_suffix("")) else (pt_path, "pt")
+    st = path.stat()
+    digest = hashlib.sha1(f"{path.name}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()[:12]
+    return fmt, digest
+
+
+def load_state_dict_zero_copy(model, state_dict: dict) -> None:
+    """`load_state_dict(assign=True)` so parameters alias the mmap'd tensors
+    instead of being copied into the randomly initialised ones. torch < 2.1
+    has no `assign` and gets a regular (copying) load."""
+    try:
+        model.load_state_dict(state_dict, assign=True)
+    except TypeError:
+        model.load_state_dict(state_dict)
+
+
+def export_encoder(out_dir: str | Path, model_name: str) -> Path:
+    """Save the CodeBERT encoder + tokenizer locally as safetensors."""
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+    AutoModel.from_pretrained(model_name).save_pretrained(out_dir, safe_serialization=True)
+    return out_dir
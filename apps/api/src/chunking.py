@@ -0,0 +1,355 @@
+"""Split a whole source file into scoreable chunks (POST /predict-file).
+
+The SA-BiLSTM reads at most MAX_IDS identifiers per sample, so a file is
+scored as its top-level functions and classes, each its own sample:
+
+  Python  ast.parse, one chunk per top-level def / class (decorators
+          included); runs of other module-level statements become
+          "module" chunks. A class with more identifiers than
+          `max_identifiers` is split at its methods instead, and a function,
+          method or module run with more is cut into consecutive windows of
+          whole statements ("name[1/3]", ...) holding at most that many, so
+          they are not silently truncated. Only a single statement with more
+          identifiers than the limit still is. Unparseable files fall back
+          to a line scan for column-0 `def` / `class`.
+  C++     the `preprocess` lexer; one chunk per top-level brace body
+          (functions, classes; namespaces and `extern "C"` are
+          transparent), with the declarations between them as "module"
+          chunks.
+
+Each line belongs to at most one chunk and every step is a single pass, so
+splitting stays linear in file size. Chunks carry their (unnormalised)
+identifiers so callers do not extract twice.
+"""
+
+from __future__ import annotations
+
+import ast
+import re
+import textwrap
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .preprocess import (Identifier, _cpp_tokens, _PyIdentifierVisitor, extract_cpp,
+                         extract_python)
+
+_PY_DEF_RE = re.compile(r"(?:async\s+def|def|class)\s+(\w+)")
+
+
+@dataclass
+class Chunk:
+    """One contiguous, independently scored piece of a file."""
+    name: str                # "parse_args", "Parser", "Parser.feed", "<module>"
+    kind: str                # "function" | "class" | "method" | "module"
+    start_line: int          # 1-based, inclusive
+    end_line: int            # 1-based, inclusive
+    code: str
+    identifiers: list[Identifier] = field(default_factory=list)
+
+
+def _line_offsets(code: str) -> list[int]:
+    offsets = [0]
+    pos = code.find("\n")
+    while pos != -1:
+        offsets.append(pos + 1)
+        pos = code.find("\n", pos + 1)
+    return offsets
+
+
+# ============================ Python ===================================
+def _visit(nodes: list[ast.stmt], scope: ast.AST | None = None) -> list[Identifier]:
+    visitor = _PyIdentifierVisitor()
+    if scope is not None:
+        visitor._push_scope(scope)
+    for node in nodes:
+        visitor.visit(node)
+    return visitor.ids
+
+
+def _start(node: ast.stmt) -> int:
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+
+def _windows(counts: list[int], limit: int, first: int = 0) -> list[tuple[int, int]]:
+    """Greedy [a, b) runs of consecutive statements whose identifier counts
+    sum to at most `limit` (`first` of it already used by the first run); a
+    statement over the limit on its own is a run by itself."""
+    runs: list[tuple[int, int]] = []
+    a, used = 0, first
+    for k, n in enumerate(counts):
+        if k > a and used + n > limit:
+            runs.append((a, k))
+            a, used = k, 0
+        used += n
+    runs.append((a, len(counts)))
+    return runs
+
+
+def _split_module_run(run: list[ast.stmt], lines: list[str],
+                      max_identifiers: int | None) -> list[Chunk]:
+    """Module-level statements as one "<module>" chunk, or as windows of at
+    most `max_identifiers` identifiers."""
+    per_stmt = [_visit([stmt]) for stmt in run]
+    counts = [len(ids) for ids in per_stmt]
+    if max_identifiers is None or sum(counts) <= max_identifiers:
+        spans = [(0, len(run))]
+    else:
+        spans = _windows(counts, max_identifiers)
+    chunks = []
+    for k, (a, b) in enumerate(spans):
+        name = "<module>" if len(spans) == 1 else f"<module>[{k + 1}/{len(spans)}]"
+        start, end = _start(run[a]), run[b - 1].end_lineno
+        chunks.append(Chunk(name, "module", start, end, "".join(lines[start - 1:end]),
+                            [i for ids in per_stmt[a:b] for i in ids]))
+    return chunks
+
+
+def _split_function(node: ast.FunctionDef | ast.AsyncFunctionDef, name: str, kind: str,
+                    lines: list[str], max_identifiers: int) -> list[Chunk]:
+    """A function cut into windows of whole body statements: the first keeps
+    the signature (name and parameters count against it), the rest are
+    dedented body code. Identifiers keep their function scope sizes."""
+    per_stmt = [_visit([stmt], node) for stmt in node.body]
+    header = _visit([node])[:-sum(len(ids) for ids in per_stmt) or None]
+    spans = _windows([len(ids) for ids in per_stmt], max_identifiers, len(header))
+    chunks = []
+    for k, (a, b) in enumerate(spans):
+        start = _start(node) if k == 0 else _start(node.body[a])
+        end = node.body[b - 1].end_lineno if b < len(node.body) else node.end_lineno
+        code = "".join(lines[start - 1:end])
+        idents = [i for ids in per_stmt[a:b] for i in ids]
+        if k == 0:
+            idents = header + idents
+            code = textwrap.dedent(code) if kind == "method" else code
+        else:
+            code = textwrap.dedent(code)
+        chunks.append(Chunk(f"{name}[{k + 1}/{len(spans)}]", kind, start, end, code, idents))
+    return chunks
+
+
+def _split_class(node: ast.ClassDef, lines: list[str],
+                 max_identifiers: int | None = None) -> list[Chunk]:
+    """A class cut at its methods: the header (plus leading body statements)
+    and one dedented chunk per method, each keeping the statements that
+    follow it up to the next method. A method that alone has more than
+    `max_identifiers` is cut into windows, its trailing statements kept as
+    a class chunk of their own."""
+    pieces: list[tuple[str, str, int, list[ast.stmt]]] = [(node.name, "class", _start(node), [])]
+    for stmt in node.body:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            pieces.append((f"{node.name}.{stmt.name}", "method", _start(stmt), [stmt]))
+        else:
+            pieces[-1][3].append(stmt)
+    chunks: list[Chunk] = []
+    for k, (name, kind, start, stmts) in enumerate(pieces):
+        end = pieces[k + 1][2] - 1 if k + 1 < len(pieces) else node.end_lineno
+        if kind == "class":
+            idents = [Identifier(node.name, "class", scope_size=max(1, node.end_lineno - node.lineno))]
+            idents += _visit(stmts, node)
+        else:
+            method = _visit(stmts[:1])
+            if max_identifiers is not None and len(method) > max_identifiers and stmts[0].body:
+                chunks += _split_function(stmts[0], name, "method", lines, max_identifiers)
+                if len(stmts) > 1:
+                    rest = _start(stmts[1])
+                    chunks.append(Chunk(node.name, "class", rest, end,
+                                        textwrap.dedent("".join(lines[rest - 1:end])),
+                                        _visit(stmts[1:], node)))
+                continue
+            idents = method + _visit(stmts[1:], node)
+        code = "".join(lines[start - 1:end])
+        chunks.append(Chunk(name, kind, start, end, textwrap.dedent(code) if kind == "method" else code,
+                            idents))
+    return chunks
+
+
+def _split_python_lines(code: str, lines: list[str]) -> list[Chunk]:
+    """Fallback for files that do not parse: cut at column-0 def / class."""
+    starts: list[tuple[int, str, str]] = []
+    for i, line in enumerate(lines):
+        m = _PY_DEF_RE.match(line)
+        if m:
+            j = i
+            while j > 0 and lines[j - 1].startswith("@"):
+                j -= 1
+            kind = "class" if line.startswith("class") else "function"
+            starts.append((j, m.group(1), kind))
+    bounds = [(0, "<module>", "module")] + starts if not starts or starts[0][0] > 0 else starts
+    chunks = []
+    for k, (a, name, kind) in enumerate(bounds):
+        b = bounds[k + 1][0] if k + 1 < len(bounds) else len(lines)
+        text = "".join(lines[a:b])
+        chunks.append(Chunk(name, kind, a + 1, b, text, extract_python(text)))
+    return chunks
+
+
+def split_python(code: str, max_identifiers: int | None = None) -> list[Chunk]:
+    lines = code.splitlines(keepends=True)
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return _split_python_lines(code, lines)
+    chunks: list[Chunk] = []
+    run: list[ast.stmt] = []
+
+    def flush() -> None:
+        if run:
+            chunks.extend(_split_module_run(run, lines, max_identifiers))
+            run.clear()
+
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            run.append(node)
+            continue
+        flush()
+        idents = _visit([node])
+        if (isinstance(node, ast.ClassDef) and max_identifiers is not None
+                and len(idents) > max_identifiers
+                and any(isinstance(s, (ast.FunctionDef, ast.AsyncFunctionDef)) for s in node.body)):
+            chunks += _split_class(node, lines, max_identifiers)
+            continue
+        if (not isinstance(node, ast.ClassDef) and max_identifiers is not None
+                and len(idents) > max_identifiers):
+            chunks += _split_function(node, node.name, "function", lines, max_identifiers)
+            continue
+        start = _start(node)
+        kind = "class" if isinstance(node, ast.ClassDef) else "function"
+        chunks.append(Chunk(node.name, kind, start, node.end_lineno,
+                            "".join(lines[start - 1:node.end_lineno]), idents))
+    flush()
+    return chunks
+
+
+# ============================ C++ ======================================
+def split_cpp(code: str) -> list[Chunk]:
+    offsets = _line_offsets(code)
+
+    def line_of(pos: int) -> int:          # 1-based
+        lo, hi = 0, len(offsets)
+        while lo + 1 < hi:
+            mid = (lo + hi) // 2
+            if offsets[mid] <= pos:
+                lo = mid
+            else:
+                hi = mid
+        return lo + 1
+
+    bodies: list[tuple[int, int, str]] = []      # (start offset, end offset, head text)
+    kinds: list[str] = []                        # "ns" or "body" per open brace
+    depth = 0                                    # open non-namespace braces
+    stmt_start: int | None = None
+    stmt: list[str] = []
+    pending_end: int | None = None
+    for kind, text, pos in _cpp_tokens(code):
+        if pending_end is not None:
+            if text == ";":                      # `class X { ... };`
+                bodies[-1] = (bodies[-1][0], pos + 1, bodies[-1][2])
+                pending_end = None
+                continue
+            pending_end = None
+        if depth == 0:
+            if text == "{":
+                if "namespace" in stmt or (stmt[:1] == ["extern"] and len(stmt) == 2):
+                    kinds.append("ns")
+                    stmt, stmt_start = [], None
+                    continue
+                kinds.append("body")
+                depth = 1
+                if stmt_start is None:
+                    stmt_start = pos
+                bodies.append((stmt_start, -1, " ".join(stmt)))
+                continue
+            if text == "}":
+                if kinds:
+                    kinds.pop()
+                stmt, stmt_start = [], None
+                continue
+            if text == ";":
+                stmt, stmt_start = [], None
+                continue
+            if stmt_start is None:
+                stmt_start = pos
+            stmt.append(text if kind != "str" else '""')
+            continue
+        if text == "{":
+            kinds.append("body")
+            depth += 1
+        elif text == "}":
+            kinds.pop()
+            depth -= 1
+            if depth == 0:
+                bodies[-1] = (bodies[-1][0], pos + 1, bodies[-1][2])
+                pending_end = pos
+                stmt, stmt_start = [], None
+
+    chunks: list[Chunk] = []
+    cursor = 0                                   # end offset of the previous body
+
+    def gap(a: int, b: int) -> None:
+        text = code[a:b]
+        idents = extract_cpp(text) if text.strip() else []
+        if idents:
+            chunks.append(Chunk("<module>", "module", line_of(a + len(text) - len(text.lstrip())),
+                                line_of(max(a, b - 1)), text.strip("\n"), idents))
+
+    for a, b, head in bodies:
+        if b < 0:
+            b = len(code)                        # unterminated body: runs to EOF
+        gap(cursor, a)
+        text = code[a:b]
+        idents = extract_cpp(text)
+        head_words = head.split()
+        tag = next((w for w in head_words if w in ("class", "struct", "union", "enum")), None)
+        kind = "class" if tag and "(" not in head.split(tag, 1)[0] else "function"
+        name = (next((i.raw for i in idents if i.kind == kind), None)
+                or next((i.raw for i in idents), "<anonymous>"))
+        chunks.append(Chunk(name, kind, line_of(a), line_of(b - 1), text, idents))
+        cursor = b
+    gap(cursor, len(code))
+    return chunks
+
+
+# ============================ public API ===============================
+def split_file(code: str, language: str, max_identifiers: int | None = None) -> list[Chunk]:
+    """Chunks of `code` in source order; chunks without identifiers are dropped."""
+    language = language.lower()
+    if language in {"py", "python"}:
+        chunks = split_python(code, max_identifiers)
+    elif language in {"cpp", "c++", "cxx"}:
+        chunks = split_cpp(code)
+    else:
+        raise ValueError(f"Unsupported language: {language}")
+    return [c for c in chunks if c.identifiers]
+
+
+def aggregate(probs: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """File-level class probabilities: the weight-averaged chunk probabilities
+    (weights are chunk line counts, so verdicts count per line of code)."""
+    w = np.asarray(weights, dtype=np.float64)
+    if probs.shape[0] == 0 or w.sum() <= 0:
+        return np.full(probs.shape[1], 1.0 / probs.shape[1])
+    return (w[:, None] * probs).sum(axis=0) / w.sum()
+
+
+if __name__ == "__main__":
+    code = (
+        "import os\n"
+        "LIMIT = 10\n\n"
+        "def load_config(config_path):\n"
+        "    with open(config_path) as handle:\n"
+        "        return handle.read()\n\n"
+        "class ConfigStore:\n"
+        "    default_name = 'app'\n\n"
+        "    def __init__(self, base_dir):\n"
+        "        self.base_dir = base_dir\n\n"
+        "    @property\n"
+        "    def config_file(self):\n"
+        "        file_name = self.default_name + '.cfg'\n"
+        "        return os.path.join(self.base_dir, file_name)\n"
+    )
+    for max_ids in (None, 3):
+        print(f"max_identifiers={max_ids}")
+        for c in split_file(code, "python", max_ids):
+            print(f"  {c.kind:>8} {c.name:<24} lines {c.start_line}-{c.end_line}  "
+                  f"{[i.raw for i in c.identifiers]}")
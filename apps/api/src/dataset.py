@@ -19,6 +19,7 @@ import pandas as pd
 
 from .embeddings import EMBED_DIM, Embedder
 from .features import compute_features, snippet_feature_vector
+from .identifier_batch import IdentifierBatch
 from .preprocess import extract_and_normalise
 
 LABELS = ["Low", "Medium", "High"]
@@ -66,26 +67,32 @@ class CodeReadabilityDataset(_torch_dataset_base()):
         self.embedder = embedder or Embedder(use_codebert=use_codebert)
 
         # Build a corpus-wide token counter so LF feature has real signal.
+        # Identifiers are extracted once and packed into one IdentifierBatch
+        # (interned token ids, flat arrays) for the feature and embedding passes.
+        parsed = [extract_and_normalise(code, language) for code in self.codes]
         self.corpus_counts: Counter[str] = Counter()
-        for code in self.codes:
-            for ident in extract_and_normalise(code, language):
+        for idents in parsed:
+            for ident in idents:
                 self.corpus_counts.update(ident.tokens)
 
         # Pre-compute per-identifier embeddings + features (Paper 1 §3.4).
         # Shape per sample: embed (MAX_IDS, EMBED_DIM), feats (MAX_IDS, FEAT_DIM).
         # Identifiers beyond MAX_IDS are dropped; shorter sequences are zero-padded.
+        batch = IdentifierBatch.from_snippets([idents[:MAX_IDS] for idents in parsed])
+        all_feats = compute_features(batch, self.corpus_counts)
+        all_embeds = self.embedder.encode_identifiers_batch(batch)
         self.embeds: list[np.ndarray] = []
         self.feats: list[np.ndarray] = []
-        for code in self.codes:
-            ids = extract_and_normalise(code, language)[:MAX_IDS]
+        self.n_ids: list[int] = []
+        for j in range(batch.n_snippets):
+            a, b = batch.snippet_bounds(j)
             embed_seq = np.zeros((MAX_IDS, EMBED_DIM), dtype=np.float32)
             feat_seq  = np.zeros((MAX_IDS, FEAT_DIM),  dtype=np.float32)
-            for j, ident in enumerate(ids):
-                embed_seq[j] = self.embedder.encode_identifiers(ident.tokens)
-            if ids:
-                feat_seq[:len(ids)] = compute_features(ids, self.corpus_counts)
+            embed_seq[:b - a] = all_embeds[a:b]
+            feat_seq[:b - a] = all_feats[a:b]
             self.embeds.append(embed_seq)
             self.feats.append(feat_seq)
+            self.n_ids.append(b - a)
 
     def __len__(self) -> int:
         return len(self.codes)
@@ -11,16 +11,29 @@ from __future__ import annotations
 
 import hashlib
 import logging
+import os
+from pathlib import Path
 from typing import Iterable
 
 import numpy as np
 
+from .identifier_batch import IdentifierBatch
+
 logger = logging.getLogger(__name__)
 
 _CODEBERT_MODEL_NAME = "microsoft/codebert-base"
+# Local safetensors export written by `convert_checkpoints.py`; preferred over
+# the hub name so container starts neither download nor unpickle the encoder.
+CODEBERT_LOCAL_DIR = Path(os.environ.get("CODEBERT_PATH", "artifacts/codebert"))
 EMBED_DIM = 768                                   # CodeBERT hidden size
 
 
+def _codebert_source() -> str:
+    if (CODEBERT_LOCAL_DIR / "config.json").exists():
+        return str(CODEBERT_LOCAL_DIR)
+    return _CODEBERT_MODEL_NAME
+
+
 # --------------------------- fallback embedder --------------------------
 class HashEmbedder:
     """Deterministic, zero-dependency fallback that hashes each token to a
@@ -43,6 +56,20 @@ class HashEmbedder:
             return np.zeros(self.dim, dtype=np.float32)
         return np.mean([self._hash_vec(t) for t in tokens], axis=0).astype(np.float32)
 
+    def encode_batch(self, batch: IdentifierBatch) -> np.ndarray:
+        """`encode` of every identifier in a batch -> (N, dim). Each distinct
+        token id is hashed once per call rather than once per occurrence."""
+        uniq, inverse = np.unique(batch.tok_ids, return_inverse=True)
+        vecs = (np.stack([self._hash_vec(batch.token(t)) for t in uniq.tolist()])
+                if len(uniq) else np.zeros((0, self.dim), dtype=np.float32))
+        out = np.zeros((len(batch), self.dim), dtype=np.float32)
+        ptr = batch.tok_ptr
+        for i in range(len(batch)):
+            a, b = ptr[i], ptr[i + 1]
+            if b > a:
+                out[i] = np.mean(vecs[inverse[a:b]], axis=0)
+        return out
+
 
 # --------------------------- CodeBERT embedder --------------------------
 class CodeBERTEmbedder:
@@ -61,9 +88,10 @@ class CodeBERTEmbedder:
             return
         import torch
         from transformers import AutoModel, AutoTokenizer
-        logger.info("Loading CodeBERT (%s) ...", _CODEBERT_MODEL_NAME)
-        cls._tokenizer = AutoTokenizer.from_pretrained(_CODEBERT_MODEL_NAME)
-        cls._model = AutoModel.from_pretrained(_CODEBERT_MODEL_NAME)
+        source = _codebert_source()
+        logger.info("Loading CodeBERT (%s) ...", source)
+        cls._tokenizer = AutoTokenizer.from_pretrained(source)
+        cls._model = AutoModel.from_pretrained(source)
         cls._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         cls._model.to(cls._device).eval()
 
@@ -84,6 +112,30 @@ class CodeBERTEmbedder:
             pooled = (summed / counts).squeeze(0).cpu().numpy().astype(np.float32)
             return pooled
 
+    @classmethod
+    def encode_batch(cls, texts: list[str], max_length: int = 50,
+                     batch_size: int = 64) -> np.ndarray:
+        """`encode` for many texts in batched forward passes -> (N, 768).
+
+        Same padding to `max_length` and mask-weighted mean pooling as
+        `encode`, so each row matches the single-text result.
+        """
+        import torch
+        cls._load()
+        out = np.zeros((len(texts), EMBED_DIM), dtype=np.float32)
+        with torch.no_grad():
+            for start in range(0, len(texts), batch_size):
+                inputs = cls._tokenizer(
+                    texts[start:start + batch_size], truncation=True,
+                    padding="max_length", max_length=max_length, return_tensors="pt"
+                ).to(cls._device)
+                outputs = cls._model(**inputs)
+                mask = inputs["attention_mask"].unsqueeze(-1).float()
+                summed = (outputs.last_hidden_state * mask).sum(dim=1)
+                counts = mask.sum(dim=1).clamp(min=1.0)
+                out[start:start + len(summed)] = (summed / counts).cpu().numpy()
+        return out
+
     @classmethod
     def encode_sequence(cls, text: str, max_length: int = 80) -> np.ndarray:
         """Per-token last_hidden_state (Paper 2, Section 6.2 Stage 2) — needed by
@@ -133,6 +185,19 @@ class Embedder:
             return CodeBERTEmbedder.encode(" ".join(tokens))
         return self._fallback.encode(tokens)
 
+    def encode_identifiers_batch(self, token_lists: list[list[str]] | IdentifierBatch) -> np.ndarray:
+        """`encode_identifiers` for many identifiers at once -> (N, 768).
+        Accepts token lists or an IdentifierBatch."""
+        if isinstance(token_lists, IdentifierBatch):
+            if not self._codebert_ready:
+                return self._fallback.encode_batch(token_lists)
+            token_lists = [token_lists.tokens(i) for i in range(len(token_lists))]
+        if not token_lists:
+            return np.zeros((0, EMBED_DIM), dtype=np.float32)
+        if self._codebert_ready:
+            return CodeBERTEmbedder.encode_batch([" ".join(t) for t in token_lists])
+        return np.stack([self._fallback.encode(t) for t in token_lists])
+
     def encode_sequence(self, code: str, max_length: int = 80) -> np.ndarray:
         """Per-token embedding sequence (max_length, 768) for snippet-level models
         (Paper 2's GCN / Bi-TCN branches). Falls back to a deterministic per-token
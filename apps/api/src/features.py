@@ -16,12 +16,13 @@ from __future__ import annotations
 import math
 import re
 import string
+import threading
 from collections import Counter
 from functools import lru_cache
-from typing import Iterable
 
 import numpy as np
 
+from .identifier_batch import INTERNER, KINDS, IdentifierBatch
 from .preprocess import Identifier
 
 # --------------------------------------------------------------------------
@@ -85,15 +86,37 @@ _DOMAINS = {
                  "buffer", "linked", "sequence"},
 }
 
+# Inverted index token -> domains, so inference touches only the snippet's
+# own tokens instead of scanning every vocabulary.
+_DOMAIN_NAMES = list(_DOMAINS)
+_TOKEN_DOMAINS: dict[str, list[int]] = {}
+for _d, _vocab in enumerate(_DOMAINS.values()):
+    for _t in _vocab:
+        _TOKEN_DOMAINS.setdefault(_t, []).append(_d)
+del _d, _vocab, _t
+
+# The same resources over interned token ids, for IdentifierBatch inputs.
+# These are the only tokens the shared interner holds; request tokens get
+# batch-local ids (see identifier_batch).
+_COMMON_IDS = frozenset(INTERNER.ids(_COMMON_WORDS))
+_DOMAIN_ID_SETS = [frozenset(INTERNER.ids(v)) for v in _DOMAINS.values()]
+_ID_DOMAINS = {INTERNER.intern(t): ds for t, ds in _TOKEN_DOMAINS.items()}
+
 _VOWELS = set("aeiouy")
 
+# Optional compiled lexicon (src/lexicon.py) replacing the two built-ins above
+# for MC, LF and DR. None = built-ins (what the shipped checkpoints use).
+_LEXICON = None
+_VOCAB_BY_INITIAL: dict[str, list[str]] = {}
+
 
 # ========================== feature definitions =========================
 def meaningful_clarity(ident: Identifier) -> float:
     """MC — fraction of normalised tokens that are real English words."""
     if not ident.tokens:
         return 0.0
-    real = sum(1 for t in ident.tokens if t in _COMMON_WORDS or _looks_wordlike(t))
+    known = known_words(ident.tokens)
+    real = sum(1 for t, k in zip(ident.tokens, known) if k or _looks_wordlike(t))
     return real / len(ident.tokens)
 
 
@@ -159,8 +182,9 @@ def pronounceability(ident: Identifier) -> float:
 def lexical_familiarity(ident: Identifier, corpus_counts: Counter | None = None) -> float:
     """LF — average corpus frequency of the tokens (normalised to 0..1).
 
-    Uses the snippet/dataset token counter if given; falls back to the built-in
-    common-word set so the function is still meaningful at demo time.
+    Uses the snippet/dataset token counter if given; falls back to the
+    compiled lexicon's frequency ranks, or the built-in common-word set so the
+    function is still meaningful at demo time.
     """
     if not ident.tokens:
         return 0.0
@@ -170,6 +194,8 @@ def lexical_familiarity(ident: Identifier, corpus_counts: Counter | None = None)
         # rescale so common tokens approach 1.0
         max_score = max(scores) if scores else 0.0
         return float(min(1.0, sum(scores) / len(scores) * (10 / (max_score + 1e-6))))
+    if _LEXICON is not None:
+        return float(_LEXICON.familiarity(ident.tokens).mean())
     real = sum(1 for t in ident.tokens if t in _COMMON_WORDS)
     return real / len(ident.tokens)
 
@@ -219,7 +245,12 @@ def cognitive_load(ident: Identifier,
     ambiguity penalty. We use the (1 - underscore-density * sigma) form
     as the ambiguity penalty.
     """
-    underscores = ident.raw.count("_") / max(1, len(ident.raw))
+    return _cognitive_load(ident.raw, mc, lf, pr)
+
+
+def _cognitive_load(raw: str, mc: float, lf: float, pr: float) -> float:
+    """`cognitive_load` from the raw name alone (shared with the batch path)."""
+    underscores = raw.count("_") / max(1, len(raw))
     ambiguity_penalty = math.exp(-3 * underscores)
     return float(0.4 * mc + 0.3 * lf + 0.2 * pr + 0.1 * ambiguity_penalty)
 
@@ -257,44 +288,294 @@ def _looks_wordlike(token: str) -> bool:
     return True
 
 
-def _infer_domain(all_tokens: Iterable[str]) -> set[str]:
-    """Pick the domain with the highest hit count for this snippet."""
-    counts = {dom: sum(1 for t in all_tokens if t in vocab)
-              for dom, vocab in _DOMAINS.items()}
-    best = max(counts, key=counts.get)
-    return _DOMAINS[best] if counts[best] > 0 else set()
+def known_words(tokens: list[str]) -> list[bool]:
+    """Which tokens are dictionary words — one batched lookup per call."""
+    if _LEXICON is not None:
+        return _LEXICON.contains(tokens).tolist()
+    return [t in _COMMON_WORDS for t in tokens]
+
+
+def vocabulary_words(initial: str) -> list[str]:
+    """Words of the active vocabulary (built-in or lexicon) starting with
+    `initial`, sorted; cached per letter until the next `use_lexicon`."""
+    words = _VOCAB_BY_INITIAL.get(initial)
+    if words is None:
+        words = (_LEXICON.with_prefix(initial) if _LEXICON is not None
+                 else sorted(w for w in _COMMON_WORDS if w.startswith(initial)))
+        _VOCAB_BY_INITIAL[initial] = words
+    return words
+
+
+def _snippet_domain(all_tokens: list[str], domain: str | None = None) -> tuple[str | None, set[str]]:
+    """The snippet's domain — `domain` if pinned, else the one with the most
+    token hits — and the tokens `domain_relevance` should count as in it.
+
+    O(tokens) via the inverted index, however many domains there are. With a
+    compiled lexicon hits are weighted (TF-IDF) and the token set is the
+    snippet's tokens that belong to the domain.
+    """
+    if _LEXICON is not None:
+        if domain is not None:
+            return domain, _LEXICON.domain_members(all_tokens, domain)
+        return _LEXICON.infer_domain(all_tokens)
+    if domain is not None:
+        if domain not in _DOMAINS:
+            raise ValueError(f"Unknown domain {domain!r}")
+        return domain, _DOMAINS[domain]
+    counts: Counter[int] = Counter()
+    for t in all_tokens:
+        counts.update(_TOKEN_DOMAINS.get(t, ()))
+    if not counts:
+        return None, set()
+    best = min(counts, key=lambda d: (-counts[d], d))        # ties -> first declared
+    return _DOMAIN_NAMES[best], _DOMAINS[_DOMAIN_NAMES[best]]
+
+
+def domain_names() -> list[str]:
+    """Domains a request may pin (built-in or from the active lexicon)."""
+    return list(_LEXICON.domains) if _LEXICON is not None else list(_DOMAIN_NAMES)
+
+
+def infer_domain(identifiers: list[Identifier]) -> str | None:
+    """Auto-detected domain of a snippet (None when no token hits any)."""
+    return _snippet_domain([t for ident in identifiers for t in ident.tokens])[0]
+
+
+# ====================== peer-independent row memo =======================
+def _scope_bucket(scope_size: int) -> int:
+    """The three scope regimes `scope_appropriateness` distinguishes."""
+    s = max(1, scope_size)
+    return 0 if s <= 3 else 1 if s <= 10 else 2
+
+
+def _static_row(ident: Identifier) -> tuple[float, float, float, float, float]:
+    return (meaningful_clarity(ident), naming_conformance(ident), optimal_length(ident),
+            pronounceability(ident), scope_appropriateness(ident))
+
+
+class _StaticFeatureMemo:
+    """Bounded memo of the peer-independent columns (MC, NC, OL, PR, SA).
+
+    They depend only on the identifier's raw name, kind and scope bucket
+    (tokens are `normalise`'s deterministic split of the raw name), so the
+    same name seen again in another snippet, request or training epoch is a
+    dict lookup instead of regex `fullmatch` and character loops. Once full,
+    the oldest entry is evicted (insertion order), which keeps the hot
+    vocabulary of a long-running worker resident. FastAPI runs sync endpoints
+    on a threadpool: hits are lock-free (so `hits` may undercount under
+    concurrency), while misses, inserts and evictions take the lock.
+    """
+
+    def __init__(self, maxsize: int = 1 << 16) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._rows: dict[tuple[str, str, int], tuple[float, float, float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, ident: Identifier) -> tuple[float, float, float, float, float]:
+        key = (ident.raw, ident.kind, _scope_bucket(ident.scope_size))
+        row = self._rows.get(key)
+        if row is not None:
+            self.hits += 1                        # unlocked: approximate under threads
+            return row
+        return self._miss(key, ident)
+
+    def get_at(self, batch: IdentifierBatch, i: int) -> tuple[float, float, float, float, float]:
+        """`get` for row `i` of an IdentifierBatch; materialises an
+        Identifier only on a miss."""
+        key = (batch.raw(i), KINDS[batch.kinds[i]], _scope_bucket(int(batch.scope_sizes[i])))
+        row = self._rows.get(key)
+        if row is not None:
+            self.hits += 1                        # unlocked: approximate under threads
+            return row
+        return self._miss(key, batch.identifier(i))
+
+    def _miss(self, key: tuple[str, str, int], ident: Identifier) -> tuple[float, float, float, float, float]:
+        row = _static_row(ident)
+        with self._lock:
+            self.misses += 1
+            if self.maxsize <= 0:                 # memo disabled
+                return row
+            while len(self._rows) >= self.maxsize:
+                self._rows.pop(next(iter(self._rows)), None)
+            self._rows[key] = row
+        return row
+
+    def info(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._rows),
+                "max_size": self.maxsize, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self.hits = self.misses = 0
+
+
+_STATIC_MEMO = _StaticFeatureMemo()
+
+
+def feature_memo_info() -> dict:
+    """Hit/miss counters and occupancy of the per-name feature memo."""
+    return _STATIC_MEMO.info()
+
+
+def clear_feature_memo(maxsize: int | None = None) -> None:
+    """Empty the memo (and reset its counters), optionally resizing it."""
+    _STATIC_MEMO.clear()
+    if maxsize is not None:
+        _STATIC_MEMO.maxsize = maxsize
+
+
+def use_lexicon(lexicon) -> None:
+    """Switch MC / LF / DR to a compiled `lexicon.Lexicon` (None = built-ins).
+
+    Feature values change, so a model should be served with the lexicon it
+    was trained with (the trainer records `lexicon_fingerprint()`).
+    """
+    global _LEXICON
+    _LEXICON = lexicon
+    _STATIC_MEMO.clear()
+    _VOCAB_BY_INITIAL.clear()
+
+
+def lexicon_fingerprint() -> str | None:
+    """Fingerprint of the active compiled lexicon, None for the built-ins."""
+    return _LEXICON.fingerprint if _LEXICON is not None else None
 
 
 # ========================== public computation ==========================
 FEATURE_NAMES = ["MC", "NC", "OL", "DR", "PR", "LF", "CC", "SA", "CLS", "PRED"]
 
 
-def compute_features(identifiers: list[Identifier],
-                     corpus_counts: Counter | None = None) -> np.ndarray:
-    """Return an (N, 10) matrix of feature values for N identifiers."""
+def compute_features(identifiers: list[Identifier] | IdentifierBatch,
+                     corpus_counts: Counter | None = None,
+                     domain: str | None = None) -> np.ndarray:
+    """Return an (N, 10) matrix of feature values for N identifiers.
+
+    `identifiers` is one snippet's identifiers, or an IdentifierBatch of any
+    number of snippets (rows in batch order, each scored among its own
+    snippet's peers). `domain` pins the snippet domain used by DR (see
+    `domain_names()`); None auto-detects it from the identifiers' tokens.
+    """
+    if isinstance(identifiers, IdentifierBatch):
+        return _compute_features_batch(identifiers, corpus_counts, domain)
     if not identifiers:
         return np.zeros((0, 10), dtype=np.float32)
 
     all_tokens = [t for ident in identifiers for t in ident.tokens]
-    domain = _infer_domain(all_tokens)
-
-    rows: list[list[float]] = []
-    for ident in identifiers:
-        mc  = meaningful_clarity(ident)
-        nc  = naming_conformance(ident)
-        ol  = optimal_length(ident)
-        dr  = domain_relevance(ident, domain)
-        pr  = pronounceability(ident)
-        lf  = lexical_familiarity(ident, corpus_counts)
-        cc  = context_consistency(ident, identifiers)
-        sa  = scope_appropriateness(ident)
-        cls_ = cognitive_load(ident, mc, lf, pr)
-        pred = predictability(ident, identifiers)
-        rows.append([mc, nc, ol, dr, pr, lf, cc, sa, cls_, pred])
+    _, in_domain = _snippet_domain(all_tokens, domain)
+    rows = [_feature_row(ident, identifiers, in_domain, corpus_counts) for ident in identifiers]
+    return np.asarray(rows, dtype=np.float32)
+
 
+def candidate_features(candidates: list[Identifier], context: list[Identifier],
+                       corpus_counts: Counter | None = None,
+                       domain: str | None = None) -> np.ndarray:
+    """(M, 10) rows for candidate identifiers, each scored as if it were the
+    only change to a snippet whose other identifiers are `context`.
+
+    Equivalent to computing `compute_features(context + [cand])[-1]` for every
+    candidate, without recomputing the context rows — used to score rename
+    suggestions in bulk.
+    """
+    if not candidates:
+        return np.zeros((0, 10), dtype=np.float32)
+    context_tokens = [t for ident in context for t in ident.tokens]
+    rows = []
+    for cand in candidates:
+        _, in_domain = _snippet_domain(context_tokens + cand.tokens, domain)
+        rows.append(_feature_row(cand, context + [cand], in_domain, corpus_counts))
     return np.asarray(rows, dtype=np.float32)
 
 
+def _feature_row(ident: Identifier, peers: list[Identifier], domain: set[str],
+                 corpus_counts: Counter | None) -> list[float]:
+    mc, nc, ol, pr, sa = _STATIC_MEMO.get(ident)
+    dr  = domain_relevance(ident, domain)
+    lf  = lexical_familiarity(ident, corpus_counts)
+    cc  = context_consistency(ident, peers)
+    cls_ = cognitive_load(ident, mc, lf, pr)
+    pred = predictability(ident, peers)
+    return [mc, nc, ol, dr, pr, lf, cc, sa, cls_, pred]
+
+
+def _compute_features_batch(batch: IdentifierBatch, corpus_counts: Counter | None,
+                            domain: str | None) -> np.ndarray:
+    """`compute_features` over every snippet of a batch, on its token ids:
+    identical values, but CC / PRED / DR work on int sets and the corpus
+    counter is translated to the batch's ids once per call."""
+    out = np.zeros((len(batch), 10), dtype=np.float32)
+    id_counts = total = None
+    tok_ptr = batch.tok_ptr.tolist()
+    tok_ids = batch.tok_ids.tolist()
+    if corpus_counts:
+        total = sum(corpus_counts.values()) or 1
+        id_counts = {t: corpus_counts[tok] for t in set(tok_ids)
+                     if (tok := batch.token(t)) in corpus_counts}
+    for j in range(batch.n_snippets):
+        a, b = batch.snippet_bounds(j)
+        if a == b:
+            continue
+        ids = [tok_ids[tok_ptr[i]:tok_ptr[i + 1]] for i in range(a, b)]
+        in_domain = _snippet_domain_ids(batch, [t for row in ids for t in row], domain)
+        sets = [set(row) for row in ids]
+        totals: Counter[int] = Counter(t for row in ids for t in row)
+        n = b - a
+        rows = []
+        for k, i in enumerate(range(a, b)):
+            toks = ids[k]
+            mc, nc, ol, pr, sa = _STATIC_MEMO.get_at(batch, i)
+            dr = (sum(1 for t in toks if t in in_domain) / len(toks)) if toks and in_domain else 0.0
+            lf = _lexical_familiarity_ids(batch, toks, id_counts, total)
+            if not toks or n <= 1:
+                cc = pred = 0.0
+            else:
+                my = sets[k]
+                sims = [len(my & sets[m]) / max(1, len(my | sets[m]))
+                        for m in range(n) if m != k and sets[m]]
+                cc = float(np.mean(sims)) if sims else 0.0
+                own = Counter(toks)
+                pred = sum(1 for t in toks if totals[t] - own[t] > 0) / len(toks)
+            cls_ = _cognitive_load(batch.raw(i), mc, lf, pr)
+            rows.append([mc, nc, ol, dr, pr, lf, cc, sa, cls_, pred])
+        out[a:b] = rows
+    return out
+
+
+def _snippet_domain_ids(batch: IdentifierBatch, all_ids: list[int],
+                        domain: str | None) -> frozenset[int] | set[int]:
+    """`_snippet_domain` for a batch's token ids: the ids DR counts as in-domain."""
+    if _LEXICON is not None:
+        _, members = _snippet_domain([batch.token(t) for t in all_ids], domain)
+        return {t for t in all_ids if batch.token(t) in members}
+    if domain is not None:
+        if domain not in _DOMAINS:
+            raise ValueError(f"Unknown domain {domain!r}")
+        return _DOMAIN_ID_SETS[_DOMAIN_NAMES.index(domain)]
+    counts: Counter[int] = Counter()
+    for t in all_ids:
+        counts.update(_ID_DOMAINS.get(t, ()))
+    if not counts:
+        return frozenset()
+    return _DOMAIN_ID_SETS[min(counts, key=lambda d: (-counts[d], d))]
+
+
+def _lexical_familiarity_ids(batch: IdentifierBatch, toks: list[int],
+                             id_counts: dict[int, int] | None, total: int | None) -> float:
+    """`lexical_familiarity` for a batch's token ids (same arithmetic)."""
+    if not toks:
+        return 0.0
+    if id_counts is not None:
+        scores = [id_counts.get(t, 0) / total for t in toks]
+        max_score = max(scores) if scores else 0.0
+        return float(min(1.0, sum(scores) / len(scores) * (10 / (max_score + 1e-6))))
+    if _LEXICON is not None:
+        return float(_LEXICON.familiarity([batch.token(t) for t in toks]).mean())
+    return sum(1 for t in toks if t in _COMMON_IDS) / len(toks)
+
+
 def snippet_feature_vector(identifiers: list[Identifier],
                            corpus_counts: Counter | None = None) -> np.ndarray:
     """Aggregate per-identifier features into one snippet-level vector
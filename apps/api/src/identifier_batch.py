@@ -0,0 +1,230 @@
+"""Compact, array-backed identifiers with process-wide token interning.
+
+`preprocess.Identifier` is a dataclass with a list of token strings. That is
+convenient per snippet but costly for 100k-identifier datasets: each
+identifier carries a dict-backed object, a list and its own string
+references, and every feature re-hashes the token strings. `IdentifierBatch`
+stores many snippets' identifiers column-wise instead:
+
+    raw_buf / raw_ptr     all raw names in one str + int64 offsets
+    kinds                 uint8 codes into KINDS
+    tok_ptr / tok_ids     int32 CSR arrays of token ids
+    scope_sizes           int32
+    snip_ptr              int32 offsets of each snippet's identifiers
+    local_tokens          strings of the batch-local ids
+
+Tokens of the static vocabularies (common words, domain vocabularies) keep
+the ids of the process-wide `TokenInterner`; every other token gets a
+batch-local id -1, -2, ... into `local_tokens`. Set operations in CC / PRED
+and per-token embedding caches still work on small ints, and user tokens
+seen by the API never outlive the request that sent them.
+`features.compute_features` and `Embedder.encode_identifiers_batch` accept a
+batch directly; `identifier(i)` materialises a regular `Identifier` when a
+caller needs one.
+"""
+
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from .preprocess import Identifier, _clean_tokens, _split_token
+
+KINDS = ("function", "class", "param", "variable")
+KIND_CODES = {k: i for i, k in enumerate(KINDS)}
+
+
+class TokenInterner:
+    """Maps token strings to dense int ids (and back), shared process-wide.
+    Only the static vocabularies are interned (at import, by `features`), so
+    the table stays bounded. Lookups are lock-free; only new tokens take the
+    lock."""
+
+    __slots__ = ("_ids", "tokens", "_lock")
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self.tokens: list[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, token: str) -> int:
+        tid = self._ids.get(token)
+        if tid is None:
+            with self._lock:
+                tid = self._ids.get(token)
+                if tid is None:
+                    tid = len(self.tokens)
+                    self.tokens.append(token)
+                    self._ids[token] = tid
+        return tid
+
+    def ids(self, tokens: Iterable[str]) -> list[int]:
+        return [self.intern(t) for t in tokens]
+
+    def get(self, token: str) -> int | None:
+        """Id of an already-interned token, None otherwise (never interns)."""
+        return self._ids.get(token)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+
+INTERNER = TokenInterner()
+
+
+@lru_cache(maxsize=1 << 17)
+def _name_tokens(raw: str) -> tuple[str, ...]:
+    """Normalised tokens of a raw name (what `normalise` produces)."""
+    return tuple(_clean_tokens(_split_token(raw)))
+
+
+def _batch_token_ids(token_lists: Iterable[Sequence[str]]) -> tuple[list[list[int]], list[str]]:
+    """Ids for one batch's tokens: the interner's id if it has one, else a
+    batch-local id -k for `local[k - 1]`. A token keeps its first id for the
+    whole batch."""
+    shared = INTERNER.get
+    local_ids: dict[str, int] = {}
+    local: list[str] = []
+    rows = []
+    for tokens in token_lists:
+        row = []
+        for t in tokens:
+            tid = local_ids.get(t)
+            if tid is None:
+                tid = shared(t)
+                if tid is None:
+                    local.append(t)
+                    tid = local_ids[t] = -len(local)
+            row.append(tid)
+        rows.append(row)
+    return rows, local
+
+
+class IdentifierBatch:
+    """Identifiers of one or more snippets in flat arrays (see module docstring)."""
+
+    __slots__ = ("raw_buf", "raw_ptr", "kinds", "tok_ptr", "tok_ids", "scope_sizes", "snip_ptr",
+                 "local_tokens")
+
+    def __init__(self, raw_buf: str, raw_ptr: np.ndarray, kinds: np.ndarray, tok_ptr: np.ndarray,
+                 tok_ids: np.ndarray, scope_sizes: np.ndarray, snip_ptr: np.ndarray,
+                 local_tokens: list[str]) -> None:
+        self.raw_buf = raw_buf
+        self.raw_ptr = raw_ptr
+        self.kinds = kinds
+        self.tok_ptr = tok_ptr
+        self.tok_ids = tok_ids
+        self.scope_sizes = scope_sizes
+        self.snip_ptr = snip_ptr
+        self.local_tokens = local_tokens
+
+    # -- construction --------------------------------------------------------
+    @classmethod
+    def from_snippets(cls, snippets: Sequence[Sequence[Identifier]]) -> "IdentifierBatch":
+        """Pack already-normalised identifiers, one inner sequence per snippet."""
+        flat = [ident for snippet in snippets for ident in snippet]
+        return cls._pack([i.raw for i in flat], [i.kind for i in flat],
+                         [i.scope_size for i in flat], [i.tokens for i in flat],
+                         [len(s) for s in snippets])
+
+    @classmethod
+    def from_identifiers(cls, identifiers: Sequence[Identifier]) -> "IdentifierBatch":
+        """One snippet's identifiers."""
+        return cls.from_snippets([identifiers])
+
+    @classmethod
+    def from_names(cls, raws: Sequence[str], kinds: Sequence[str],
+                   scope_sizes: Sequence[int] | None = None,
+                   snippet_sizes: Sequence[int] | None = None) -> "IdentifierBatch":
+        """Build straight from raw names (e.g. an identifier CSV), normalising
+        each distinct name once; no `Identifier` objects are created.
+        `snippet_sizes` groups consecutive names into snippets (default: one)."""
+        tokens = [_name_tokens(r) for r in raws]
+        scopes = scope_sizes if scope_sizes is not None else [0] * len(raws)
+        sizes = snippet_sizes if snippet_sizes is not None else [len(raws)]
+        return cls._pack(list(raws), list(kinds), scopes, tokens, sizes)
+
+    @classmethod
+    def _pack(cls, raws: list[str], kinds: list[str], scopes: Sequence[int],
+              tokens: list[Sequence[str]], snippet_sizes: Sequence[int]) -> "IdentifierBatch":
+        if sum(snippet_sizes) != len(raws):
+            raise ValueError("snippet sizes do not add up to the number of identifiers")
+        token_ids, local = _batch_token_ids(tokens)
+        try:
+            kind_codes = np.fromiter((KIND_CODES[k] for k in kinds), dtype=np.uint8, count=len(kinds))
+        except KeyError as exc:
+            raise ValueError(f"Unknown identifier kind: {exc.args[0]!r}") from None
+        raw_ptr = np.zeros(len(raws) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in raws], out=raw_ptr[1:])
+        tok_ptr = np.zeros(len(raws) + 1, dtype=np.int32)
+        np.cumsum([len(t) for t in token_ids], out=tok_ptr[1:])
+        tok_ids = np.fromiter((t for ids in token_ids for t in ids), dtype=np.int32,
+                              count=int(tok_ptr[-1]))
+        snip_ptr = np.zeros(len(snippet_sizes) + 1, dtype=np.int32)
+        np.cumsum(snippet_sizes, out=snip_ptr[1:])
+        return cls("".join(raws), raw_ptr, kind_codes, tok_ptr, tok_ids,
+                   np.asarray(scopes, dtype=np.int32), snip_ptr, local)
+
+    # -- access --------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @property
+    def n_snippets(self) -> int:
+        return len(self.snip_ptr) - 1
+
+    def snippet_bounds(self, j: int) -> tuple[int, int]:
+        return int(self.snip_ptr[j]), int(self.snip_ptr[j + 1])
+
+    def raw(self, i: int) -> str:
+        return self.raw_buf[self.raw_ptr[i]:self.raw_ptr[i + 1]]
+
+    def kind(self, i: int) -> str:
+        return KINDS[self.kinds[i]]
+
+    def token_ids(self, i: int) -> np.ndarray:
+        return self.tok_ids[self.tok_ptr[i]:self.tok_ptr[i + 1]]
+
+    def token(self, tid: int) -> str:
+        """String of a token id from this batch (shared or batch-local)."""
+        return INTERNER.tokens[tid] if tid >= 0 else self.local_tokens[-1 - tid]
+
+    def tokens(self, i: int) -> list[str]:
+        return [self.token(t) for t in self.token_ids(i).tolist()]
+
+    def identifier(self, i: int) -> Identifier:
+        return Identifier(self.raw(i), self.kind(i), self.tokens(i), int(self.scope_sizes[i]))
+
+    def identifiers(self, j: int | None = None) -> list[Identifier]:
+        """Materialise snippet `j` (or everything) as `Identifier` objects."""
+        a, b = self.snippet_bounds(j) if j is not None else (0, len(self))
+        return [self.identifier(i) for i in range(a, b)]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by this batch (arrays, raw-name buffer and local token
+        table; the shared interner table is not included)."""
+        import sys
+        arrays = (self.raw_ptr, self.kinds, self.tok_ptr, self.tok_ids, self.scope_sizes, self.snip_ptr)
+        local = sys.getsizeof(self.local_tokens) + sum(sys.getsizeof(t) for t in self.local_tokens)
+        return sys.getsizeof(self.raw_buf) + local + sum(a.nbytes for a in arrays)
+
+
+if __name__ == "__main__":
+    from .preprocess import extract_and_normalise
+
+    code = (
+        "def calculate_total_price(item_prices, tax_rate):\n"
+        "    subtotal = sum(item_prices)\n"
+        "    return subtotal * (1 + tax_rate)\n"
+    )
+    idents = extract_and_normalise(code, "python")
+    batch = IdentifierBatch.from_identifiers(idents)
+    assert batch.identifiers() == idents
+    print(f"{len(batch)} identifiers, {len(INTERNER)} interned tokens, "
+          f"{len(batch.local_tokens)} local, {batch.nbytes} bytes")
+    for i in range(len(batch)):
+        print(f"{batch.kind(i):>10}  {batch.raw(i):>22}  ->  {batch.token_ids(i).tolist()}")
@@ -0,0 +1,117 @@
+"""Feature-only identifier quality scoring — no CodeBERT, no SA-BiLSTM.
+
+The Identifier Quality score reported by /predict is
+
+    IQ = 0.35·MC + 0.25·NC + 0.20·OL + 0.20·CLS
+
+and all four columns depend only on an identifier's raw name and kind (CLS
+combines MC, LF, PR and the underscore density; LF without a corpus counter
+is the common-word fraction). So the per-name row is memoized and the
+snippet context is only needed to find the identifiers. Many files are
+scored in one vectorized pass over the stacked rows.
+
+This module must stay free of torch (and transformers) imports: it backs the
+/score-identifiers endpoint used by the editor linter and is safe to call
+from processes that never load a model.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+
+from .features import (cognitive_load, lexical_familiarity, lexicon_fingerprint,
+                       meaningful_clarity, naming_conformance, optimal_length,
+                       pronounceability)
+from .preprocess import Identifier, extract, normalise
+
+IQ_COLUMNS = ("MC", "NC", "OL", "CLS")
+IQ_WEIGHTS = np.array([0.35, 0.25, 0.20, 0.20], dtype=np.float32)
+
+
+def iq_label(score: float) -> str:
+    if score >= 0.75:
+        return "High"
+    if score >= 0.50:
+        return "Medium"
+    return "Low"
+
+
+def identifier_quality(feat_matrix: np.ndarray, columns: list[str]) -> np.ndarray:
+    """Per-identifier IQ from a feature matrix whose columns are named `columns`
+    (e.g. FEATURE_NAMES for a `compute_features` result)."""
+    mc, nc, ol, cls_ = (feat_matrix[:, columns.index(c)] for c in IQ_COLUMNS)
+    return 0.35 * mc + 0.25 * nc + 0.20 * ol + 0.20 * cls_
+
+
+@lru_cache(maxsize=65536)
+def naming_row(raw: str, kind: str, lexicon: str | None = None) -> tuple[float, float, float, float]:
+    """(MC, NC, OL, CLS) for one name — identical to the matching
+    `compute_features` columns when no corpus counter is given. `lexicon` is
+    the active lexicon's fingerprint, so switching lexicons never serves
+    stale rows."""
+    ident = normalise([Identifier(raw, kind)])[0]
+    mc = meaningful_clarity(ident)
+    lf = lexical_familiarity(ident)
+    pr = pronounceability(ident)
+    return (mc, naming_conformance(ident), optimal_length(ident),
+            cognitive_load(ident, mc, lf, pr))
+
+
+def score_files(files: list[tuple[str, str]]) -> list[dict]:
+    """Score the identifiers of many `(code, language)` files in one pass.
+
+    Returns, per file, its identifiers with their (MC, NC, OL, CLS) row and IQ,
+    and the file's mean IQ (0.0 when it has no identifiers, as in /predict).
+    """
+    per_file = [extract(code, language) for code, language in files]
+    flat = [ident for ids in per_file for ident in ids]
+    lexicon = lexicon_fingerprint()
+    rows = np.array([naming_row(i.raw, i.kind, lexicon) for i in flat],
+                    dtype=np.float32).reshape(-1, len(IQ_COLUMNS))
+    iq = identifier_quality(rows, list(IQ_COLUMNS))
+
+    out = []
+    start = 0
+    for ids in per_file:
+        stop = start + len(ids)
+        file_iq = float(np.mean(iq[start:stop])) if ids else 0.0
+        out.append({
+            "identifiers": [
+                {"name": ident.raw, "kind": ident.kind,
+                 "features": dict(zip(IQ_COLUMNS, rows[k].tolist())),
+                 "score": float(iq[k])}
+                for k, ident in zip(range(start, stop), ids)
+            ],
+            "score": file_iq,
+            "label": iq_label(file_iq),
+        })
+        start = stop
+    return out
+
+
+def score_identifiers(code: str, language: str = "python") -> dict:
+    """Single-file convenience wrapper around `score_files`."""
+    return score_files([(code, language)])[0]
+
+
+def cache_info() -> dict:
+    info = naming_row.cache_info()
+    lookups = info.hits + info.misses
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize,
+            "max_size": info.maxsize, "hit_rate": info.hits / lookups if lookups else 0.0}
+
+
+if __name__ == "__main__":
+    import sys
+
+    snippet = (
+        "def calculate_total_price(item_prices, tax_rate):\n"
+        "    subtotal = sum(item_prices)\n"
+        "    return subtotal * (1 + tax_rate)\n"
+    )
+    result = score_identifiers(snippet)
+    for ident in result["identifiers"]:
+        print(f"{ident['kind']:>10}  {ident['name']:>22}  IQ={ident['score']:.3f}")
+    print(f"file IQ={result['score']:.3f} ({result['label']}); torch imported: {'torch' in sys.modules}")
@@ -0,0 +1,149 @@
+"""In-process IRAF-XADL scoring: what /predict returns, without the HTTP hop.
+
+`sabilstm_inputs` and `forward_probs` are the batched SA-BiLSTM path shared
+with api.py (/predict-file). `IrafScorer` loads a checkpoint the way the API
+does and scores many snippets per forward pass. `readability_columns` returns
+the columns the experiment pipeline used to get from /batch + `merge()`:
+label, P(class), confidence, identifier quality, mean features, structural.
+It applies the API's rounding, then merge's averaging, so the numbers are
+identical to the HTTP path (`experiment/score_inprocess.py`).
+
+    scorer = IrafScorer.load("artifacts/iraf_xadl_augmented.pt")
+    rows = scorer.readability_columns(codes)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .dataset import FEAT_DIM, LABELS, MAX_IDS
+from .embeddings import EMBED_DIM, Embedder
+from .features import FEATURE_NAMES, compute_features
+from .identifier_batch import IdentifierBatch
+from .identifier_quality import identifier_quality
+from .preprocess import Identifier, extract_and_normalise
+from .structural import FEATURE_NAMES as STRUCT_NAMES
+from .structural import compute_structural, normalize_structural
+
+DEFAULT_CHECKPOINT = Path("artifacts/iraf_xadl_augmented.pt")
+
+
+def sabilstm_inputs(snippets: list[list[Identifier]], codes: list[str], embedder: Embedder,
+                    norm_stats: dict, domain: str | None = None):
+    """Padded SA-BiLSTM inputs for a batch of snippets.
+
+    `snippets` holds each snippet's normalised identifiers (at most MAX_IDS),
+    `codes` the text its structural features come from. Returns the packed
+    IdentifierBatch, its (N, FEAT_DIM) feature rows, the raw structural
+    dicts and the (B, MAX_IDS, EMBED_DIM) / (B, MAX_IDS, FEAT_DIM) / (B, 7)
+    model inputs.
+    """
+    batch = IdentifierBatch.from_snippets(snippets)
+    feats = compute_features(batch, domain=domain)
+    embeds = embedder.encode_identifiers_batch(batch)
+    embed_seq = np.zeros((len(snippets), MAX_IDS, EMBED_DIM), dtype=np.float32)
+    feat_seq = np.zeros((len(snippets), MAX_IDS, FEAT_DIM), dtype=np.float32)
+    struct_seq = np.zeros((len(snippets), len(STRUCT_NAMES)), dtype=np.float32)
+    raw_structs = []
+    for k, code in enumerate(codes):
+        a, b = batch.snippet_bounds(k)
+        embed_seq[k, :b - a] = embeds[a:b]
+        feat_seq[k, :b - a] = feats[a:b]
+        raw = compute_structural(code)
+        raw_structs.append(raw)
+        if norm_stats:
+            struct_seq[k] = normalize_structural(raw, norm_stats)
+    return batch, feats, raw_structs, embed_seq, feat_seq, struct_seq
+
+
+def forward_probs(model, embed_seq: np.ndarray, feat_seq: np.ndarray,
+                  struct_seq: np.ndarray) -> np.ndarray:
+    """(B, len(LABELS)) class probabilities from one forward pass."""
+    import torch
+    with torch.no_grad():
+        logits, _ = model.forward_with_attention(torch.from_numpy(embed_seq),
+                                                 torch.from_numpy(feat_seq),
+                                                 torch.from_numpy(struct_seq))
+        return torch.softmax(logits, dim=-1).numpy()
+
+
+@dataclass
+class IrafScorer:
+    model: object                     # SABiLSTM, eval mode
+    embedder: Embedder
+    norm_stats: dict
+
+    @classmethod
+    def load(cls, checkpoint: str | Path = DEFAULT_CHECKPOINT,
+             embedder: Embedder | None = None) -> "IrafScorer":
+        """Same loading as api.py: split safetensors/JSON if present, else .pt."""
+        from .checkpoint_io import load_checkpoint, load_state_dict_zero_copy
+        from .model import SABiLSTM
+        ckpt = load_checkpoint(checkpoint)
+        model = SABiLSTM(num_classes=len(LABELS), struct_dim=ckpt.get("struct_dim", 7))
+        load_state_dict_zero_copy(model, ckpt["state_dict"])
+        model.eval()
+        return cls(model, embedder or Embedder(use_codebert=True), ckpt.get("norm_stats", {}))
+
+    def predict(self, codes: list[str], language: str = "python", domain: str | None = None,
+                batch_size: int = 64):
+        """Yield (identifiers, feature rows, raw structural, probabilities) per
+        code, like /predict: code stripped, first MAX_IDS identifiers."""
+        for lo in range(0, len(codes), batch_size):
+            part = [c.strip() for c in codes[lo:lo + batch_size]]
+            snippets = [extract_and_normalise(c, language)[:MAX_IDS] for c in part]
+            batch, feats, raw_structs, *inputs = sabilstm_inputs(
+                snippets, part, self.embedder, self.norm_stats, domain)
+            probs = forward_probs(self.model, *inputs)
+            for k, idents in enumerate(snippets):
+                a, b = batch.snippet_bounds(k)
+                yield idents, feats[a:b], raw_structs[k], probs[k]
+
+    def readability_columns(self, codes: list[str], language: str = "python",
+                            domain: str | None = None, batch_size: int = 64) -> list[dict | None]:
+        """Per code, the readability fields of a score_readability.py row
+        (None for empty code, which /predict rejects)."""
+        rows: list[dict | None] = []
+        for code, (idents, feats, raw_struct, probs) in zip(
+                codes, self.predict(codes, language, domain, batch_size)):
+            if not code.strip():
+                rows.append(None)
+                continue
+            pred = int(np.argmax(probs))
+            # /predict rounds P to 4 places, identifier features to 3 and IQ
+            # to 3; merge() then averages the rounded features.
+            p = {l: round(float(v), 4) for l, v in zip(LABELS, probs)}
+            iq = float(np.mean(identifier_quality(feats, FEATURE_NAMES))) if len(idents) else 0.0
+            sums: dict[str, float] = {}
+            for feat_row in feats:
+                for name, v in zip(FEATURE_NAMES, feat_row):
+                    sums[name] = sums.get(name, 0.0) + round(float(v), 3)
+            n = max(len(idents), 1)
+            rows.append({
+                "readability_label":        LABELS[pred],
+                "p_high":                   round(p.get("High", 0.0), 4),
+                "p_medium":                 round(p.get("Medium", 0.0), 4),
+                "p_low":                    round(p.get("Low", 0.0), 4),
+                "confidence":               round(round(float(probs[pred]), 4), 4),
+                "identifier_quality_score": round(round(iq, 3), 4),
+                "features":                 {k: round(v / n, 4) for k, v in sums.items()},
+                "structural":               {k: round(float(v), 3) for k, v in raw_struct.items()},
+            })
+        return rows
+
+
+if __name__ == "__main__":
+    import time
+
+    import pandas as pd
+
+    codes = pd.read_csv(Path(__file__).resolve().parent.parent / "data" / "sample_python.csv")["code"].tolist()
+    scorer = IrafScorer.load()
+    t0 = time.perf_counter()
+    rows = scorer.readability_columns(codes)
+    print(f"{len(rows)} snippets in {time.perf_counter() - t0:.2f}s")
+    for row in rows[:3]:
+        print(row["readability_label"], row["p_high"], row["identifier_quality_score"], row["features"])
@@ -0,0 +1,322 @@
+"""Compiled, memory-mapped word lexicon for the MC / LF / DR features.
+
+The built-in `_COMMON_WORDS` (~200 words) and `_DOMAINS` (6 tiny sets) in
+features.py keep the demo offline; the legacy scorer instead loaded the
+Google 10k list and the per-repository domain-term CSVs into Python sets in
+every process. A compiled lexicon holds all of that in one file:
+
+    words   (n,)     S{width}  sorted, NUL-padded normalised tokens
+    ranks   (n,)     uint32    frequency rank (0 = most frequent; UNRANKED
+                               for words that only come from domain lists)
+    masks   (n, W)   uint64    bit d set when the word belongs to domain d
+    post_*  CSR      inverted index word -> (domain id, weight): post_ptr
+                     (n+1,) offsets into post_dom (uint32) / post_w (float32)
+
+Tokens are normalised exactly like identifier tokens (`_split_token` +
+`_clean_tokens`), so a lookup is a batched `np.searchsorted` over the mmap'd
+word table — no Python set is built and the pages are shared by every worker
+that maps the same file. Building is an offline step (`build_lexicon.py`).
+
+Domain inference walks only the postings of the snippet's own tokens, so it
+costs O(tokens + postings touched) whether the lexicon has 6 domains or 600.
+A posting weighs a token for a domain by sublinear term frequency times
+inverse domain frequency, (1 + ln tf) * ln(1 + D / df): tf sums the term
+frequencies of the domain's terms containing the token (1 per term in lists
+without a Frequency column), so tokens shared by every project count little.
+
+File layout: b"IRAFLEX1", uint32 header length, a JSON header describing each
+section (offset, dtype, shape) plus the domain names, then the 64-byte
+aligned sections.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import math
+import mmap
+import re
+import struct
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from .preprocess import _clean_tokens, _split_token
+
+MAGIC = b"IRAFLEX1"
+UNRANKED = np.iinfo(np.uint32).max
+MAX_WIDTH = 32                       # longer tokens are not stored (and never match)
+_ALIGN = 64
+_PIECE_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
+def normalise_term(term: str) -> list[str]:
+    """Identifier-style tokens of a lexicon term ("ActivatedEventArgs",
+    "the django forum", "ASP.NET" ...)."""
+    out: list[str] = []
+    for piece in _PIECE_RE.findall(term):
+        out.extend(_clean_tokens(_split_token(piece)))
+    return out
+
+
+class Lexicon:
+    """Read-only view of a compiled lexicon file. Arrays are zero-copy views
+    of the mmap; use `Lexicon.open` to share one instance per path."""
+
+    _open: dict[str, "Lexicon"] = {}
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a compiled lexicon")
+        (hlen,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        self.header = json.loads(self._mm[len(MAGIC) + 4:len(MAGIC) + 4 + hlen])
+        if self.header.get("version", 1) < 2:
+            raise ValueError(f"{self.path} predates the domain index; rebuild it with build_lexicon.py")
+        self.words = self._section("words")
+        self.ranks = self._section("ranks")
+        self.masks = self._section("masks")
+        self.post_ptr = self._section("post_ptr")
+        self.post_dom = self._section("post_dom")
+        self.post_w = self._section("post_w")
+        self.domains: list[str] = self.header["domains"]
+        self.n_ranked: int = self.header["n_ranked"]
+        self.fingerprint: str = self.header["fingerprint"]
+        self.width = self.words.dtype.itemsize
+        self._domain_ids = {name: d for d, name in enumerate(self.domains)}
+
+    @classmethod
+    def open(cls, path: str | Path) -> "Lexicon":
+        key = str(Path(path).resolve())
+        if key not in cls._open:
+            cls._open[key] = cls(path)
+        return cls._open[key]
+
+    def _section(self, name: str) -> np.ndarray:
+        sec = self.header["sections"][name]
+        count = math.prod(sec["shape"])
+        arr = np.frombuffer(self._mm, dtype=np.dtype(sec["dtype"]), count=count, offset=sec["offset"])
+        return arr.reshape(sec["shape"])
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    # -- batched lookups -----------------------------------------------------
+    def index(self, tokens: Sequence[str]) -> np.ndarray:
+        """Row of each token in the word table, -1 when absent."""
+        if not tokens:
+            return np.zeros(0, dtype=np.int64)
+        enc = [t.encode("utf-8") for t in tokens]
+        fits = np.fromiter((0 < len(e) <= self.width for e in enc), dtype=bool, count=len(enc))
+        query = np.array([e if ok else b"" for e, ok in zip(enc, fits)], dtype=self.words.dtype)
+        pos = np.searchsorted(self.words, query)
+        pos_c = np.minimum(pos, len(self.words) - 1)
+        found = fits & (pos < len(self.words)) & (self.words[pos_c] == query)
+        return np.where(found, pos_c, -1)
+
+    def contains(self, tokens: Sequence[str]) -> np.ndarray:
+        return self.index(tokens) >= 0
+
+    def with_prefix(self, prefix: str) -> list[str]:
+        """Words starting with `prefix`, in table (sorted) order."""
+        p = prefix.encode("utf-8")
+        lo, hi = np.searchsorted(self.words, np.array([p, p + b"\xff"]))
+        return [w.decode("utf-8") for w in self.words[lo:hi].tolist()]
+
+    def familiarity(self, tokens: Sequence[str]) -> np.ndarray:
+        """Per-token familiarity in [0, 1] from the frequency rank:
+        1 - 0.5 * log1p(rank) / log1p(n_ranked) for ranked words (0.5 .. 1),
+        0.5 for known but unranked (domain-only) words, 0 for unknown tokens."""
+        idx = self.index(tokens)
+        out = np.zeros(len(idx), dtype=np.float64)
+        known = idx >= 0
+        ranks = self.ranks[idx[known]].astype(np.float64)
+        scale = math.log1p(max(1, self.n_ranked))
+        out[known] = np.where(ranks == UNRANKED, 0.5, 1.0 - 0.5 * np.log1p(ranks) / scale)
+        return out
+
+    def domain_hits(self, tokens: Sequence[str]) -> np.ndarray:
+        """(len(tokens), n_domains) bool — token t belongs to domain d."""
+        idx = self.index(tokens)
+        hits = np.zeros((len(idx), len(self.domains)), dtype=bool)
+        known = idx >= 0
+        if known.any():
+            bits = np.unpackbits(self.masks[idx[known]].view(np.uint8), axis=1, bitorder="little")
+            hits[known] = bits[:, :len(self.domains)].astype(bool)
+        return hits
+
+    def _postings(self, uniq: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(token position, domain id, weight) of every posting of `uniq`."""
+        idx = self.index(uniq)
+        pos = np.flatnonzero(idx >= 0)
+        starts = self.post_ptr[idx[pos]].astype(np.int64)
+        lens = self.post_ptr[idx[pos] + 1].astype(np.int64) - starts
+        # Flattened ranges [start, start + len) of every known token.
+        sel = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+        return np.repeat(pos, lens), self.post_dom[sel], self.post_w[sel]
+
+    def domain_members(self, tokens: Sequence[str], domain: str) -> set[str]:
+        """The tokens that belong to `domain` (a pinned snippet domain)."""
+        if domain not in self._domain_ids:
+            raise ValueError(f"Unknown domain {domain!r}")
+        uniq = list(dict.fromkeys(tokens))
+        tok, dom, _ = self._postings(uniq)
+        return {uniq[i] for i in tok[dom == self._domain_ids[domain]]}
+
+    def infer_domain(self, tokens: Sequence[str]) -> tuple[str | None, set[str]]:
+        """Domain with the highest summed posting weight over a snippet's
+        tokens (repeats count), and the snippet's tokens that belong to it
+        (None / empty when no token is in any domain)."""
+        uniq = list(dict.fromkeys(tokens))
+        if not uniq:
+            return None, set()
+        mult = Counter(tokens)
+        tok, dom, w = self._postings(uniq)
+        if not len(dom):
+            return None, set()
+        weights = w * np.array([mult[uniq[i]] for i in tok], dtype=np.float32)
+        ids, inv = np.unique(dom, return_inverse=True)
+        best = int(ids[np.argmax(np.bincount(inv, weights))])   # ties -> lowest id
+        return self.domains[best], {uniq[i] for i in tok[dom == best]}
+
+
+# ============================== building ================================
+def read_word_list(path: str | Path) -> list[str]:
+    """One word per line, most frequent first (google-10000-english.txt)."""
+    with open(path, encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip()]
+
+
+def read_domain_terms(path: str | Path) -> dict[str, list[tuple[str, float]]]:
+    """(term, frequency) pairs per domain from a domain-term CSV. Two layouts
+    are understood:
+
+      Domain,Term,Type   (header optional) — domain from the first column,
+                         frequency 1 per row
+      Term,Frequency     — domain from the file name (`<repo>_domain_terms.csv`)
+
+    Other layouts return {} so a whole directory can be passed in.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as fh:
+        rows = [r for r in csv.reader(fh) if r]
+    if not rows:
+        return {}
+    head = [c.strip().lower() for c in rows[0]]
+    if head[:2] == ["term", "frequency"]:
+        domain = path.stem.removesuffix("_domain_terms").lower()
+        return {domain: [(r[0], _frequency(r)) for r in rows[1:]]}
+    if head[:2] == ["domain", "term"]:
+        rows = rows[1:]
+    elif len(head) != 3:
+        return {}
+    out: dict[str, list[tuple[str, float]]] = defaultdict(list)
+    for r in rows:
+        if len(r) >= 2:
+            out[r[0].strip().lower()].append((r[1], 1.0))
+    return dict(out)
+
+
+def _frequency(row: list[str]) -> float:
+    try:
+        return max(1.0, float(row[1]))
+    except (IndexError, ValueError):
+        return 1.0
+
+
+def build_lexicon(out_path: str | Path, ranked_words: Iterable[str],
+                  domain_terms: dict[str, list], extra_words: Iterable[str] = ()) -> Path:
+    """Write a compiled lexicon.
+
+    ranked_words : words, most frequent first (rank = position)
+    domain_terms : domain name -> raw terms or (term, frequency) pairs
+                   (normalised here; a bare term has frequency 1)
+    extra_words  : unranked vocabulary (e.g. the built-in common words)
+    """
+    ranks: dict[str, int] = {}
+    for r, word in enumerate(ranked_words):
+        for tok in [word.lower()] + normalise_term(word):
+            ranks.setdefault(tok, r)
+    n_ranked = len(ranks)
+    for word in extra_words:
+        for tok in [word.lower()] + normalise_term(word):
+            ranks.setdefault(tok, UNRANKED)
+
+    domains = sorted(domain_terms)
+    tf: dict[str, dict[int, float]] = defaultdict(lambda: defaultdict(float))
+    for d, name in enumerate(domains):
+        for term in domain_terms[name]:
+            term, freq = (term, 1.0) if isinstance(term, str) else term
+            for tok in normalise_term(term):
+                tf[tok][d] += freq
+                ranks.setdefault(tok, UNRANKED)
+
+    vocab = sorted(w for w in ranks if 0 < len(w.encode("utf-8")) <= MAX_WIDTH)
+    width = max((len(w.encode("utf-8")) for w in vocab), default=1)
+    n_mask = max(1, -(-len(domains) // 64))
+    words = np.array([w.encode("utf-8") for w in vocab], dtype=f"S{width}")
+    rank_arr = np.array([ranks[w] for w in vocab], dtype=np.uint32)
+    masks = np.zeros((len(vocab), n_mask), dtype=np.uint64)
+    post_ptr = np.zeros(len(vocab) + 1, dtype=np.uint32)
+    post_dom: list[int] = []
+    post_w: list[float] = []
+    for i, w in enumerate(vocab):
+        postings = sorted(tf.get(w, {}).items())
+        idf = math.log1p(len(domains) / max(1, len(postings)))
+        for d, f in postings:
+            masks[i, d // 64] |= np.uint64(1) << np.uint64(d % 64)
+            post_dom.append(d)
+            post_w.append((1.0 + math.log(f)) * idf)
+        post_ptr[i + 1] = len(post_dom)
+
+    arrays = {"words": words, "ranks": rank_arr, "masks": masks, "post_ptr": post_ptr,
+              "post_dom": np.array(post_dom, dtype=np.uint32),
+              "post_w": np.array(post_w, dtype=np.float32)}
+    digest = hashlib.sha1()
+    for a in arrays.values():
+        digest.update(a.tobytes())
+    digest.update(json.dumps(domains).encode())
+    header = {"version": 2, "domains": domains, "n_ranked": n_ranked,
+              "fingerprint": digest.hexdigest()[:12], "sections": {}}
+
+    # Offsets depend on the header length, which depends on the offsets:
+    # reserve generously, then lay the sections out after it.
+    reserve = len(json.dumps(header)) + 256 * len(arrays) + 64
+    offset = -(-(len(MAGIC) + 4 + reserve) // _ALIGN) * _ALIGN
+    for name, a in arrays.items():
+        header["sections"][name] = {"offset": offset, "dtype": a.dtype.str, "shape": list(a.shape)}
+        offset = -(-(offset + a.nbytes) // _ALIGN) * _ALIGN
+    blob = json.dumps(header).encode("utf-8")
+    assert len(blob) <= reserve
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "wb") as fh:
+        fh.write(MAGIC + struct.pack("<I", len(blob)) + blob)
+        for name, a in arrays.items():
+            fh.write(b"\0" * (header["sections"][name]["offset"] - fh.tell()))
+            fh.write(a.tobytes())
+    return out_path
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build_lexicon(Path(tmp) / "demo.lex", ["the", "user", "price", "count"],
+                             {"finance": [("TaxRate", 3), "price"], "web": ["UserSession"]},
+                             extra_words=["subtotal"])
+        lex = Lexicon(path)
+        toks = ["user", "price", "tax", "subtotal", "xq"]
+        print(len(lex), "words; domains", lex.domains, "fingerprint", lex.fingerprint)
+        print("contains   ", dict(zip(toks, lex.contains(toks).tolist())))
+        print("familiarity", dict(zip(toks, lex.familiarity(toks).round(3).tolist())))
+        print("domain     ", lex.infer_domain(["price", "tax", "user"]),
+              "pinned web:", lex.domain_members(["price", "user"], "web"))
+        print("torch imported:", "torch" in sys.modules)
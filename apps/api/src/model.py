@@ -112,6 +112,10 @@ class SABiLSTM(nn.Module):
     def _encode(self, embed, feats, struct):
         x = torch.cat([embed, feats], dim=-1)  # (B, T, embed+feat)
         x = self.input_proj(x)                 # (B, T, hidden)
+        return self._encode_projected(x, struct)
+
+    def _encode_projected(self, x, struct):
+        """_encode() after input_proj — lets callers reuse the projected embedding."""
         h_seq, _ = self.lstm(x)                # (B, T, hidden*2)
         context, alpha = self.attn(h_seq)      # (B, hidden*2), (B, T, n_heads)
         if struct is not None and self.struct_dim > 0:
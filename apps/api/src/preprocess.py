@@ -1,7 +1,7 @@
 """Identifier extraction and normalisation (Paper 1, Section 3.1).
 
 Python  → standard-library ast (robust, no external grammar).
-C++     → regex-based extractor (good for the demo; swap in tree-sitter for production).
+C++     → single-pass lexer + brace-scope state machine (linear time, no grammar).
 
 After extraction, identifiers are lexically normalised:
   - camelCase  →  ["camel", "case"]
@@ -15,8 +15,9 @@ from __future__ import annotations
 
 import ast
 import re
+from bisect import bisect_left
 from dataclasses import dataclass, field
-from typing import Iterable
+from typing import Iterable, Iterator
 
 # ----------------------------- stop words -----------------------------
 _CODE_STOPWORDS = {
@@ -108,39 +109,451 @@ def extract_python(code: str) -> list[Identifier]:
 
 
 # ============================ C++ ======================================
-# Pragmatic regex pass. For production, replace with tree-sitter-cpp.
-_CPP_FN_RE   = re.compile(r"\b(?:[\w:*&<>,\s]+?)\s+(\w+)\s*\([^;{}]*\)\s*(?:const)?\s*\{")
-_CPP_CLASS_RE = re.compile(r"\b(?:class|struct)\s+(\w+)")
-_CPP_PARAM_RE = re.compile(r"\(([^)]*)\)")
-_CPP_VAR_RE   = re.compile(
-    r"\b(?:int|float|double|bool|char|void|auto|std::\w+|long|short|unsigned|signed)"
-    r"(?:\s*<[^>]+>)?\s*\**\s*&?\s*(\w+)\s*(?:=|;|,)"
-)
-
+# One linear pass: a token regex (no nested quantifiers, so no backtracking)
+# drops comments, string/char literals and preprocessor lines, and a small
+# brace-scope state machine classifies each statement as it ends. Scope
+# sizes are the line spans of the braces that own each identifier, like the
+# Python visitor's node spans; file-level names get the same "infinite" scope.
+_CPP_TOKEN_RE = re.compile(r"""
+    (?P<pp>^[ \t]*\#(?:[^\n\\]|\\.)*)
+  | (?P<com>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<str>(?:u8|[uUL])?R"(?P<delim>[^()\\\s]{0,16})\(.*?\)(?P=delim)"
+           |(?:u8|[uUL])?"(?:[^"\\\n]|\\.)*"
+           |(?:u8|[uUL])?'(?:[^'\\\n]|\\.)*')
+  | (?P<id>[A-Za-z_]\w*)
+  | (?P<num>\.?\d(?:[eEpP][+-]|[\w.'])*)
+  | (?P<op>::|->|\.\.\.|&&|\|\||<<|\+\+|--|[-+*/%&|^!=<]=|\S)
+""", re.X | re.S | re.M)
+
+_CPP_TYPE_WORDS = frozenset({
+    "auto", "bool", "char", "char8_t", "char16_t", "char32_t", "const", "constexpr",
+    "consteval", "constinit", "double", "explicit", "extern", "float", "inline", "int",
+    "long", "mutable", "register", "short", "signed", "static", "thread_local", "typename",
+    "unsigned", "virtual", "void", "volatile", "wchar_t", "struct", "class", "enum", "union",
+})
+# Words that only appear in statements that declare nothing.
+_CPP_EXPR_WORDS = frozenset({
+    "return", "throw", "delete", "new", "goto", "case", "using", "typedef", "namespace",
+    "break", "continue", "co_return", "co_yield", "co_await", "static_assert", "sizeof",
+    "alignof", "typeid", "this", "if", "else", "for", "while", "do", "switch", "try",
+    "catch", "true", "false", "nullptr",
+})
+# ... plus specifiers that are never declared names.
+_CPP_NOT_DECL = _CPP_EXPR_WORDS | {
+    "default", "friend", "decltype", "noexcept", "operator", "public", "private",
+    "protected", "requires", "template", "alignas", "__attribute__", "__declspec",
+    "final", "override",
+}
+_CPP_KEYWORDS = _CPP_TYPE_WORDS | _CPP_NOT_DECL
+_CPP_CONTROL = frozenset({"if", "for", "while", "switch", "catch", "do", "try", "else"})
+_CPP_DECL_END = frozenset({"=", ",", "{}", "[", "(", ":"})
+_CPP_TYPE_OPS = frozenset({"::", "*", "&", "&&", "<", ">", "...", "(", ")", "[", "]", "{}", "~"})
+_CPP_TAIL_OPS = frozenset({"&", "&&", "->", "::", "<", ">", "*", "(", ")", "[", "]", "..."})
+_CPP_TAGS = frozenset({"class", "struct", "union", "enum"})
+_CPP_EXPR_FRAMES = ("init", "enum")
+_CPP_STRUCTURAL = _CPP_TAGS | {"{", "}", ";", ":", "(", ")", "[", "]"}
+_CPP_BRACE = ("op", "{}", 0)   # placeholder left in a statement for a closed {...}
+
+
+def _cpp_tokens(code: str) -> Iterator[tuple[str, str, int]]:
+    """(kind, text, offset) for every significant token; kind is id/num/str/op.
+    Whitespace matches no alternative, so `finditer` skips it in C."""
+    for m in _CPP_TOKEN_RE.finditer(code):
+        kind = m.lastgroup
+        if kind != "com" and kind != "pp":
+            yield kind, m.group(), m.start()
+
+
+def _cpp_depths(toks: list[tuple[str, str, int]]) -> list[int]:
+    """Nesting depth of each token in (), [] and template <>; an opener and
+    its closer sit at the outer depth. `<` only opens after a name, and a
+    closing `)`/`]` discards unmatched `<`, so comparisons cannot leak. A
+    logical `&&` / `||` inside the brackets marks `a < b && c > d` as two
+    comparisons unless the name is qualified (`std::enable_if_t<A && B>`)."""
+    # Pass 1: which "<" / ">" pairs are template brackets.
+    pairs: set[int] = set()
+    stack: list[tuple[str, int, bool]] = []
+    prev: tuple[str, str, int] | None = None
+    n = len(toks)
+    for k, tok in enumerate(toks):
+        t = tok[1]
+        if t == ")" or t == "]":
+            while stack and stack[-1][0] == "<":
+                stack.pop()
+            if stack:
+                stack.pop()
+        elif t == ">" and stack and stack[-1][0] == "<":
+            pairs.add(stack.pop()[1])
+            pairs.add(k)
+        elif t == "(" or t == "[":
+            stack.append((t, k, False))
+        elif t == "<" and prev is not None and prev[0] == "id" and prev[1] != "operator":
+            stack.append((t, k, k >= 2 and toks[k - 2][1] == "::"))
+        elif (t == "||" or (t == "&&" and k + 1 < n and toks[k + 1][1] not in (">", ",", "..."))) \
+                and stack and stack[-1][0] == "<" and not stack[-1][2]:
+            stack.pop()                                 # a comparison, not a template
+        prev = tok
+    # Pass 2: depths over (), [] and the template pairs only.
+    depths: list[int] = []
+    depth = 0
+    for k, tok in enumerate(toks):
+        t = tok[1]
+        if t == ")" or t == "]" or (t == ">" and k in pairs):
+            depth = max(0, depth - 1)
+            depths.append(depth)
+        else:
+            depths.append(depth)
+            if t == "(" or t == "[" or (t == "<" and k in pairs):
+                depth += 1
+    return depths
+
+
+def _cpp_declarators(toks: list[tuple[str, str, int]],
+                     depths: list[int] | None = None) -> list[tuple[str, str, int]]:
+    """Names declared by one statement (`int a = 1, *b;`), or [] when the
+    statement is not a declaration. The end of `toks` acts as `;`."""
+    if depths is None:
+        depths = _cpp_depths(toks)
+    at = [k for k, d in enumerate(depths) if d == 0]
+    top = [toks[k] for k in at]
+    if not top or top[0][1] in _CPP_NOT_DECL:
+        return []
+    names: list[tuple[str, str, int]] = []
+    n = len(top)
+    angles = 0
+    for i, tok in enumerate(top):
+        if tok[0] == "id" and tok[1] not in _CPP_KEYWORDS and (i + 1 == n or top[i + 1][1] in _CPP_DECL_END):
+            prefix = top[:i]
+            if (any(p[0] == "id" or p[1] == "{}" for p in prefix)
+                    and prefix[-1][1] != "::" and prefix[-1][1] != "~"):
+                names.append(tok)
+                break
+        t = tok[1]
+        if t == "<":
+            k = at[i]                                   # unpaired by _cpp_depths: a comparison
+            if k + 1 < len(toks) and not depths[k + 1] and toks[k + 1][1] != ">":
+                return []
+            angles += 1
+        elif t == ">":
+            if not angles:
+                return []                               # a comparison, not a template
+            angles -= 1
+        if tok[0] not in ("id", "str") and t not in _CPP_TYPE_OPS or t in _CPP_EXPR_WORDS:
+            return []
+    else:
+        return []
+    # Further declarators follow top-level commas: `int a = f(x, y), *b;`
+    i += 1
+    while i < n:
+        if top[i][1] != ",":
+            i += 1
+            continue
+        i += 1
+        while i < n and top[i][1] in ("*", "&", "&&", "const"):
+            i += 1
+        if (i < n and top[i][0] == "id" and top[i][1] not in _CPP_KEYWORDS
+                and (i + 1 == n or top[i + 1][1] in _CPP_DECL_END)):
+            names.append(top[i])
+    return names
+
+
+def _cpp_param_names(toks: list[tuple[str, str, int]], depths: list[int],
+                     lo: int, hi: int) -> list[tuple[str, str, int]]:
+    """Named parameters in toks[lo:hi] (the inside of a parameter list)."""
+    level = depths[lo - 1] + 1
+    names: list[tuple[str, str, int]] = []
+    seg: list[tuple[str, str, int]] = []
+    cut = False
+    for k in range(lo, hi + 1):
+        if k == hi or (depths[k] == level and toks[k][1] == ","):
+            if (len(seg) >= 2 and seg[-1][0] == "id" and seg[-1][1] not in _CPP_KEYWORDS
+                    and seg[-2][1] not in ("::", "struct", "class", "enum", "union", "typename")):
+                names.append(seg[-1])
+            seg, cut = [], False
+        elif depths[k] == level and not cut:
+            t = toks[k][1]
+            if t == "=" or (t == "[" and seg):
+                cut = True        # default value / array extent
+            else:
+                seg.append(toks[k])
+    return names
+
+
+def _cpp_class_head(stmt: list[tuple[str, str, int]],
+                    depths: list[int]) -> tuple[str | None, int] | None:
+    """(name or None, offset) when `stmt` opens a class/struct/union/enum body."""
+    for i, (tok, d) in enumerate(zip(stmt, depths)):
+        if d:
+            continue
+        t = tok[1]
+        if t in ("(", "=", "operator"):
+            return None
+        if t in ("class", "struct", "union", "enum"):
+            name = None
+            for tok2, d2 in zip(stmt[i + 1:], depths[i + 1:]):
+                if d2:
+                    continue
+                if tok2[1] == ":" or tok2[1] == "(":
+                    if tok2[1] == "(":
+                        return None
+                    break
+                if tok2[0] == "id" and tok2[1] not in _CPP_KEYWORDS:
+                    name = tok2
+            return (name[1], name[2]) if name else (None, tok[2])
+    return None
+
+
+def _cpp_function_head(stmt: list[tuple[str, str, int]], depths: list[int],
+                       class_name: str | None) -> tuple[tuple[str, str, int] | None, int, int] | None:
+    """(name token or None for operators, "(" index, ")" index) when `stmt`
+    declares or defines a function, else None."""
+    n = len(stmt)
+    for i in range(1, n):
+        if stmt[i][1] != "(" or depths[i]:
+            continue
+        prev = stmt[i - 1]
+        if prev[1] == "operator" and i + 1 < n and stmt[i + 1][1] == ")":
+            continue                                    # the "()" of operator()
+        close = next((k for k in range(i + 1, n) if depths[k] == 0), None)
+        if close is None:
+            return None
+        back = range(i - 1, max(-1, i - 6), -1)
+        op_at = next((k for k in back if stmt[k][1] == "operator"), None)
+        if op_at is not None:
+            name, start = None, op_at
+        elif prev[0] == "id" and prev[1] not in _CPP_KEYWORDS:
+            name, start = prev, i - 1
+            if start > 0 and stmt[start - 1][1] == "~":
+                start -= 1
+            while start >= 2 and stmt[start - 1][1] == "::" and stmt[start - 2][0] == "id":
+                start -= 2
+        else:
+            continue
+        prefix = [t for t, d in zip(stmt[:start], depths[:start]) if d == 0]
+        if any(t[1] in _CPP_EXPR_WORDS or (t[0] in ("op", "num") and t[1] not in _CPP_TYPE_OPS)
+               for t in prefix):
+            return None
+        ctor = name is not None and (
+            name[1] == class_name or stmt[i - 2][1] == "~"
+            or (i >= 3 and stmt[i - 2][1] == "::" and stmt[i - 3][1] == name[1]))
+        if not ctor and name is not None and not any(t[0] == "id" for t in prefix):
+            continue                                    # a call / macro, not a declaration
+        for k in range(close + 1, n):
+            if depths[k]:
+                continue
+            t = stmt[k][1]
+            if t == ":":
+                break                                   # constructor initializer list
+            if t == "=":
+                if k + 1 < n and stmt[k + 1][1] in ("0", "default", "delete"):
+                    break
+                return None
+            if stmt[k][0] != "id" and t not in _CPP_TAIL_OPS:
+                return None
+        return name, i, close
+    return None
+
+
+class _CppFrame:
+    """One open brace scope: what opened it, where, who it owns, and the
+    statement currently being read in it."""
+
+    __slots__ = ("kind", "start", "owned", "name", "stmt", "parens", "init_list", "tagged", "expr")
+
+    def __init__(self, kind: str, start: int, name: str | None = None) -> None:
+        self.kind = kind              # namespace | class | enum | function | block | lambda | init
+        self.start = start            # line of the construct that opened it
+        self.owned: list[Identifier] = []
+        self.name = name              # class name, for constructor detection
+        self.parens = 0
+        self.reset()
+
+    def reset(self, stmt: list[tuple[str, str, int]] | None = None) -> None:
+        self.stmt = stmt if stmt is not None else []
+        self.init_list = False        # inside a constructor's ": a_(x), b_{y}"
+        self.tagged = False           # statement mentions class/struct/union/enum
+        self.expr = False             # a brace in this statement was an expression
+
+
+class _CppScanner:
+    def __init__(self, code: str) -> None:
+        self.newlines = [m.start() for m in re.finditer("\n", code)]
+        self.ids: list[Identifier] = []
 
-def extract_cpp(code: str) -> list[Identifier]:
-    ids: list[Identifier] = []
-    line_count = max(1, code.count("\n") + 1)
-
-    for m in _CPP_CLASS_RE.finditer(code):
-        ids.append(Identifier(m.group(1), "class", scope_size=line_count))
-
-    for m in _CPP_FN_RE.finditer(code):
-        ids.append(Identifier(m.group(1), "function", scope_size=line_count))
-        params = m.group(0).split("(", 1)[1].rsplit(")", 1)[0]
-        for part in params.split(","):
-            part = part.strip()
-            if not part:
+    def line(self, pos: int) -> int:
+        return bisect_left(self.newlines, pos)
+
+    def add(self, tok: tuple[str, str, int], kind: str, owner: list[Identifier] | None,
+            scope_size: int = 0) -> None:
+        ident = Identifier(tok[1], kind, scope_size=scope_size)
+        self.ids.append(ident)
+        if owner is not None:
+            owner.append(ident)
+
+    def run(self, code: str) -> list[Identifier]:
+        root = _CppFrame("namespace", 0)
+        stack = [root]
+        frame = root
+        for tok in _cpp_tokens(code):
+            t = tok[1]
+            if t not in _CPP_STRUCTURAL:
+                frame.stmt.append(tok)                   # the common case: a plain token
+            elif t == "{":
+                frame = self.open(frame, tok[2])
+                stack.append(frame)
+            elif t == "}":
+                if len(stack) > 1:
+                    self.close(stack.pop(), stack[-1], tok[2])
+                    frame = stack[-1]
+            elif t == ";" and not frame.parens:
+                self.end_statement(frame, tok[2])
+                frame.reset()
+            elif t == ":" and not frame.parens and frame.stmt and (
+                    frame.stmt[0][1] in ("public", "private", "protected", "case", "default")
+                    or (len(frame.stmt) == 1 and frame.kind in ("function", "block", "lambda"))):
+                frame.reset()                            # access specifier / case / label
+            else:
+                if t == "(" or t == "[":
+                    frame.parens += 1
+                elif t == ")" or t == "]":
+                    frame.parens = max(0, frame.parens - 1)
+                elif t == ":" and frame.stmt and frame.stmt[-1][1] == ")":
+                    frame.init_list = True
+                elif t in _CPP_TAGS:
+                    frame.tagged = True
+                frame.stmt.append(tok)
+        end = len(code)
+        while stack:                                    # EOF ends every open statement
+            if not stack[-1].parens:
+                self.end_statement(stack[-1], end)
+            if len(stack) == 1:
+                break
+            self.close(stack.pop(), stack[-1], end)
+        for ident in root.owned:
+            ident.scope_size = 10**6                    # file scope, as for Python
+        return self.ids
+
+    def open(self, frame: _CppFrame, pos: int) -> _CppFrame:
+        """Classify the `{` at `pos` from the statement that precedes it."""
+        stmt = frame.stmt
+        prev = stmt[-1] if stmt else None
+        expr_kind = "lambda" if prev is not None and prev[1] in (")", "]", "mutable") else "init"
+        if frame.kind in _CPP_EXPR_FRAMES or frame.parens:
+            return _CppFrame(expr_kind, self.line(pos))
+        if prev is None:
+            return _CppFrame("block", self.line(pos))
+        if frame.init_list and (prev[0] == "id" or prev[1] == ">"):
+            return _CppFrame("init", self.line(pos))    # member initializer a_{x}
+        if not frame.expr:
+            first = stmt[1][1] if stmt[0][1] == "else" and len(stmt) > 1 else stmt[0][1]
+            if frame.kind not in ("namespace", "class") and first in _CPP_CONTROL:
+                new = _CppFrame("block", self.line(stmt[0][2]))
+                for tok in self.header_declarators(stmt):
+                    self.add(tok, "variable", new.owned)
+                frame.reset()
+                return new
+            depths = _cpp_depths(stmt) if frame.tagged or frame.kind in ("namespace", "class") else None
+            head = _cpp_class_head(stmt, depths) if frame.tagged else None
+            if head is not None:
+                name, at = head
+                new = _CppFrame("enum" if any(t[1] == "enum" for t in stmt) else "class",
+                                self.line(at), name)
+                if name is not None:
+                    self.add(("id", name, at), "class", new.owned)
+                return new
+            if frame.kind in ("namespace", "class"):
+                if any(t[1] == "namespace" for t in stmt) or (first == "extern" and len(stmt) == 2):
+                    frame.reset()
+                    return _CppFrame("namespace", self.line(stmt[0][2]))
+                fn = _cpp_function_head(stmt, depths, frame.name)
+                if fn is not None:
+                    name, lo, hi = fn
+                    new = _CppFrame("function", self.line(name[2] if name else stmt[lo][2]))
+                    if name is not None:
+                        self.add(name, "function", new.owned)
+                    for tok in _cpp_param_names(stmt, depths, lo + 1, hi):
+                        self.add(tok, "param", new.owned)
+                    frame.reset()
+                    return new
+            frame.expr = True
+        return _CppFrame(expr_kind, self.line(pos))
+
+    def close(self, frame: _CppFrame, parent: _CppFrame, pos: int) -> None:
+        size = max(1, self.line(pos) - frame.start)
+        for ident in frame.owned:
+            ident.scope_size = size
+        if frame.kind in ("init", "lambda"):
+            parent.stmt.append(_CPP_BRACE)
+        elif frame.kind in ("class", "enum"):
+            # `struct {...} s;` declares s; `typedef struct {...} T;` does not.
+            typedef = bool(parent.stmt) and parent.stmt[0][1] == "typedef"
+            parent.reset([("id", "typedef", pos), _CPP_BRACE] if typedef else [_CPP_BRACE])
+
+    def header_declarators(self, stmt: list[tuple[str, str, int]]) -> list[tuple[str, str, int]]:
+        """Variables declared in control headers: `for (int i = 0; ...)`,
+        `catch (const E& e)`, `if (auto* p = f(); p)`, including brace-less
+        nests such as `for (...) for (int j ...) ...`."""
+        depths = _cpp_depths(stmt)
+        names: list[tuple[str, str, int]] = []
+        k, n = 0, len(stmt)
+        while k < n:
+            t = stmt[k][1]
+            if t in ("else", "do", "try", "constexpr"):
+                k += 1
                 continue
-            # last whitespace-separated token, stripped of *, &
-            name = re.sub(r"[*&\[\]]", "", part.split()[-1]).strip()
-            if re.fullmatch(r"[A-Za-z_]\w*", name):
-                ids.append(Identifier(name, "param", scope_size=line_count))
+            if t not in ("if", "for", "while", "switch", "catch"):
+                break
+            k += 1
+            if k < n and stmt[k][1] == "constexpr":
+                k += 1
+            if k >= n or stmt[k][1] != "(":
+                break
+            close = next((j for j in range(k + 1, n) if depths[j] == depths[k]), n)
+            end = next((j for j in range(k + 1, close)
+                        if depths[j] == depths[k] + 1 and stmt[j][1] in (";", ":")), close)
+            names += _cpp_declarators(stmt[k + 1:end])
+            k = close + 1
+        return names
+
+    def end_statement(self, frame: _CppFrame, pos: int) -> None:
+        stmt = frame.stmt
+        if not stmt or frame.kind in _CPP_EXPR_FRAMES:
+            return
+        first = stmt[1][1] if stmt[0][1] == "else" and len(stmt) > 1 else stmt[0][1]
+        if first in _CPP_CONTROL:
+            # braceless body: header variables live until this `;`
+            size = max(1, self.line(pos) - self.line(stmt[0][2]))
+            for tok in self.header_declarators(stmt):
+                self.add(tok, "variable", None, size)
+            return
+        depths = _cpp_depths(stmt)
+        if stmt[0][1] == "template":
+            k = next((j for j in range(2, len(stmt)) if depths[j] == 0 and stmt[j][1] == ">"), None)
+            if k is None or k + 1 == len(stmt):
+                return
+            stmt, depths = stmt[k + 1:], depths[k + 1:]
+        owner = frame.owned
+        if frame.kind in ("namespace", "class"):
+            fn = _cpp_function_head(stmt, depths, frame.name)
+            if fn is not None and stmt[0][1] != "friend":
+                name, lo, hi = fn
+                params = _cpp_param_names(stmt, depths, lo + 1, hi)
+                if frame.kind == "class" or hi == lo + 1 or params or any(
+                        t[1] in _CPP_TYPE_WORDS for t in stmt[lo + 1:hi]):
+                    if name is not None:
+                        self.add(name, "function", owner)
+                    size = max(1, self.line(pos) - self.line(stmt[lo][2]))
+                    for tok in params:
+                        self.add(tok, "param", None, size)
+                    return
+        for tok in _cpp_declarators(stmt, depths):
+            self.add(tok, "variable", owner)
 
-    for m in _CPP_VAR_RE.finditer(code):
-        ids.append(Identifier(m.group(1), "variable", scope_size=line_count))
 
-    return ids
+def extract_cpp(code: str) -> list[Identifier]:
+    """Classes, functions (definitions and declarations), parameters and
+    variables of C++ source, in source order, with brace-based scope sizes."""
+    return _CppScanner(code).run(code)
 
 
 def _extract_regex_fallback(code: str) -> list[Identifier]:
@@ -192,6 +605,12 @@ def _clean_tokens(tokens: list[str]) -> list[str]:
     return cleaned
 
 
+def split_identifier(name: str) -> list[str]:
+    """The lower-cased camelCase / snake_case / digit pieces of a name,
+    before stopword removal (what rename suggestions rebuild names from)."""
+    return _split_token(name)
+
+
 def normalise(identifiers: list[Identifier]) -> list[Identifier]:
     """Populate `tokens` for each Identifier in-place and return the same list."""
     for ident in identifiers:
@@ -201,16 +620,19 @@ def normalise(identifiers: list[Identifier]) -> list[Identifier]:
 
 
 # ============================ public API ===============================
-def extract_and_normalise(code: str, language: str) -> list[Identifier]:
-    """Top-level: extract identifiers from `code`, normalise, return them."""
+def extract(code: str, language: str) -> list[Identifier]:
+    """Extract identifiers from `code` without normalising them."""
     language = language.lower()
     if language in {"py", "python"}:
-        ids = extract_python(code)
-    elif language in {"cpp", "c++", "cxx"}:
-        ids = extract_cpp(code)
-    else:
-        raise ValueError(f"Unsupported language: {language}")
-    return normalise(ids)
+        return extract_python(code)
+    if language in {"cpp", "c++", "cxx"}:
+        return extract_cpp(code)
+    raise ValueError(f"Unsupported language: {language}")
+
+
+def extract_and_normalise(code: str, language: str) -> list[Identifier]:
+    """Top-level: extract identifiers from `code`, normalise, return them."""
+    return normalise(extract(code, language))
 
 
 if __name__ == "__main__":  # quick self-test
@@ -221,3 +643,14 @@ if __name__ == "__main__":  # quick self-test
     )
     for ident in extract_and_normalise(snippet, "python"):
         print(f"{ident.kind:>10}  {ident.raw:>22}  ->  {ident.tokens}")
+
+    cpp_cases = {
+        "int a0, a1;": ["a0", "a1"],
+        "int a0, a1": ["a0", "a1"],                                     # no `;` before EOF
+        "void f() { if (a < b && c > d) { int x = 1; } }": ["f", "x"],  # comparisons, no template
+        "std::vector<std::pair<int, T&&>> v;": ["v"],
+    }
+    for source, expected in cpp_cases.items():
+        got = [ident.raw for ident in extract_cpp(source)]
+        assert got == expected, (source, got)
+    print(f"C++: {len(cpp_cases)} lexer cases ok")
@@ -0,0 +1,86 @@
+"""On-demand profiling of a single API request.
+
+Off by default; set PROFILING_ENABLED=1 and send `X-Profile: 1` (or
+`?profile=1`) to run that one request under cProfile plus the torch CPU
+profiler. The caller gets a compact summary — top-N Python functions by
+cumulative time and top-N torch operators by self CPU time — and the full
+profiles are written to PROFILE_DIR for offline inspection:
+
+    <stamp>_<endpoint>.prof        # pstats dump:  python -m pstats <file>
+    <stamp>_<endpoint>.trace.json  # chrome://tracing / Perfetto
+
+Profiled requests are serialised behind a lock: only one Python profiler can
+be active per interpreter, and they are rare by design.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") in {"1", "true", "yes"}
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "artifacts/profiles"))
+PROFILE_TOP_N = int(os.environ.get("PROFILE_TOP_N", "25"))
+
+_lock = threading.Lock()
+
+
+def _func_label(key: tuple[str, int, str]) -> str:
+    filename, line, func = key
+    if filename == "~":                      # built-ins: ('~', 0, "<built-in method ...>")
+        return func
+    parts = Path(filename).parts
+    short = "/".join(parts[-2:]) if len(parts) > 1 else filename
+    return f"{short}:{line}({func})"
+
+
+def _top_functions(profiler: cProfile.Profile, top_n: int) -> list[dict]:
+    stats = pstats.Stats(profiler).stats     # key -> (cc, ncalls, tottime, cumtime, callers)
+    rows = sorted(stats.items(), key=lambda kv: kv[1][3], reverse=True)[:top_n]
+    return [{"function": _func_label(key), "ncalls": nc,
+             "tottime_ms": round(tt * 1000, 3), "cumtime_ms": round(ct * 1000, 3)}
+            for key, (_, nc, tt, ct, _) in rows]
+
+
+def _top_torch_ops(prof, top_n: int) -> list[dict]:
+    events = sorted(prof.key_averages(), key=lambda e: e.self_cpu_time_total, reverse=True)
+    return [{"op": e.key, "calls": e.count,
+             "self_cpu_ms": round(e.self_cpu_time_total / 1000, 3),
+             "cpu_total_ms": round(e.cpu_time_total / 1000, 3)}
+            for e in events[:top_n]]
+
+
+def run_profiled(fn: Callable[[], Any], endpoint: str, top_n: int = PROFILE_TOP_N,
+                 save_dir: Path | None = PROFILE_DIR) -> tuple[Any, dict]:
+    """Run `fn()` under cProfile + torch.profiler; return (result, summary)."""
+    from torch.profiler import ProfilerActivity, profile
+
+    with _lock:
+        profiler = cProfile.Profile()
+        t0 = time.perf_counter()
+        with profile(activities=[ProfilerActivity.CPU]) as torch_prof:
+            profiler.enable()
+            try:
+                result = fn()
+            finally:
+                profiler.disable()
+        wall = time.perf_counter() - t0
+
+    summary: dict[str, Any] = {
+        "endpoint": endpoint,
+        "wall_ms": round(wall * 1000, 3),
+        "top_functions": _top_functions(profiler, top_n),
+        "torch_ops": _top_torch_ops(torch_prof, top_n),
+    }
+    if save_dir is not None:
+        save_dir.mkdir(parents=True, exist_ok=True)
+        stem = save_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**6:06d}_{endpoint}"
+        profiler.dump_stats(f"{stem}.prof")
+        torch_prof.export_chrome_trace(f"{stem}.trace.json")
+        summary["saved_to"] = [f"{stem}.prof", f"{stem}.trace.json"]
+    return result, summary
@@ -0,0 +1,180 @@
+"""Counterfactual rename suggestions for weak identifiers.
+
+An identifier is *weak* when its Meaningful Clarity or Naming Conformance is
+below 0.5 (the same rule `_build_explanation` uses to flag it). For each weak
+identifier we generate candidate names from its own tokens:
+
+  - case fixes      : the tokens re-joined in the convention for its kind
+                      (PascalCase for classes, snake_case otherwise)
+  - expansions      : common abbreviations spelled out (cnt -> count, idx -> index)
+  - lexicon words   : non-words replaced by words they abbreviate, from the
+                      active vocabulary (built-in or `use_lexicon`), which
+                      also decides what counts as a word (prc -> price)
+
+All candidates of all weak identifiers are scored together: their feature
+rows come from `candidate_features` (each candidate placed among the snippet's
+other identifiers), their embeddings from one batched embedder call, and the
+SA-BiLSTM sees one batch in which every row is the original snippet with only
+that candidate's slot substituted. Row 0 is the unmodified snippet, so the
+uplift of a candidate is P(target | renamed) - P(target | original).
+"""
+
+from __future__ import annotations
+
+import keyword
+from itertools import islice, product
+
+import numpy as np
+
+from .features import FEATURE_NAMES, candidate_features, known_words, vocabulary_words
+from .preprocess import Identifier, normalise, split_identifier
+
+WEAK_THRESHOLD = 0.5
+
+_ABBREVIATIONS = {
+    "addr": "address", "amt": "amount", "arg": "argument", "arr": "array",
+    "avg": "average", "buf": "buffer", "calc": "calculate", "cfg": "config",
+    "cnt": "count", "col": "column", "conf": "config", "ctx": "context",
+    "cur": "current", "db": "database", "del": "delete", "dest": "destination",
+    "dict": "mapping", "dir": "directory", "dst": "destination", "elem": "element",
+    "err": "error", "fn": "function", "idx": "index", "img": "image",
+    "init": "initial", "len": "length", "lst": "list", "max": "maximum",
+    "min": "minimum", "msg": "message", "num": "number", "obj": "object",
+    "param": "parameter", "pos": "position", "prev": "previous", "pwd": "password",
+    "qty": "quantity", "req": "request", "res": "result", "resp": "response",
+    "ret": "result", "src": "source", "str": "string", "tmp": "temporary",
+    "usr": "user", "val": "value", "var": "variable",
+}
+
+
+def is_weak(name: str, mc: float, nc: float) -> bool:
+    """Low clarity or conformance; dunders (__init__ ...) are conventional."""
+    if name.startswith("__") and name.endswith("__"):
+        return False
+    return mc < WEAK_THRESHOLD or nc < WEAK_THRESHOLD
+
+
+def _is_subsequence(short: str, word: str) -> bool:
+    it = iter(word)
+    return all(c in it for c in short)
+
+
+def _lexicon_matches(token: str, limit: int) -> list[str]:
+    """Words of the active vocabulary starting with `token`'s first letter
+    that contain its letters in order — shortest (closest) first."""
+    hits = [w for w in vocabulary_words(token[0])
+            if len(w) > len(token) and _is_subsequence(token, w)]
+    return sorted(hits, key=lambda w: (len(w) - len(token), w))[:limit]
+
+
+def _token_options(token: str, is_word: bool, per_token: int) -> list[str]:
+    """Replacement options for one token, preferred first: a known word keeps
+    itself first, a non-word puts its expansions / lexicon matches first."""
+    options = []
+    if token in _ABBREVIATIONS:
+        options.append(_ABBREVIATIONS[token])
+    if token.isalpha() and not is_word:
+        options.extend(_lexicon_matches(token, per_token))
+    if is_word or not token.isalpha():
+        options.insert(0, token)
+    else:
+        options.append(token)
+    return list(dict.fromkeys(options))
+
+
+def _render(tokens: tuple[str, ...], kind: str) -> str:
+    if kind == "class":
+        return "".join(t.capitalize() for t in tokens)
+    return "_".join(tokens)
+
+
+def rename_candidates(ident: Identifier, taken: set[str], max_candidates: int = 16,
+                      per_token: int = 3) -> list[str]:
+    """Candidate names for `ident`, best-guess first, excluding names in `taken`."""
+    tokens = split_identifier(ident.raw)
+    if not tokens:
+        return []
+    options = [_token_options(t, is_word, per_token)
+               for t, is_word in zip(tokens, known_words(tokens))]
+    # Rank combinations by how far they stray from every token's preferred
+    # option; the product is capped because long names with many options explode.
+    combos = sorted(islice(product(*(range(len(o)) for o in options)), 1024), key=sum)
+    out: list[str] = []
+    for combo in combos:
+        name = _render(tuple(o[i] for o, i in zip(options, combo)), ident.kind)
+        if (name and name != ident.raw and name not in taken and name not in out
+                and name.isidentifier() and not keyword.iskeyword(name)):
+            out.append(name)
+        if len(out) >= max_candidates:
+            break
+    return out
+
+
+def suggest_renames(model, embedder, idents: list[Identifier], embed_seq: np.ndarray,
+                    feat_seq: np.ndarray, struct_vec: np.ndarray | None, target: int,
+                    top_k: int = 3, max_candidates: int = 16, max_total: int = 256,
+                    domain: str | None = None) -> dict:
+    """Top-k renames per weak identifier, ranked by uplift of P(target).
+
+    embed_seq / feat_seq are the padded (T, ·) model inputs of the snippet;
+    `idents` are its first len(idents) rows. Returns the original snippet's
+    class probabilities, the number of candidates scored and, per weak
+    identifier, its suggestions. `max_total` bounds the batch (and memory):
+    with many weak identifiers each gets fewer candidates. `domain` is the
+    pinned snippet domain the original rows were computed with (None = auto).
+    """
+    import torch
+
+    mc, nc = FEATURE_NAMES.index("MC"), FEATURE_NAMES.index("NC")
+    weak = [j for j, ident in enumerate(idents)
+            if is_weak(ident.raw, feat_seq[j, mc], feat_seq[j, nc])]
+    taken = {i.raw for i in idents}
+    per_ident = max(1, min(max_candidates, max_total // max(1, len(weak))))
+
+    slots: list[int] = []
+    cands: list[Identifier] = []
+    rows = [np.zeros((0, len(FEATURE_NAMES)), dtype=np.float32)]
+    for j in weak:
+        names = rename_candidates(idents[j], taken, per_ident)
+        group = normalise([Identifier(n, idents[j].kind, scope_size=idents[j].scope_size)
+                           for n in names])
+        rows.append(candidate_features(group, idents[:j] + idents[j + 1:], domain=domain))
+        slots.extend([j] * len(group))
+        cands.extend(group)
+
+    cand_feats = np.concatenate(rows)
+    cand_embeds = embedder.encode_identifiers_batch([c.tokens for c in cands])
+    batch_e = np.repeat(embed_seq[None], len(cands) + 1, axis=0)
+    batch_f = np.repeat(feat_seq[None], len(cands) + 1, axis=0)
+    batch_e[np.arange(1, len(cands) + 1), slots] = cand_embeds
+    batch_f[np.arange(1, len(cands) + 1), slots] = cand_feats
+    with torch.no_grad():
+        s = (torch.from_numpy(struct_vec).float()[None].expand(len(batch_e), -1)
+             if struct_vec is not None else None)
+        logits = model(torch.from_numpy(batch_e), torch.from_numpy(batch_f), s)
+        probs = torch.softmax(logits, dim=-1).numpy()
+    p = probs[:, target]
+    base = float(p[0])
+
+    out = []
+    for j in weak:
+        scored = [
+            {"name": c.raw, "p_target": float(p[k + 1]), "uplift": float(p[k + 1]) - base,
+             "features": dict(zip(FEATURE_NAMES, cand_feats[k].tolist()))}
+            for k, (slot, c) in enumerate(zip(slots, cands)) if slot == j
+        ]
+        scored.sort(key=lambda r: r["uplift"], reverse=True)
+        out.append({
+            "name": idents[j].raw,
+            "kind": idents[j].kind,
+            "features": {"MC": float(feat_seq[j, mc]), "NC": float(feat_seq[j, nc])},
+            "suggestions": scored[:top_k],
+        })
+    return {"probabilities": probs[0], "candidates": len(cands), "weak": out}
+
+
+if __name__ == "__main__":
+    for raw, kind in [("calcTotPrc", "function"), ("usr_cnt", "variable"),
+                      ("shopping_cart", "class"), ("x", "param")]:
+        ident = normalise([Identifier(raw, kind)])[0]
+        print(f"{raw:>14}  ->  {rename_candidates(ident, set())[:6]}")
@@ -0,0 +1,170 @@
+"""In-process metrics with a Prometheus text-format exporter.
+
+Deliberately tiny and dependency-free so it can stay on in production: a
+histogram observation is one `perf_counter` pair, a bisect over a fixed
+bucket list and a few integer increments under a lock. No background
+threads, no per-request allocation beyond the label tuple.
+
+    with span("predict", "forward"):
+        ...
+    BATCH_SIZE.observe(len(samples), endpoint="batch")
+    REGISTRY.render()   # -> text for GET /metrics
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_: str, labels: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help_
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, kw: dict) -> tuple[str, ...]:
+        return tuple(str(kw.get(n, "")) for n in self.labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *a, **kw) -> None:
+        super().__init__(*a, **kw)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels: str) -> None:
+        """Overwrite a series — for mirroring counters kept by another component."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_fmt_labels(self.labels, k)} {_fmt_value(v)}"
+                                for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_: str, labels: Iterable[str] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help_, labels)
+        self.buckets = tuple(buckets)
+        # per label key: [bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[idx] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0
+            bounds = [str(b) for b in self.buckets] + ["+Inf"]
+            for bound, n in zip(bounds, series):
+                cumulative += n
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_value(series[-1])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], None]) -> None:
+        """`fn` runs at scrape time to refresh gauges from other components."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            fn()
+        lines: list[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "iraf_stage_seconds", "Wall time per scoring stage.", ("endpoint", "stage")))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "iraf_request_seconds", "End-to-end HTTP request time incl. serialization.",
+    ("path", "status")))
+BATCH_SIZE = REGISTRY.register(Histogram(
+    "iraf_batch_size", "Samples per request.", ("endpoint",), COUNT_BUCKETS))
+IDENTIFIERS = REGISTRY.register(Histogram(
+    "iraf_identifiers_per_sample", "Identifiers scored per sample (after MAX_IDS cap).",
+    ("endpoint",), COUNT_BUCKETS))
+TOKENS = REGISTRY.register(Histogram(
+    "iraf_tokens_per_sample", "Normalised identifier tokens (IRAF-XADL) or model "
+    "tokens (ECRVR-MVEL) per sample.", ("endpoint",), COUNT_BUCKETS))
+CACHE_EVENTS = REGISTRY.register(Counter(
+    "iraf_cache_events_total", "Cache lookups by cache and result (hit/miss).",
+    ("cache", "result")))
+MODEL_INFO = REGISTRY.register(Gauge(
+    "iraf_model_info", "Loaded model versions (value is always 1).",
+    ("model", "version", "format")))
+
+
+@contextmanager
+def span(endpoint: str, stage: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint, stage=stage)
@@ -18,6 +18,7 @@ from sklearn.metrics import (accuracy_score, f1_score, precision_score,
 from torch.utils.data import DataLoader, Subset
 
 from .dataset import CodeReadabilityDataset, LABELS, collate
+from .features import lexicon_fingerprint
 from .model import SABiLSTM
 
 logger = logging.getLogger(__name__)
@@ -118,12 +119,24 @@ def train(ds: CodeReadabilityDataset, cfg: TrainConfig | None = None) -> dict:
     if best_state is not None and cfg.save_path:
         Path(cfg.save_path).parent.mkdir(parents=True, exist_ok=True)
         torch.save({"state_dict": best_state, "labels": LABELS,
-                    "struct_dim": getattr(ds, "struct_dim", 0)}, cfg.save_path)
+                    "struct_dim": getattr(ds, "struct_dim", 0),
+                    "feature_background": _feature_background(ds, train_set.indices),
+                    "lexicon": lexicon_fingerprint()},
+                   cfg.save_path)
         logger.info("Saved best checkpoint (acc=%.4f) -> %s", best_acc, cfg.save_path)
 
     return {"best_accuracy": best_acc, "history": history}
 
 
+def _feature_background(ds: CodeReadabilityDataset, indices: list[int]) -> list[list[float]]:
+    """Mean per-identifier feature row over the train split — the reference
+    point for exact Shapley attributions (src/shapley.py)."""
+    rows = [ds.feats[i][:ds.n_ids[i]] for i in indices if ds.n_ids[i]]
+    if not rows:
+        return [[0.5] * ds.feats[0].shape[1]] if ds.feats else []
+    return [np.concatenate(rows).mean(axis=0).round(6).tolist()]
+
+
 @torch.no_grad()
 def _evaluate(model, loader, device, loss_fn) -> tuple[float, dict]:
     model.eval()
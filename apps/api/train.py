@@ -18,6 +18,8 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from src.dataset import CodeReadabilityDataset
 from src.embeddings import Embedder
+from src.features import use_lexicon
+from src.lexicon import Lexicon
 from src.trainer import TrainConfig, train
 
 
@@ -34,6 +36,9 @@ def main() -> None:
     p.add_argument("--save", default="artifacts/iraf_xadl.pt")
     p.add_argument("--no-codebert", action="store_true",
                    help="Use the hash-based fallback embedder.")
+    p.add_argument("--lexicon", default=None,
+                   help="Compiled lexicon for MC/LF/DR (see build_lexicon.py); "
+                        "serve with the same LEXICON_PATH.")
     args = p.parse_args()
 
     import datetime, os
@@ -53,6 +58,8 @@ def main() -> None:
     logging.info("Run ID: %s | data=%s | epochs=%d | lr=%s | save=%s",
                  run_id, args.data, args.epochs, args.lr, args.save)
 
+    if args.lexicon:
+        use_lexicon(Lexicon.open(args.lexicon))
     print(f"Loading dataset: {args.data} ({args.language})")
     ds = CodeReadabilityDataset(args.data, args.language,
                                 embedder=Embedder(use_codebert=not args.no_codebert))